@@ -1,23 +1,147 @@
 from pyrogram import Client
+import argparse
+import asyncio
+import logging
 import os
+import time
+from config import Config
+from helpers.peers import PeerCache
+from helpers.admins import AdminCache
+from helpers.edits import EditCoalescer
+from helpers.outbound import OutboundScheduler
+from helpers.dispatcher import ChatShardDispatcher
+from helpers.ipc import IngestServer
+from helpers.reconcile import MembershipReconciler
+from helpers import metrics
+from database import (
+    init_db, close_db, run_migrations, start_background_writers, stop_background_writers,
+    load_hitrun_index, restore_join_snapshot, on_settings_change, iter_channel_ids,
+    load_blocklists, share_global_stats_rollup, on_blocklist_change
+)
+
+logger = logging.getLogger(__name__)
+
+# Restart-to-enforcing time is measured from interpreter start-up
+LAUNCHED_AT = time.perf_counter()
 
 class GuardianBot(Client):
-    def __init__(self):
+    def __init__(self, update_workers: int = Config.UPDATE_WORKERS, split_workers: int = Config.SPLIT_WORKERS):
         super().__init__(
             name="guardian_bot",
             api_id=int(os.environ["API_ID"]),
             api_hash=os.environ["API_HASH"],
             bot_token=os.environ["BOT_TOKEN"],
-            in_memory=True
+            plugins=dict(root="plugins"),
+            workdir=Config.SESSION_DIR,
+            in_memory=Config.SESSION_IN_MEMORY
+        )
+        self.peers = PeerCache(self, maxsize=Config.PEER_CACHE_SIZE, ttl=Config.PEER_CACHE_TTL)
+        self.admin_cache = AdminCache(
+            self,
+            maxsize=Config.ADMIN_CACHE_SIZE,
+            ttl=Config.ADMIN_CACHE_TTL,
+            failure_ttl=Config.ADMIN_CACHE_FAILURE_TTL
         )
+        self.outbound = OutboundScheduler(
+            global_rate=Config.OUTBOUND_GLOBAL_RATE,
+            global_burst=Config.OUTBOUND_GLOBAL_BURST,
+            chat_rate=Config.OUTBOUND_CHAT_RATE,
+            chat_burst=Config.OUTBOUND_CHAT_BURST,
+            concurrency=Config.OUTBOUND_CONCURRENCY,
+            max_retries=Config.OUTBOUND_MAX_RETRIES,
+            max_flood_waits=Config.OUTBOUND_MAX_FLOOD_WAITS
+        )
+        # Not `dispatcher`: that name is pyrogram's own update dispatcher
+        self.shards = ChatShardDispatcher(workers=update_workers, queue_size=Config.UPDATE_QUEUE_SIZE)
+        self.edits = EditCoalescer(self.outbound, delay=Config.EDIT_COALESCE_DELAY)
+        # In split mode member events are forwarded to worker processes
+        self.split_workers = split_workers
+        self.event_sink = None
+        self._prewarm_task = None
+        self._reconcile_task = None
+
+    async def _prewarm_peers(self):
+        started = time.perf_counter()
+        try:
+            resolved, failed = await self.peers.prewarm(iter_channel_ids(Config.PEER_PREWARM_BATCH))
+            logger.info(
+                f"🔥 Peer cache warmed: {resolved} chats resolved, {failed} failed "
+                f"in {time.perf_counter() - started:.2f}s"
+            )
+        except Exception as e:
+            logger.error(f"❌ Peer pre-warm failed: {e}")
+
+    @metrics.timed_api
+    async def invoke(self, query, *args, **kwargs):
+        return await super().invoke(query, *args, **kwargs)
 
     async def start(self):
+        if not Config.SESSION_IN_MEMORY:
+            os.makedirs(Config.SESSION_DIR, exist_ok=True)
+        await metrics.start_server()
+        # Fail before connecting to Telegram if Mongo is unreachable
+        await init_db()
+        # Everything handlers depend on is ready before super().start()
+        # delivers the first update: migrated schema, in-memory indexes,
+        # writers and schedulers
+        await run_migrations()
+        if self.split_workers > 0:
+            share_global_stats_rollup()
+        start_background_writers()
+        await load_hitrun_index()
+        await load_blocklists()
+        await restore_join_snapshot()
+        self.outbound.start()
+        self.shards.start()
         await super().start()
+        await self.peers.load_me()
+        if self.split_workers > 0:
+            sink = IngestServer(self, self.split_workers, Config.SPLIT_SOCKET, Config.SPLIT_MAX_INFLIGHT)
+            await sink.start()
+            on_settings_change(sink.invalidate_settings)
+            on_blocklist_change(sink.blocklist_changed)
+            self.event_sink = sink
+        logger.info(f"🛡️ Enforcing {time.perf_counter() - LAUNCHED_AT:.2f}s after launch")
+        if Config.PEER_PREWARM_BATCH > 0:
+            # Handlers are live already; warming only speeds up first lookups
+            self._prewarm_task = asyncio.create_task(self._prewarm_peers())
+        if Config.RECONCILE_CONCURRENCY > 0 and self.split_workers == 0:
+            # Join times live in this process only when it handles member updates itself
+            reconciler = MembershipReconciler(
+                self,
+                concurrency=Config.RECONCILE_CONCURRENCY,
+                rate=Config.RECONCILE_RATE,
+                batch_size=Config.RECONCILE_BATCH
+            )
+            self._reconcile_task = asyncio.create_task(reconciler.run())
         print("✅ GuardianBot started successfully")
 
     async def stop(self, *args):
+        for task in (self._prewarm_task, self._reconcile_task):
+            if task is not None:
+                task.cancel()
+        self._prewarm_task = self._reconcile_task = None
+        # pyrogram's update dispatcher first: once its handlers have returned,
+        # nothing new reaches the shards, the writers or the database
+        await self.dispatcher.stop()
+        if self.event_sink is not None:
+            # Workers still need the outbound scheduler while they drain
+            await self.event_sink.stop()
+            self.event_sink = None
+        await self.shards.stop()
+        await self.edits.drain()
+        await self.outbound.stop()
+        await stop_background_writers()
         await super().stop()
+        close_db()
+        await metrics.stop_server()
         print("🛑 GuardianBot stopped")
 
 if __name__ == "__main__":
-    GuardianBot().run()
+    parser = argparse.ArgumentParser(description="Guardian Bot")
+    parser.add_argument(
+        "--split", type=int, default=Config.SPLIT_WORKERS,
+        help="run member-update handling in this many worker processes (0 = single process)"
+    )
+    args = parser.parse_args()
+    GuardianBot(split_workers=args.split).run()
@@ -17,3 +17,100 @@ class Config:
 
 
     LOG_LEVEL = logging.INFO  
+
+    # MongoDB client: pool size, timeouts (ms; 0 = none) and wire compression,
+    # tried in order and negotiated with the server (unavailable ones are skipped)
+    MONGO_DB_NAME = os.getenv("MONGO_DB_NAME", "guardian_bot")
+    MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "50"))
+    MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "0"))
+    MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "5000"))
+    MONGO_CONNECT_TIMEOUT_MS = int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", "5000"))
+    MONGO_SOCKET_TIMEOUT_MS = int(os.getenv("MONGO_SOCKET_TIMEOUT_MS", "30000"))
+    MONGO_COMPRESSORS = os.getenv("MONGO_COMPRESSORS", "zstd,snappy,zlib")
+
+    # Pyrogram session: a file in SESSION_DIR keeps resolved peers across restarts
+    SESSION_DIR = os.getenv("SESSION_DIR", "sessions")
+    SESSION_IN_MEMORY = os.getenv("SESSION_IN_MEMORY", "false").lower() in ("1", "true", "yes")
+
+    # In-process channel settings cache (LRU + TTL)
+    SETTINGS_CACHE_SIZE = int(os.getenv("SETTINGS_CACHE_SIZE", "5000"))
+    SETTINGS_CACHE_TTL = float(os.getenv("SETTINGS_CACHE_TTL", "300"))
+
+    # Telegram peer metadata cache (chats / users)
+    PEER_CACHE_SIZE = int(os.getenv("PEER_CACHE_SIZE", "5000"))
+    PEER_CACHE_TTL = float(os.getenv("PEER_CACHE_TTL", "600"))
+    # Settings panel edits: only the latest render per message within this window is sent
+    EDIT_COALESCE_DELAY = float(os.getenv("EDIT_COALESCE_DELAY", "0.3"))
+
+    # Chat administrator lists used for permission checks
+    ADMIN_CACHE_SIZE = int(os.getenv("ADMIN_CACHE_SIZE", "5000"))
+    ADMIN_CACHE_TTL = float(os.getenv("ADMIN_CACHE_TTL", "300"))
+    # Where the list can't be fetched: how long that and per-user answers are kept
+    ADMIN_CACHE_FAILURE_TTL = float(os.getenv("ADMIN_CACHE_FAILURE_TTL", "60"))
+    # Chats resolved at startup, in pages of this size (0 disables pre-warming)
+    PEER_PREWARM_BATCH = int(os.getenv("PEER_PREWARM_BATCH", "200"))
+
+    # Write-behind stats counters
+    STATS_FLUSH_INTERVAL = float(os.getenv("STATS_FLUSH_INTERVAL", "2"))
+    STATS_FLUSH_MAX_KEYS = int(os.getenv("STATS_FLUSH_MAX_KEYS", "500"))
+    # Hourly stats history (one document per chat per day) is kept this many days
+    STATS_HISTORY_DAYS = int(os.getenv("STATS_HISTORY_DAYS", "8"))
+
+    # Batched audit log writer ("drop" or "block" when the queue is full)
+    AUDIT_QUEUE_SIZE = int(os.getenv("AUDIT_QUEUE_SIZE", "10000"))
+    AUDIT_BATCH_SIZE = int(os.getenv("AUDIT_BATCH_SIZE", "200"))
+    AUDIT_LINGER = float(os.getenv("AUDIT_LINGER", "0.5"))
+    AUDIT_FULL_POLICY = os.getenv("AUDIT_FULL_POLICY", "drop")
+
+    # In-memory hit-and-run flags (8 bytes per flag; beyond this cap, Mongo is queried)
+    HITRUN_INDEX_MAX_ENTRIES = int(os.getenv("HITRUN_INDEX_MAX_ENTRIES", "10000000"))
+
+    # Anti hit-and-run window; join times live in memory and are optionally
+    # snapshotted to Mongo every JOIN_SNAPSHOT_INTERVAL seconds (0 disables)
+    HITRUN_WINDOW_SECONDS = float(os.getenv("HITRUN_WINDOW_SECONDS", "300"))
+    JOIN_SNAPSHOT_INTERVAL = float(os.getenv("JOIN_SNAPSHOT_INTERVAL", "0"))
+
+    # Startup scan of recent members in anti_hitrun chats (0 concurrency disables);
+    # RECONCILE_RATE is member-list requests per second across all scans
+    RECONCILE_CONCURRENCY = int(os.getenv("RECONCILE_CONCURRENCY", "4"))
+    RECONCILE_RATE = float(os.getenv("RECONCILE_RATE", "2"))
+    RECONCILE_BATCH = int(os.getenv("RECONCILE_BATCH", "50"))
+
+    # Multi-step conversation state ("memory" = this process only, "mongo" = shared)
+    STATE_BACKEND = os.getenv("STATE_BACKEND", "memory")
+    STATE_TTL = float(os.getenv("STATE_TTL", "600"))
+    STATE_MAX_ENTRIES = int(os.getenv("STATE_MAX_ENTRIES", "10000"))
+
+    # Shared blocklists are stored as chunks of this many packed user ids
+    BLOCKLIST_CHUNK_SIZE = int(os.getenv("BLOCKLIST_CHUNK_SIZE", "10000"))
+
+    # Join-raid detection defaults (per-chat overrides live in the settings document)
+    RAID_THRESHOLD = int(os.getenv("RAID_THRESHOLD", "20"))
+    RAID_WINDOW_SECONDS = float(os.getenv("RAID_WINDOW_SECONDS", "10"))
+    RAID_COOLDOWN_SECONDS = float(os.getenv("RAID_COOLDOWN_SECONDS", "120"))
+    RAID_BAN_BATCH_DELAY = float(os.getenv("RAID_BAN_BATCH_DELAY", "1"))
+    RAID_BAN_CONCURRENCY = int(os.getenv("RAID_BAN_CONCURRENCY", "5"))
+
+    # Outbound Telegram API scheduler (token buckets are calls per second)
+    OUTBOUND_GLOBAL_RATE = float(os.getenv("OUTBOUND_GLOBAL_RATE", "25"))
+    OUTBOUND_GLOBAL_BURST = float(os.getenv("OUTBOUND_GLOBAL_BURST", "25"))
+    OUTBOUND_CHAT_RATE = float(os.getenv("OUTBOUND_CHAT_RATE", "5"))
+    OUTBOUND_CHAT_BURST = float(os.getenv("OUTBOUND_CHAT_BURST", "20"))
+    OUTBOUND_CONCURRENCY = int(os.getenv("OUTBOUND_CONCURRENCY", "16"))
+    OUTBOUND_MAX_RETRIES = int(os.getenv("OUTBOUND_MAX_RETRIES", "3"))
+    OUTBOUND_MAX_FLOOD_WAITS = int(os.getenv("OUTBOUND_MAX_FLOOD_WAITS", "5"))
+
+    # Member updates are processed on per-chat sharded worker queues
+    UPDATE_WORKERS = int(os.getenv("UPDATE_WORKERS", "8"))
+    UPDATE_QUEUE_SIZE = int(os.getenv("UPDATE_QUEUE_SIZE", "1000"))
+
+    # Split mode: this process ingests updates, SPLIT_WORKERS processes handle them
+    SPLIT_WORKERS = int(os.getenv("SPLIT_WORKERS", "0"))
+    SPLIT_SOCKET = os.getenv("SPLIT_SOCKET", "/tmp/guardian_bot.sock")
+    SPLIT_MAX_INFLIGHT = int(os.getenv("SPLIT_MAX_INFLIGHT", "500"))
+
+    # Prometheus metrics endpoint (0 disables metrics and all instrumentation)
+    METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+    # Localhost only by default; set 0.0.0.0 to let an external scraper in
+    METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+
@@ -2,6 +2,19 @@
 from .db_handler import (
     get_channel_settings, update_setting, increment_stat,
     add_supervisor, remove_supervisor, is_supervisor,
-    record_leave, is_recent_rejoin,
-    get_all_channels, get_global_stats, log_action
-)
\ No newline at end of file
+    record_join, get_and_clear_join_time, restore_join_snapshot, record_reconciled_joins,
+    get_reconcile_checkpoint, save_reconcile_checkpoint,
+    is_hitrun_leaver, flag_as_hitrun, load_hitrun_index, get_join_context,
+    load_blocklists, is_blocklisted, get_blocklist_names, get_blocklist_sizes, create_blocklist,
+    import_blocklist_ids, merge_blocklists, publish_to_blocklists,
+    on_blocklist_change, apply_blocklist_change,
+    subscribe_blocklist, unsubscribe_blocklist,
+    get_all_channels, get_channels_page, iter_channel_ids, get_global_stats, rebuild_global_stats,
+    share_global_stats_rollup, log_action,
+    get_settings_cache_stats, get_channel_stats, get_stats_history, get_audit_metrics,
+    get_logs_page, iter_logs, iter_stats_history,
+    init_db, ping_db, close_db, get_pool_stats,
+    on_settings_change, invalidate_settings, set_pending_state, pop_pending_state,
+    start_background_writers, stop_background_writers
+)
+from .migrations import run_migrations
\ No newline at end of file
@@ -0,0 +1,109 @@
+# database/audit_queue.py
+import asyncio
+import logging
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+
+class AuditQueue:
+    """Bounded queue of audit entries drained in batches by one background writer.
+
+    When the queue is full, `policy="drop"` discards the new entry (counted in
+    `dropped`) and `policy="block"` makes the caller wait for room.
+    """
+
+    def __init__(self, write_fn, maxsize: int = 10000, batch_size: int = 200,
+                 linger: float = 0.5, policy: str = "drop"):
+        if policy not in ("drop", "block"):
+            raise ValueError(f"Unknown audit queue policy: {policy}")
+        self.write_fn = write_fn
+        self.batch_size = batch_size
+        self.linger = linger
+        self.policy = policy
+        self._queue = asyncio.Queue(maxsize=maxsize)
+        self._task = None
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.batches = 0
+        self._recent_batches = deque(maxlen=100)
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def put(self, entry: dict):
+        if self.policy == "block":
+            await self._queue.put(entry)
+            return
+        try:
+            self._queue.put_nowait(entry)
+        except asyncio.QueueFull:
+            self.dropped += 1
+
+    async def _collect(self, first) -> tuple[list, bool]:
+        """Gather up to batch_size entries, waiting at most `linger` seconds"""
+        batch = [first]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.linger
+        while len(batch) < self.batch_size:
+            try:
+                entry = self._queue.get_nowait()
+            except asyncio.QueueEmpty:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    entry = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+            if entry is None:
+                return batch, True
+            batch.append(entry)
+        return batch, False
+
+    async def _write(self, batch: list):
+        try:
+            await self.write_fn(batch)
+            self.written += len(batch)
+        except Exception as e:
+            self.failed += len(batch)
+            logger.error(f"❌ Audit batch write failed ({len(batch)} entries): {e}")
+        self.batches += 1
+        self._recent_batches.append(len(batch))
+
+    async def _run(self):
+        while True:
+            first = await self._queue.get()
+            if first is None:
+                return
+            batch, stopping = await self._collect(first)
+            await self._write(batch)
+            if stopping:
+                # Everything queued before the stop sentinel has been collected
+                return
+
+    def start(self):
+        if not self.running:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        """Drain everything queued so far, then stop the writer"""
+        if self.running:
+            await self._queue.put(None)
+            await self._task
+        self._task = None
+
+    def metrics(self) -> dict:
+        recent = self._recent_batches
+        return {
+            "depth": self._queue.qsize(),
+            "maxsize": self._queue.maxsize,
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "batches": self.batches,
+            "avg_batch": round(sum(recent) / len(recent), 1) if recent else 0.0,
+            "max_batch": max(recent) if recent else 0,
+        }
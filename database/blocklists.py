@@ -0,0 +1,115 @@
+# database/blocklists.py
+import logging
+import sys
+from array import array
+from helpers.intset import IntSet
+
+logger = logging.getLogger(__name__)
+
+
+def pack_ids(user_ids) -> bytes:
+    """Sorted, de-duplicated ids as little-endian int64s (8 bytes per id)"""
+    ids = array("q", sorted(set(user_ids)))
+    if sys.byteorder == "big":
+        ids.byteswap()
+    return ids.tobytes()
+
+
+def unpack_ids(data: bytes) -> array:
+    ids = array("q")
+    ids.frombytes(data)
+    if sys.byteorder == "big":
+        ids.byteswap()
+    return ids
+
+
+def chunk_docs(name: str, user_ids, chunk_size: int) -> list:
+    """Split ids into blocklist_chunks documents of at most chunk_size ids each"""
+    ordered = sorted(set(user_ids))
+    docs = []
+    for start in range(0, len(ordered), chunk_size):
+        part = ordered[start:start + chunk_size]
+        docs.append({
+            "list": name,
+            "count": len(part),
+            "min": part[0],
+            "max": part[-1],
+            "ids": pack_ids(part),
+        })
+    return docs
+
+
+class BlocklistIndex:
+    """In-memory copy of the shared blocklists: list name -> IntSet.
+
+    A list is stored as chunk documents, each a sorted run of packed ids.
+    Chunks may overlap (imports and merges only append), so loading does a
+    k-way merge of the runs, dropping duplicates, in O(n log chunks).
+
+    Bulk merges run on a copy (begin_merge/finish_merge) so the caller can
+    do the work off the event loop; ids added meanwhile are journaled and
+    replayed onto the result.
+    """
+
+    def __init__(self):
+        self._lists = {}
+        self._journals = {}  # list name -> ids added while a merge runs
+
+    def names(self) -> list:
+        return sorted(self._lists)
+
+    def load(self, name: str, runs: list):
+        self._lists[name] = IntSet.from_sorted_runs(runs)
+
+    def ensure(self, name: str):
+        self._lists.setdefault(name, IntSet())
+
+    def add(self, name: str, user_ids) -> int:
+        users = self._lists.get(name)
+        if users is None:
+            users = self._lists[name] = IntSet()
+        journal = self._journals.get(name)
+        if journal is not None:
+            user_ids = list(user_ids)
+            journal.extend(user_ids)
+        return users.update(user_ids)
+
+    def snapshot(self, name: str) -> IntSet:
+        users = self._lists.get(name)
+        return users.copy() if users is not None else IntSet()
+
+    def missing(self, name: str, user_ids) -> array:
+        """Sorted ids from user_ids that the list does not hold yet"""
+        users = self._lists.get(name)
+        return users.missing(user_ids) if users is not None else array("q", sorted(set(user_ids)))
+
+    def begin_merge(self, name: str) -> IntSet:
+        """Copy of the list to merge into; adds are journaled until finish_merge"""
+        self._journals[name] = []
+        return self.snapshot(name)
+
+    def finish_merge(self, name: str, merged: IntSet):
+        merged.update(self._journals.pop(name, ()))
+        self._lists[name] = merged
+
+    def abort_merge(self, name: str):
+        self._journals.pop(name, None)
+
+    def contains_any(self, names, user_id: int) -> bool:
+        """Membership in the union of `names` (binary search per list)"""
+        for name in names:
+            users = self._lists.get(name)
+            if users is not None and user_id in users:
+                return True
+        return False
+
+    def size(self, name: str) -> int:
+        users = self._lists.get(name)
+        return len(users) if users is not None else 0
+
+    def stats(self) -> dict:
+        return {
+            "lists": len(self._lists),
+            "entries": sum(len(users) for users in self._lists.values()),
+            "bytes": sum(users.nbytes for users in self._lists.values()),
+        }
@@ -1,137 +1,338 @@
 # database/db_handler.py
+import asyncio
 import logging
+import time
+from copy import deepcopy
 from datetime import datetime, timezone, timedelta
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
 from config import Config
+from helpers.cache import TTLCache
+from helpers.intset import IntSet
+from helpers.metrics import timed, counted
+from .stats_buffer import StatsBuffer
+from .audit_queue import AuditQueue
+from .hitrun_index import HitrunIndex
+from .join_tracker import JoinTracker, JoinSnapshotter
+from .state_store import MemoryStateStore, MongoStateStore
+from .blocklists import BlocklistIndex, chunk_docs, pack_ids, unpack_ids
+from .pool_stats import PoolStats
 
 logger = logging.getLogger(__name__)
 
-client = AsyncIOMotorClient(Config.MONGO_URI)
-db = client["guardian_bot"]
-channels_col = db["channels"]
-logs_col = db["action_logs"]
-leavers_col = db["recent_leavers"]
+def _timed_db(func):
+    return timed("guardian_db_seconds", "Latency of database helper calls", function=func.__name__)(func)
 
-DEFAULT_SETTINGS = {
-    "rejoin_ban": False,
-    "maintenance": False,
-    "supervisors": [],
-    "stats": {"joins": 0, "bans": 0, "maintenance_hits": 0},
-}
+# Created by init_db() at startup, so importing the package never connects
+client = None
+db = None
+pool_stats = PoolStats()
 
-async def init_db_indexes():
-    try:
-        await channels_col.create_index("chat_id", unique=True)
-        await channels_col.create_index("supervisors")
-        await logs_col.create_index("timestamp", expireAfterSeconds=90 * 24 * 3600)
-        await leavers_col.create_index([("chat_id", 1), ("user_id", 1)], unique=True)
-        await leavers_col.create_index("leave_time", expireAfterSeconds=86400)  # 24h
-        logger.info("✅ DB indexes created")
-    except Exception as e:
-        logger.error(f"❌ Index creation error: {e}")
+def bind_database(database):
+    """Point every collection handle below at `database`"""
+    global db, channels_col, logs_col, active_members_col, hitrun_leavers_col, meta_col
+    global stats_history_col, state_col, blocklists_col, blocklist_chunks_col, conversation_state
+    db = database
+    channels_col = db["channels"]
+    logs_col = db["action_logs"]
+    active_members_col = db["active_members"]      # Tracks current members' join time
+    hitrun_leavers_col = db["hitrun_leavers"]      # Permanent flag for hit-and-run leavers
+    meta_col = db["meta"]                          # Stats rollup ("global") and schema version ("schema")
+    stats_history_col = db["stats_history"]        # One document per chat per day, 24 hourly slots
+    state_col = db["conversation_state"]           # Pending multi-step flows (STATE_BACKEND=mongo)
+    blocklists_col = db["blocklists"]              # Shared blocklist names and metadata
+    blocklist_chunks_col = db["blocklist_chunks"]  # Packed, sorted runs of blocklisted user ids
+    if Config.STATE_BACKEND == "mongo":
+        conversation_state = MongoStateStore(state_col, ttl=Config.STATE_TTL)
 
-async def get_channel_settings(chat_id: int) -> dict:
-    try:
-        doc = await channels_col.find_one({"chat_id": chat_id})
-        if not doc:
-            doc = {
-                "chat_id": chat_id,
-                "added_on": datetime.now(timezone.utc),
-                **DEFAULT_SETTINGS
-            }
-            await channels_col.insert_one(doc)
-            logger.info(f"🆕 Registered channel: {chat_id}")
-        return doc
-    except Exception as e:
-        logger.error(f"❌ Settings fetch error {chat_id}: {e}")
-        return {"chat_id": chat_id, "added_on": datetime.now(timezone.utc), **DEFAULT_SETTINGS}
-    
-# database/db_handler.py (FULL UPDATED VERSION)
-import logging
-from datetime import datetime, timezone, timedelta
-from motor.motor_asyncio import AsyncIOMotorClient
-from config import Config
+async def init_db():
+    """Create the Motor client from Config and fail fast if the server doesn't answer"""
+    global client
+    if client is None:
+        options = {
+            "maxPoolSize": Config.MONGO_MAX_POOL_SIZE,
+            "minPoolSize": Config.MONGO_MIN_POOL_SIZE,
+            "serverSelectionTimeoutMS": Config.MONGO_SERVER_SELECTION_TIMEOUT_MS,
+            "connectTimeoutMS": Config.MONGO_CONNECT_TIMEOUT_MS,
+            "socketTimeoutMS": Config.MONGO_SOCKET_TIMEOUT_MS,
+            "event_listeners": [pool_stats],
+        }
+        if Config.MONGO_COMPRESSORS:
+            options["compressors"] = Config.MONGO_COMPRESSORS
+        client = AsyncIOMotorClient(Config.MONGO_URI, **options)
+        bind_database(client[Config.MONGO_DB_NAME])
+    latency = await ping_db()
+    logger.info(f"✅ MongoDB reachable ({latency * 1000:.1f}ms ping)")
 
-logger = logging.getLogger(__name__)
+async def ping_db() -> float:
+    """Round-trip a ping to the server; returns seconds, raises if unreachable"""
+    started = asyncio.get_running_loop().time()
+    await db.client.admin.command("ping")
+    return asyncio.get_running_loop().time() - started
+
+def close_db():
+    global client
+    if client is not None:
+        client.close()
+        client = None
 
-client = AsyncIOMotorClient(Config.MONGO_URI)
-db = client["guardian_bot"]
-channels_col = db["channels"]
-logs_col = db["action_logs"]
-active_members_col = db["active_members"]      # Tracks current members' join time
-hitrun_leavers_col = db["hitrun_leavers"]      # Permanent flag for hit-and-run leavers
+def get_pool_stats() -> dict:
+    return {**pool_stats.snapshot(), "max_pool_size": Config.MONGO_MAX_POOL_SIZE}
 
 DEFAULT_SETTINGS = {
     "anti_hitrun": False,       # RENAMED from rejoin_ban to reflect new logic
     "maintenance": False,
+    "anti_raid": False,
+    "raid_threshold": Config.RAID_THRESHOLD,
+    "raid_window": Config.RAID_WINDOW_SECONDS,
+    "raid_cooldown": Config.RAID_COOLDOWN_SECONDS,
     "supervisors": [],
+    "blocklists": [],           # Shared blocklists this chat subscribes to (and feeds)
     "stats": {"joins": 0, "bans": 0, "maintenance_hits": 0},
 }
 
-async def init_db_indexes():
+STAT_FIELDS = ("joins", "bans", "maintenance_hits")
+
+GLOBAL_STATS_ID = "global"
+
+# Serializes rollup writes (stats flushes, registrations) against the final
+# write of a rebuild, so a recount never overwrites increments applied while
+# it ran. The lock is only held for short writes; during the rebuild's scan
+# stats flushes wait on _rollup_open instead (counts keep buffering in memory)
+_rollup_lock = asyncio.Lock()
+_rollup_open = asyncio.Event()
+_rollup_open.set()
+
+# Split mode: workers flush stats from other processes, which the lock and
+# gate above can't see. There a rebuild also takes a lease in meta, and every
+# flush waits while it is held. A flush that checked just before the lease
+# was taken gets ROLLUP_LEASE_GRACE seconds to land before the scan starts
+ROLLUP_LEASE_ID = "global_rebuild"
+ROLLUP_LEASE_SECONDS = 600      # outlives a crashed rebuild, not a live one
+ROLLUP_LEASE_GRACE = 2.0
+_rollup_shared = False
+
+# chat_id -> settings document; kept in sync by every write helper below.
+# The cached "stats" subdocument is only a load-time snapshot; use
+# get_channel_stats() for live counters.
+settings_cache = TTLCache(maxsize=Config.SETTINGS_CACHE_SIZE, ttl=Config.SETTINGS_CACHE_TTL)
+
+# Callbacks run with chat_id after any settings write (split mode uses this
+# to invalidate the copy cached by the worker owning the chat)
+settings_listeners = []
+
+def on_settings_change(callback):
+    settings_listeners.append(callback)
+
+def _notify_settings_change(chat_id: int):
+    for callback in settings_listeners:
+        try:
+            callback(chat_id)
+        except Exception as e:
+            logger.error(f"❌ Settings listener error {chat_id}: {e}")
+
+def invalidate_settings(chat_id: int):
+    settings_cache.pop(chat_id)
+
+def get_settings_cache_stats() -> dict:
+    return settings_cache.stats()
+
+# Pending multi-step flows, keyed by (flow name, user_id); the Mongo-backed
+# store is created by bind_database()
+conversation_state = MemoryStateStore(maxsize=Config.STATE_MAX_ENTRIES, ttl=Config.STATE_TTL)
+
+async def set_pending_state(flow: str, user_id: int, value):
     try:
-        await channels_col.create_index("chat_id", unique=True)
-        await channels_col.create_index("supervisors")
-        await logs_col.create_index("timestamp", expireAfterSeconds=90 * 24 * 3600)
-        
-        # New collections
-        await active_members_col.create_index([("chat_id", 1), ("user_id", 1)], unique=True)
-        await hitrun_leavers_col.create_index([("chat_id", 1), ("user_id", 1)], unique=True)
-        
-        logger.info("✅ DB indexes created")
+        await conversation_state.set(flow, user_id, value)
     except Exception as e:
-        logger.error(f"❌ Index creation error: {e}")
+        logger.error(f"❌ State write error {flow}/{user_id}: {e}")
+
+async def pop_pending_state(flow: str, user_id: int):
+    """Take (and clear) a user's pending state for `flow`; None if absent or expired"""
+    try:
+        return await conversation_state.pop(flow, user_id)
+    except Exception as e:
+        logger.error(f"❌ State read error {flow}/{user_id}: {e}")
+        return None
 
+async def init_db_indexes():
+    """Build every index, each on its own; raises if any of them failed.
+
+    One failure (say, duplicates under a unique index) must not silently skip
+    the TTL indexes after it, so all are attempted before reporting.
+    """
+    indexes = [
+        (channels_col, "chat_id", {"unique": True}),
+        (channels_col, "supervisors", {}),
+        (logs_col, "timestamp", {"expireAfterSeconds": 90 * 24 * 3600}),
+        # Matches get_logs_page's sort, so a page is an index walk, not a sort
+        (logs_col, [("chat_id", 1), ("timestamp", -1), ("_id", -1)], {}),
+        (active_members_col, [("chat_id", 1), ("user_id", 1)], {"unique": True}),
+        (active_members_col, "join_time", {"expireAfterSeconds": int(Config.HITRUN_WINDOW_SECONDS)}),
+        (hitrun_leavers_col, [("chat_id", 1), ("user_id", 1)], {"unique": True}),
+        (stats_history_col, "expire_at", {"expireAfterSeconds": 0}),
+        (stats_history_col, [("chat_id", 1), ("day", 1)], {}),
+        (blocklist_chunks_col, "list", {}),
+    ]
+    failed = []
+    for collection, keys, options in indexes:
+        try:
+            await collection.create_index(keys, **options)
+        except Exception as e:
+            logger.error(f"❌ Index {collection.name} {keys} failed: {e}")
+            failed.append(f"{collection.name} {keys}")
+    if isinstance(conversation_state, MongoStateStore):
+        try:
+            await conversation_state.ensure_indexes()
+        except Exception as e:
+            logger.error(f"❌ Conversation state index failed: {e}")
+            failed.append(conversation_state.collection.name)
+    if failed:
+        raise RuntimeError(f"{len(failed)} index(es) not built: {', '.join(failed)}")
+    logger.info("✅ DB indexes created")
+
+@_timed_db
 async def get_channel_settings(chat_id: int) -> dict:
+    cached = settings_cache.get(chat_id)
+    if cached is not None:
+        return cached
     try:
         doc = await channels_col.find_one({"chat_id": chat_id})
         if not doc:
             doc = {
                 "chat_id": chat_id,
                 "added_on": datetime.now(timezone.utc),
-                **DEFAULT_SETTINGS
+                **deepcopy(DEFAULT_SETTINGS)
             }
-            await channels_col.insert_one(doc)
+            async with _rollup_lock:
+                await channels_col.insert_one(doc)
+                # A rebuild under way counts the new chat in its final write
+                if not (_rollup_shared and await _rollup_lease_remaining() > 0):
+                    await _bump_global_stats({"channels": 1})
             logger.info(f"🆕 Registered channel: {chat_id}")
-        
-        # Backward compatibility: migrate old "rejoin_ban" to "anti_hitrun"
-        if "rejoin_ban" in doc and "anti_hitrun" not in doc:
-            doc["anti_hitrun"] = doc.pop("rejoin_ban")
-            await channels_col.update_one({"chat_id": chat_id}, {"$set": doc})
-        
+        settings_cache.set(chat_id, doc)
         return doc
     except Exception as e:
         logger.error(f"❌ Settings fetch error {chat_id}: {e}")
-        return {"chat_id": chat_id, "added_on": datetime.now(timezone.utc), **DEFAULT_SETTINGS}
+        return {"chat_id": chat_id, "added_on": datetime.now(timezone.utc), **deepcopy(DEFAULT_SETTINGS)}
 
 # === Existing functions unchanged (update_setting, increment_stat, supervisors, etc.) ===
 # ... (keep all your existing functions like update_setting, increment_stat, add_supervisor, etc.)
 
 # === New functions for Anti Hit-and-Run ===
+join_tracker = JoinTracker(window=Config.HITRUN_WINDOW_SECONDS)
+
 async def record_join(chat_id: int, user_id: int):
     """Record when a user joins (or rejoins)"""
-    try:
-        await active_members_col.update_one(
+    join_tracker.record(chat_id, user_id)
+
+async def get_and_clear_join_time(chat_id: int, user_id: int) -> datetime | None:
+    """Get join time and remove record (on leave); None once the window has passed"""
+    return join_tracker.pop(chat_id, user_id)
+
+@_timed_db
+async def _save_join_snapshot(entries: list):
+    """Replace active_members with the tracker's live entries"""
+    ops = [
+        UpdateOne(
             {"chat_id": chat_id, "user_id": user_id},
-            {"$set": {"join_time": datetime.now(timezone.utc)}},
+            {"$set": {"join_time": join_time}},
             upsert=True
         )
+        for chat_id, user_id, join_time in entries
+    ]
+    if ops:
+        await active_members_col.bulk_write(ops, ordered=False)
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=Config.HITRUN_WINDOW_SECONDS)
+    await active_members_col.delete_many({"join_time": {"$lt": cutoff}})
+
+join_snapshotter = JoinSnapshotter(join_tracker, _save_join_snapshot, Config.JOIN_SNAPSHOT_INTERVAL)
+
+@_timed_db
+async def restore_join_snapshot():
+    """Reload join times still inside the window: the last snapshot plus
+    anything recovered by reconciliation (persisted even with snapshots off)"""
+    try:
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=Config.HITRUN_WINDOW_SECONDS)
+        if Config.JOIN_SNAPSHOT_INTERVAL <= 0:
+            # No snapshotter prunes the collection in this mode
+            await active_members_col.delete_many({"join_time": {"$lt": cutoff}})
+        async for doc in active_members_col.find({"join_time": {"$gte": cutoff}}):
+            join_time = doc["join_time"]
+            if join_time.tzinfo is None:
+                join_time = join_time.replace(tzinfo=timezone.utc)
+            join_tracker.record(doc["chat_id"], doc["user_id"], join_time.timestamp())
+        logger.info(f"✅ Restored {len(join_tracker)} join times from snapshot")
     except Exception as e:
-        logger.error(f"❌ Record join failed {chat_id}/{user_id}: {e}")
+        logger.error(f"❌ Join snapshot restore failed: {e}")
 
-async def get_and_clear_join_time(chat_id: int, user_id: int) -> datetime | None:
-    """Get join time and remove record (on leave)"""
+@_timed_db
+async def record_reconciled_joins(chat_id: int, joins: list) -> int:
+    """Adopt (user_id, joined_at) pairs found by a member scan.
+
+    Joins seen live are more precise and win. Recovered entries are always
+    upserted into active_members in one bulk: the reconcile checkpoint is
+    persistent, so a restarted run skips these chats and must find their
+    joins in restore_join_snapshot() instead.
+    """
+    adopted = []
+    for user_id, joined_at in joins:
+        if (chat_id, user_id) in join_tracker:
+            continue
+        if join_tracker.record(chat_id, user_id, joined_at.timestamp()):
+            adopted.append((user_id, joined_at))
+    if adopted:
+        await active_members_col.bulk_write([
+            UpdateOne(
+                {"chat_id": chat_id, "user_id": user_id},
+                {"$max": {"join_time": joined_at}},
+                upsert=True
+            )
+            for user_id, joined_at in adopted
+        ], ordered=False)
+    return len(adopted)
+
+RECONCILE_ID = "reconcile"
+
+async def get_reconcile_checkpoint() -> dict | None:
     try:
-        doc = await active_members_col.find_one_and_delete(
-            {"chat_id": chat_id, "user_id": user_id}
-        )
-        return doc["join_time"] if doc else None
+        return await meta_col.find_one({"_id": RECONCILE_ID})
     except Exception as e:
-        logger.error(f"❌ Clear join time failed {chat_id}/{user_id}: {e}")
+        logger.error(f"❌ Reconcile checkpoint read error: {e}")
         return None
 
+async def save_reconcile_checkpoint(**fields):
+    try:
+        await meta_col.update_one({"_id": RECONCILE_ID}, {"$set": fields}, upsert=True)
+    except Exception as e:
+        logger.error(f"❌ Reconcile checkpoint write error: {e}")
+
+hitrun_index = HitrunIndex(max_entries=Config.HITRUN_INDEX_MAX_ENTRIES)
+
+@_timed_db
+async def load_hitrun_index():
+    """Stream every (chat_id, user_id) flag into memory at startup"""
+    try:
+        cursor = hitrun_leavers_col.find(
+            {}, {"_id": 0, "chat_id": 1, "user_id": 1}
+        ).sort([("chat_id", 1), ("user_id", 1)]).batch_size(10000)
+        await hitrun_index.load(cursor)
+        stats = hitrun_index.stats()
+        logger.info(f"✅ Hit-and-run index loaded: {stats['entries']} flags in {stats['chats']} chats ({stats['bytes']} bytes)")
+    except Exception as e:
+        logger.error(f"❌ Hit-and-run index load failed, using Mongo lookups: {e}")
+
+# (chat_id, user_id) flags queued in flag_queue but not yet written
+pending_flags = set()
+
+@_timed_db
 async def is_hitrun_leaver(chat_id: int, user_id: int) -> bool:
     """Check if user is flagged for hit-and-run"""
+    if hitrun_index.covers(chat_id):
+        return hitrun_index.contains(chat_id, user_id)
+    if (chat_id, user_id) in pending_flags:
+        return True
     try:
         return await hitrun_leavers_col.count_documents(
             {"chat_id": chat_id, "user_id": user_id}, limit=1
@@ -139,20 +340,301 @@ async def is_hitrun_leaver(chat_id: int, user_id: int) -> bool:
     except Exception:
         return False
 
+@_timed_db
+async def get_join_context(chat_id: int, user_id: int) -> tuple[dict, bool]:
+    """Settings and the joining user's hit-and-run flag, in at most one read.
+
+    Cached settings plus the in-memory flag index answer without Mongo; a
+    settings miss reads the channel and the flag together with one $lookup.
+    """
+    settings = settings_cache.get(chat_id)
+    if settings is not None:
+        if not settings.get("anti_hitrun", False):
+            return settings, False
+        return settings, await is_hitrun_leaver(chat_id, user_id)
+    if hitrun_index.covers(chat_id):
+        return await get_channel_settings(chat_id), hitrun_index.contains(chat_id, user_id)
+    try:
+        docs = await channels_col.aggregate([
+            {"$match": {"chat_id": chat_id}},
+            {"$limit": 1},
+            {"$lookup": {
+                "from": hitrun_leavers_col.name,
+                "pipeline": [
+                    {"$match": {"chat_id": chat_id, "user_id": user_id}},
+                    {"$limit": 1},
+                    {"$project": {"_id": 1}}
+                ],
+                "as": "_hitrun_flag"
+            }}
+        ]).to_list(1)
+    except Exception as e:
+        logger.error(f"❌ Join context fetch error {chat_id}: {e}")
+        docs = []
+    if not docs:
+        # Unregistered chat (or a failed read): take the regular path
+        settings = await get_channel_settings(chat_id)
+        flagged = settings.get("anti_hitrun", False) and await is_hitrun_leaver(chat_id, user_id)
+        return settings, flagged
+    doc = docs[0]
+    flagged = bool(doc.pop("_hitrun_flag")) or (chat_id, user_id) in pending_flags
+    settings_cache.set(chat_id, doc)
+    return doc, flagged
+
+def _only_duplicates(error: BulkWriteError) -> bool:
+    return all(err.get("code") == 11000 for err in error.details.get("writeErrors", []))
+
+@_timed_db
+async def _write_flags(batch: list):
+    try:
+        await hitrun_leavers_col.insert_many(batch, ordered=False)
+    except BulkWriteError as e:
+        # Duplicates are expected (unique index); anything else is a real failure
+        if not _only_duplicates(e):
+            raise
+    finally:
+        for doc in batch:
+            pending_flags.discard((doc["chat_id"], doc["user_id"]))
+
+# Flags are never dropped: a full queue makes the leave handler wait
+flag_queue = AuditQueue(
+    _write_flags,
+    maxsize=Config.AUDIT_QUEUE_SIZE,
+    batch_size=Config.AUDIT_BATCH_SIZE,
+    linger=Config.AUDIT_LINGER,
+    policy="block"
+)
+
+@_timed_db
 async def flag_as_hitrun(chat_id: int, user_id: int):
     """Permanently flag user (ignore duplicates due to unique index)"""
+    hitrun_index.add(chat_id, user_id)
+    doc = {
+        "chat_id": chat_id,
+        "user_id": user_id,
+        "flagged_on": datetime.now(timezone.utc)
+    }
+    if flag_queue.running:
+        pending_flags.add((chat_id, user_id))
+        await flag_queue.put(doc)
+        return
     try:
-        await hitrun_leavers_col.insert_one({
-            "chat_id": chat_id,
-            "user_id": user_id,
-            "flagged_on": datetime.now(timezone.utc)
-        })
+        await hitrun_leavers_col.insert_one(doc)
     except Exception as e:
         if "duplicate key" not in str(e).lower():
             logger.error(f"❌ Flag hitrun failed {chat_id}/{user_id}: {e}")
 
+# === Shared blocklists (federation) ===
+blocklist_index = BlocklistIndex()
+# Ids written per _append_blocklist_ids call during bulk imports and merges
+BLOCKLIST_WRITE_SLICE = 100_000
+_blocklist_merge_locks = {}  # list name -> Lock; one background merge per list
+
+# Callbacks run with (name, user_ids) after a blocklist changes in this
+# process; user_ids None means "reload it from storage". Split mode uses
+# this to keep every process's index current
+blocklist_listeners = []
+
+def on_blocklist_change(callback):
+    blocklist_listeners.append(callback)
+
+def _notify_blocklist_change(name: str, user_ids: list | None = None):
+    for callback in blocklist_listeners:
+        try:
+            callback(name, user_ids)
+        except Exception as e:
+            logger.error(f"❌ Blocklist listener error {name}: {e}")
+
+async def _read_blocklist_runs(name: str) -> list:
+    runs = []
+    async for chunk in blocklist_chunks_col.find({"list": name}, {"_id": 0, "ids": 1}):
+        runs.append(unpack_ids(chunk["ids"]))
+    return runs
+
+@_timed_db
+async def load_blocklists():
+    """Load every shared blocklist into memory, one chunk cursor per list"""
+    try:
+        async for meta in blocklists_col.find({}, {"_id": 1}):
+            name = meta["_id"]
+            blocklist_index.load(name, await _read_blocklist_runs(name))
+        stats = blocklist_index.stats()
+        logger.info(f"✅ Blocklists loaded: {stats['entries']} ids in {stats['lists']} lists ({stats['bytes']} bytes)")
+    except Exception as e:
+        logger.error(f"❌ Blocklist load failed: {e}")
+
+def is_blocklisted(settings: dict, user_id: int) -> bool:
+    """Is the user on any shared blocklist the chat subscribes to"""
+    names = settings.get("blocklists")
+    return bool(names) and blocklist_index.contains_any(names, user_id)
+
+def get_blocklist_names() -> list:
+    return blocklist_index.names()
+
+def get_blocklist_sizes() -> dict:
+    return {name: blocklist_index.size(name) for name in blocklist_index.names()}
+
+async def create_blocklist(name: str, created_by: int) -> bool:
+    try:
+        await blocklists_col.insert_one({"_id": name, "created_by": created_by, "created_on": datetime.now(timezone.utc)})
+        blocklist_index.ensure(name)
+        _notify_blocklist_change(name, [])
+        return True
+    except Exception as e:
+        if "duplicate key" not in str(e).lower():
+            logger.error(f"❌ Create blocklist error {name}: {e}")
+        return False
+
+async def _append_blocklist_ids(name: str, user_ids):
+    """Store ids for a list, topping up its partly filled chunk before
+    starting new ones, so small writes don't leave a trail of tiny chunks"""
+    size = Config.BLOCKLIST_CHUNK_SIZE
+    incoming = sorted(set(user_ids))
+    if not incoming:
+        return
+    now = datetime.now(timezone.utc)
+    tail = await blocklist_chunks_col.find_one({"list": name, "count": {"$lt": size}}, sort=[("count", -1)])
+    if tail is not None:
+        combined = sorted(set(unpack_ids(tail["ids"])).union(incoming))
+        head, rest = combined[:size], combined[size:]
+        if len(head) == tail["count"]:
+            incoming = rest
+        else:
+            # count doubles as a version: another writer topping up the same
+            # chunk makes this a no-op, and the ids go into a fresh chunk
+            result = await blocklist_chunks_col.update_one(
+                {"_id": tail["_id"], "count": tail["count"]},
+                {"$set": {"ids": pack_ids(head), "count": len(head), "min": head[0], "max": head[-1], "added_on": now}}
+            )
+            if result.matched_count:
+                incoming = rest
+    docs = chunk_docs(name, incoming, size)
+    if docs:
+        for doc in docs:
+            doc["added_on"] = now
+        await blocklist_chunks_col.insert_many(docs, ordered=False)
+
+async def _merge_into_blocklist(name: str, runs: list) -> int:
+    """Fold sorted runs into a list's in-memory set on a worker thread, so a
+    multi-million id merge doesn't stall the event loop; returns ids added"""
+    lock = _blocklist_merge_locks.setdefault(name, asyncio.Lock())
+    async with lock:
+        current = blocklist_index.begin_merge(name)
+        try:
+            merged = await asyncio.get_running_loop().run_in_executor(
+                None, IntSet.from_sorted_runs, [current, *runs]
+            )
+        except BaseException:
+            blocklist_index.abort_merge(name)
+            raise
+        added = len(merged) - len(current)
+        blocklist_index.finish_merge(name, merged)
+        return added
+
+@_timed_db
+async def import_blocklist_ids(name: str, slices) -> int:
+    """Append ids from an async iterable of slices; returns how many were new.
+
+    Each slice is stored as it arrives, minus ids the list already holds.
+    The in-memory list is merged once, at the end, off the event loop.
+    """
+    runs = []
+    async for user_ids in slices:
+        fresh = blocklist_index.missing(name, user_ids)
+        if fresh:
+            await _append_blocklist_ids(name, fresh)
+            runs.append(fresh)
+    if not runs:
+        return 0
+    added = await _merge_into_blocklist(name, runs)
+    _notify_blocklist_change(name)
+    return added
+
+@_timed_db
+async def merge_blocklists(source: str, target: str) -> int:
+    """Add source's ids to target, storing only those new to it; returns how many"""
+    if source == target:
+        raise ValueError("Cannot merge a blocklist into itself")
+    source_ids, target_ids = blocklist_index.snapshot(source), blocklist_index.snapshot(target)
+    fresh = await asyncio.get_running_loop().run_in_executor(None, source_ids.difference, target_ids)
+    for start in range(0, len(fresh), BLOCKLIST_WRITE_SLICE):
+        await _append_blocklist_ids(target, fresh[start:start + BLOCKLIST_WRITE_SLICE])
+    if not fresh:
+        return 0
+    added = await _merge_into_blocklist(target, [fresh])
+    _notify_blocklist_change(target)
+    return added
+
+async def apply_blocklist_change(name: str, user_ids: list | None = None):
+    """Apply a change made by another process (see on_blocklist_change)"""
+    if user_ids is not None:
+        blocklist_index.add(name, user_ids)
+        return
+    try:
+        # Lists only grow, so a reload is a union with what this process holds
+        await _merge_into_blocklist(name, await _read_blocklist_runs(name))
+    except Exception as e:
+        logger.error(f"❌ Blocklist reload failed {name}: {e}")
+
+async def _write_blocklist_ids(batch: list):
+    per_list = {}
+    for entry in batch:
+        per_list.setdefault(entry["list"], []).append(entry["user_id"])
+    for name, user_ids in per_list.items():
+        await _append_blocklist_ids(name, user_ids)
+
+# Flags shared by subscribed chats, appended to each list's partly filled chunk
+blocklist_queue = AuditQueue(
+    _write_blocklist_ids,
+    maxsize=Config.AUDIT_QUEUE_SIZE,
+    batch_size=Config.AUDIT_BATCH_SIZE,
+    linger=Config.AUDIT_LINGER,
+    policy="block"
+)
+
+async def publish_to_blocklists(settings: dict, user_id: int):
+    """Share a hit-and-run flag with every blocklist the chat subscribes to"""
+    for name in settings.get("blocklists", []):
+        if blocklist_index.add(name, (user_id,)):
+            _notify_blocklist_change(name, [user_id])
+            if blocklist_queue.running:
+                await blocklist_queue.put({"list": name, "user_id": user_id})
+            else:
+                await _write_blocklist_ids([{"list": name, "user_id": user_id}])
+
+async def subscribe_blocklist(chat_id: int, name: str) -> bool:
+    if name not in blocklist_index.names():
+        return False
+    try:
+        await channels_col.update_one({"chat_id": chat_id}, {"$addToSet": {"blocklists": name}})
+        cached = settings_cache.get(chat_id, count=False)
+        if cached is not None:
+            names = cached.setdefault("blocklists", [])
+            if name not in names:
+                names.append(name)
+        _notify_settings_change(chat_id)
+        return True
+    except Exception as e:
+        settings_cache.pop(chat_id)
+        logger.error(f"❌ Subscribe blocklist error {chat_id}/{name}: {e}")
+        return False
+
+async def unsubscribe_blocklist(chat_id: int, name: str) -> bool:
+    try:
+        result = await channels_col.update_one({"chat_id": chat_id}, {"$pull": {"blocklists": name}})
+        cached = settings_cache.get(chat_id, count=False)
+        if cached is not None and name in cached.get("blocklists", []):
+            cached["blocklists"].remove(name)
+        _notify_settings_change(chat_id)
+        return bool(result.modified_count)
+    except Exception as e:
+        settings_cache.pop(chat_id)
+        logger.error(f"❌ Unsubscribe blocklist error {chat_id}/{name}: {e}")
+        return False
+
 # === Keep get_all_channels, get_global_stats, log_action ===
 
+@_timed_db
 async def update_setting(chat_id: int, key: str, value):
     try:
         await channels_col.update_one(
@@ -160,22 +642,152 @@ async def update_setting(chat_id: int, key: str, value):
             {"$set": {key: value}},
             upsert=True
         )
+        cached = settings_cache.get(chat_id, count=False)
+        if cached is not None and "." not in key:
+            cached[key] = value
+        else:
+            settings_cache.pop(chat_id)
+        _notify_settings_change(chat_id)
     except Exception as e:
+        settings_cache.pop(chat_id)
         logger.error(f"❌ Update error {key} {chat_id}: {e}")
     
 
-async def increment_stat(chat_id: int, field: str):
-    if field not in {"joins", "bans", "maintenance_hits"}:
+@_timed_db
+async def _flush_stats(batch: dict):
+    """Write buffered counters as one unordered bulk of combined $inc ops"""
+    if _rollup_shared:
+        await _wait_for_rollup_lease()
+    per_chat = {}
+    totals = {}
+    for (chat_id, field), amount in batch.items():
+        per_chat.setdefault(chat_id, {})[f"stats.{field}"] = amount
+        totals[field] = totals.get(field, 0) + amount
+    while True:
+        await _rollup_open.wait()
+        async with _rollup_lock:
+            if not _rollup_open.is_set():
+                continue  # a rebuild closed the gate while this flush queued
+            await channels_col.bulk_write(
+                [UpdateOne({"chat_id": chat_id}, {"$inc": inc}, upsert=True) for chat_id, inc in per_chat.items()],
+                ordered=False
+            )
+            # Not retried with the batch: the channel counters are already written,
+            # and any drift is fixed by rebuild_global_stats()
+            try:
+                await _bump_global_stats(totals)
+            except Exception as e:
+                logger.error(f"❌ Global stats rollup update failed: {e}")
+            break
+    try:
+        await _record_stats_history(batch, datetime.now(timezone.utc))
+    except Exception as e:
+        logger.error(f"❌ Stats history update failed: {e}")
+
+# Bucket pattern: stats_history holds {_id: "<chat_id>:<YYYYMMDD>", chat_id, day,
+# hours: [24 x {joins, bans, maintenance_hits}], expire_at}. A batch lands in
+# the hour it is flushed, which is at most STATS_FLUSH_INTERVAL late.
+_history_ready = set()   # _ids preallocated today by this process
+_history_ready_day = None
+
+def _history_id(chat_id: int, day: datetime) -> str:
+    return f"{chat_id}:{day:%Y%m%d}"
+
+def _history_day(moment: datetime) -> datetime:
+    return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+
+async def _record_stats_history(batch: dict, now: datetime):
+    """Add one flush worth of increments to each chat's bucket for today"""
+    global _history_ready_day
+    per_chat = {}
+    for (chat_id, field), amount in batch.items():
+        per_chat.setdefault(chat_id, {})[f"hours.{now.hour}.{field}"] = amount
+    day = _history_day(now)
+    if day != _history_ready_day:
+        _history_ready.clear()
+        _history_ready_day = day
+
+    # Preallocate the 24 slots once per chat per day so every later write is
+    # an in-place $inc on a fixed-size document
+    fresh = [chat_id for chat_id in per_chat if _history_id(chat_id, day) not in _history_ready]
+    if fresh:
+        empty_hour = dict.fromkeys(STAT_FIELDS, 0)
+        try:
+            await stats_history_col.insert_many([
+                {
+                    "_id": _history_id(chat_id, day),
+                    "chat_id": chat_id,
+                    "day": day,
+                    "hours": [dict(empty_hour) for _ in range(24)],
+                    "expire_at": day + timedelta(days=Config.STATS_HISTORY_DAYS)
+                }
+                for chat_id in fresh
+            ], ordered=False)
+        except BulkWriteError as e:
+            # Already allocated by an earlier run or another worker
+            if not _only_duplicates(e):
+                raise
+        _history_ready.update(_history_id(chat_id, day) for chat_id in fresh)
+
+    await stats_history_col.bulk_write([
+        UpdateOne({"_id": _history_id(chat_id, day)}, {"$inc": inc})
+        for chat_id, inc in per_chat.items()
+    ], ordered=False)
+
+@_timed_db
+async def get_stats_history(chat_id: int) -> dict:
+    """Rolling last-24h and last-7-days counters from the hourly buckets"""
+    now = datetime.now(timezone.utc)
+    today = _history_day(now)
+    day_ids = [_history_id(chat_id, today - timedelta(days=n)) for n in range(8)]
+    result = {"24h": dict.fromkeys(STAT_FIELDS, 0), "7d": dict.fromkeys(STAT_FIELDS, 0)}
+    try:
+        docs = await stats_history_col.find({"_id": {"$in": day_ids}}).to_list(len(day_ids))
+    except Exception as e:
+        logger.error(f"❌ Stats history fetch error {chat_id}: {e}")
+        docs = []
+    for doc in docs:
+        day = doc["day"]
+        if day.tzinfo is None:
+            day = day.replace(tzinfo=timezone.utc)
+        for hour, slot in enumerate(doc.get("hours", [])):
+            age = now - (day + timedelta(hours=hour))
+            for window, span in (("24h", timedelta(hours=24)), ("7d", timedelta(days=7))):
+                if timedelta(0) <= age < span:
+                    for field in STAT_FIELDS:
+                        result[window][field] += slot.get(field, 0)
+    for field, amount in stats_buffer.pending_for(chat_id).items():
+        result["24h"][field] += amount
+        result["7d"][field] += amount
+    return result
+
+stats_buffer = StatsBuffer(
+    _flush_stats,
+    interval=Config.STATS_FLUSH_INTERVAL,
+    max_keys=Config.STATS_FLUSH_MAX_KEYS
+)
+
+@counted("guardian_stats_total", "field", "Channel stat increments", amount="amount")
+async def increment_stat(chat_id: int, field: str, amount: int = 1):
+    if field not in STAT_FIELDS:
         return
+    stats_buffer.add(chat_id, field, amount)
+
+@_timed_db
+async def get_channel_stats(chat_id: int) -> dict:
+    """Lifetime counters for a chat, including increments not yet flushed"""
+    stats = dict.fromkeys(STAT_FIELDS, 0)
     try:
-        await channels_col.update_one(
-            {"chat_id": chat_id},
-            {"$inc": {f"stats.{field}": 1}},
-            upsert=True
-        )
+        doc = await channels_col.find_one({"chat_id": chat_id}, {"stats": 1})
+        if doc:
+            stats.update(doc.get("stats", {}))
     except Exception as e:
-        logger.error(f"❌ Increment error {field} {chat_id}: {e}")
+        logger.error(f"❌ Stats fetch error {chat_id}: {e}")
+    for field, amount in stats_buffer.pending_for(chat_id).items():
+        stats[field] = stats.get(field, 0) + amount
+    return stats
 
+@_timed_db
 async def add_supervisor(chat_id: int, user_id: int) -> bool:
     try:
         result = await channels_col.update_one(
@@ -183,52 +795,81 @@ async def add_supervisor(chat_id: int, user_id: int) -> bool:
             {"$addToSet": {"supervisors": user_id}},
             upsert=True
         )
+        cached = settings_cache.get(chat_id, count=False)
+        if cached is not None:
+            supervisors = cached.setdefault("supervisors", [])
+            if user_id not in supervisors:
+                supervisors.append(user_id)
+        _notify_settings_change(chat_id)
         return bool(result.modified_count or result.upserted_id)
     except Exception as e:
+        settings_cache.pop(chat_id)
         logger.error(f"❌ Add supervisor error: {e}")
         return False
 
+@_timed_db
 async def remove_supervisor(chat_id: int, user_id: int) -> bool:
     try:
         result = await channels_col.update_one(
             {"chat_id": chat_id},
             {"$pull": {"supervisors": user_id}}
         )
+        cached = settings_cache.get(chat_id, count=False)
+        if cached is not None and user_id in cached.get("supervisors", []):
+            cached["supervisors"].remove(user_id)
+        _notify_settings_change(chat_id)
         return bool(result.modified_count)
     except Exception as e:
+        settings_cache.pop(chat_id)
         logger.error(f"❌ Remove supervisor error: {e}")
         return False
 
+@_timed_db
 async def is_supervisor(chat_id: int, user_id: int) -> bool:
-    try:
-        return await channels_col.count_documents(
-            {"chat_id": chat_id, "supervisors": user_id}, limit=1
-        ) > 0
-    except Exception:
-        return False
+    """Answered from the (write-through) settings cache"""
+    settings = await get_channel_settings(chat_id)
+    return user_id in settings.get("supervisors", [])
 
-async def record_leave(chat_id: int, user_id: int):
-    try:
-        await leavers_col.update_one(
-            {"chat_id": chat_id, "user_id": user_id},
-            {"$set": {"leave_time": datetime.now(timezone.utc)}},
-            upsert=True
-        )
-    except Exception as e:
-        logger.error(f"❌ Record leave error: {e}")
+@_timed_db
+async def get_channels_page(after: int | None = None, before: int | None = None, limit: int = 20,
+                            where: dict | None = None) -> dict:
+    """One page of chat ids ordered by chat_id (keyset pagination on the unique index).
 
-async def is_recent_rejoin(chat_id: int, user_id: int) -> bool:
+    Pass the last chat_id of the current page as `after` for the next page,
+    or its first chat_id as `before` for the previous one. `where` narrows
+    the channels listed (e.g. {"anti_hitrun": True}).
+    """
+    query, direction = dict(where or {}), 1
+    if after is not None:
+        query["chat_id"] = {"$gt": after}
+    elif before is not None:
+        query["chat_id"], direction = {"$lt": before}, -1
     try:
-        doc = await leavers_col.find_one({"chat_id": chat_id, "user_id": user_id})
-        if doc:
-            if (datetime.now(timezone.utc) - doc["leave_time"]) < timedelta(minutes=30):
-                await leavers_col.delete_one({"chat_id": chat_id, "user_id": user_id})
-                return True
-        return False
+        docs = await channels_col.find(query, {"_id": 0, "chat_id": 1}).sort(
+            "chat_id", direction
+        ).limit(limit + 1).to_list(limit + 1)
     except Exception as e:
-        logger.error(f"❌ Rejoin check error: {e}")
-        return False
+        logger.error(f"❌ Channel page fetch error: {e}")
+        docs = []
+    more = len(docs) > limit
+    docs = docs[:limit]
+    if direction == -1:
+        docs.reverse()
+        return {"channels": docs, "has_prev": more, "has_next": True}
+    return {"channels": docs, "has_prev": after is not None, "has_next": more}
 
+async def iter_channel_ids(batch_size: int = 200, after: int | None = None, where: dict | None = None):
+    """Yield every registered chat_id (past `after`) in lists of up to batch_size"""
+    while True:
+        page = await get_channels_page(after=after, limit=batch_size, where=where)
+        chat_ids = [ch["chat_id"] for ch in page["channels"]]
+        if chat_ids:
+            yield chat_ids
+        if not page["has_next"] or not chat_ids:
+            return
+        after = chat_ids[-1]
+
+@_timed_db
 async def get_all_channels():
     try:
         return await channels_col.find().to_list(None)
@@ -236,28 +877,184 @@ async def get_all_channels():
         logger.error(f"❌ All channels fetch error: {e}")
         return []
 
-async def get_global_stats() -> dict:
+async def _bump_global_stats(amounts: dict):
+    await meta_col.update_one({"_id": GLOBAL_STATS_ID}, {"$inc": amounts}, upsert=True)
+
+def share_global_stats_rollup():
+    """Coordinate rollup rebuilds with other processes through meta (split mode)"""
+    global _rollup_shared
+    _rollup_shared = True
+
+async def _rollup_lease_remaining() -> float:
+    lease = await meta_col.find_one({"_id": ROLLUP_LEASE_ID})
+    return lease["until"] - time.time() if lease else 0.0
+
+async def _wait_for_rollup_lease():
+    while True:
+        remaining = await _rollup_lease_remaining()
+        if remaining <= 0:
+            return
+        await asyncio.sleep(min(remaining, 1.0))
+
+@_timed_db
+async def rebuild_global_stats() -> dict:
+    """Recount the rollup from the channels collection (O(channels); run in the background).
+
+    Stats flushes are held back during the scan, so the counters it sums
+    can't move under it. New chats still register meanwhile; they carry no
+    stats, and the channel count is taken under the lock at the final write.
+    A call made while a rebuild is running returns that rebuild's totals.
+    In split mode workers are held back by a lease in meta instead; see
+    share_global_stats_rollup().
+    """
+    if not _rollup_open.is_set():
+        await _rollup_open.wait()
+        doc = await meta_col.find_one({"_id": GLOBAL_STATS_ID}) or {}
+        return {"channels": doc.get("channels", 0), **{f: doc.get(f, 0) for f in STAT_FIELDS}}
+    pipeline = [{"$group": {
+        "_id": None,
+        "joins": {"$sum": "$stats.joins"},
+        "bans": {"$sum": "$stats.bans"},
+        "maintenance_hits": {"$sum": "$stats.maintenance_hits"}
+    }}]
+    _rollup_open.clear()
     try:
-        pipeline = [{"$group": {
-            "_id": None,
-            "total_channels": {"$sum": 1},
-            "total_joins": {"$sum": "$stats.joins"},
-            "total_bans": {"$sum": "$stats.bans"},
-            "total_maintenance_hits": {"$sum": "$stats.maintenance_hits"}
-        }}]
+        # Wait out a flush that was already writing when the gate closed
+        async with _rollup_lock:
+            pass
+        if _rollup_shared:
+            await meta_col.update_one(
+                {"_id": ROLLUP_LEASE_ID},
+                {"$set": {"until": time.time() + ROLLUP_LEASE_SECONDS}},
+                upsert=True
+            )
+            await asyncio.sleep(ROLLUP_LEASE_GRACE)
         result = await channels_col.aggregate(pipeline).to_list(1)
-        return result[0] if result else {"total_channels": 0, "total_joins": 0, "total_bans": 0, "total_maintenance_hits": 0}
+        totals = dict.fromkeys(STAT_FIELDS, 0)
+        if result:
+            totals.update({k: v for k, v in result[0].items() if k != "_id"})
+        async with _rollup_lock:
+            totals["channels"] = await channels_col.count_documents({})
+            await meta_col.update_one(
+                {"_id": GLOBAL_STATS_ID},
+                {"$set": {**totals, "rebuilt_on": datetime.now(timezone.utc)}},
+                upsert=True
+            )
+    finally:
+        if _rollup_shared:
+            await meta_col.delete_one({"_id": ROLLUP_LEASE_ID})
+        _rollup_open.set()
+    logger.info(f"✅ Global stats rebuilt: {totals}")
+    return totals
+
+@_timed_db
+async def get_global_stats() -> dict:
+    """Fleet totals from the rollup document plus increments not yet flushed"""
+    try:
+        doc = await meta_col.find_one({"_id": GLOBAL_STATS_ID})
+        if doc is None:
+            # First run on an existing database: seed the rollup once
+            doc = await rebuild_global_stats()
+        stats = {"total_channels": doc.get("channels", 0)}
+        for field in STAT_FIELDS:
+            stats[f"total_{field}"] = doc.get(field, 0)
+        for field, amount in stats_buffer.pending_totals().items():
+            stats[f"total_{field}"] += amount
+        return stats
     except Exception as e:
         logger.error(f"❌ Global stats error: {e}")
         return {}
 
+@_timed_db
+async def _write_logs(batch: list):
+    await logs_col.insert_many(batch, ordered=False)
+
+audit_queue = AuditQueue(
+    _write_logs,
+    maxsize=Config.AUDIT_QUEUE_SIZE,
+    batch_size=Config.AUDIT_BATCH_SIZE,
+    linger=Config.AUDIT_LINGER,
+    policy=Config.AUDIT_FULL_POLICY
+)
+
+@counted("guardian_actions_total", "action_type", "Audit log actions by type")
 async def log_action(chat_id: int, action_type: str, details: str):
+    entry = {
+        "chat_id": chat_id,
+        "action": action_type,
+        "details": details,
+        "timestamp": datetime.now(timezone.utc)
+    }
+    if audit_queue.running:
+        await audit_queue.put(entry)
+        return
     try:
-        await logs_col.insert_one({
-            "chat_id": chat_id,
-            "action": action_type,
-            "details": details,
-            "timestamp": datetime.now(timezone.utc)
-        })
+        await logs_col.insert_one(entry)
     except Exception as e:
-        logger.error(f"❌ Log error: {e}")
\ No newline at end of file
+        logger.error(f"❌ Log error: {e}")
+
+def _epoch_ms(ts: datetime) -> int:
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    return int(ts.timestamp() * 1000)
+
+@_timed_db
+async def get_logs_page(chat_id: int, before_ms: int | None = None, skip: int = 0, limit: int = 10) -> dict:
+    """Newest-first page of a chat's audit log on the (chat_id, timestamp) index.
+
+    The cursor is the millisecond of the last entry shown plus how many
+    entries in that millisecond were shown (`skip`), so entries sharing a
+    timestamp are neither repeated nor lost. `next` is None on the last page.
+    """
+    query = {"chat_id": chat_id}
+    if before_ms is not None:
+        boundary = datetime.fromtimestamp((before_ms + 1) / 1000, timezone.utc)
+        query["timestamp"] = {"$lt": boundary}
+    try:
+        docs = await logs_col.find(query, {"_id": 0, "action": 1, "details": 1, "timestamp": 1}).sort(
+            [("timestamp", -1), ("_id", -1)]
+        ).skip(skip).limit(limit + 1).to_list(limit + 1)
+    except Exception as e:
+        logger.error(f"❌ Log page fetch error {chat_id}: {e}")
+        docs = []
+    entries = docs[:limit]
+    cursor = None
+    if len(docs) > limit:
+        last = _epoch_ms(entries[-1]["timestamp"])
+        tied = sum(1 for doc in entries if _epoch_ms(doc["timestamp"]) == last)
+        cursor = (last, tied + (skip if last == before_ms else 0))
+    return {"entries": entries, "next": cursor}
+
+async def iter_logs(chat_id: int, batch_size: int = 1000):
+    """Stream a chat's audit log oldest first without materializing it"""
+    cursor = logs_col.find(
+        {"chat_id": chat_id}, {"_id": 0, "timestamp": 1, "action": 1, "details": 1}
+    ).sort("timestamp", 1).batch_size(batch_size)
+    async for doc in cursor:
+        yield doc
+
+async def iter_stats_history(chat_id: int, batch_size: int = 100):
+    """Stream a chat's hourly stats buckets as one row per hour, oldest first"""
+    cursor = stats_history_col.find(
+        {"chat_id": chat_id}, {"_id": 0, "day": 1, "hours": 1}
+    ).sort("day", 1).batch_size(batch_size)
+    async for doc in cursor:
+        for hour, slot in enumerate(doc.get("hours", [])):
+            yield {"hour": doc["day"] + timedelta(hours=hour), **{f: slot.get(f, 0) for f in STAT_FIELDS}}
+
+def get_audit_metrics() -> dict:
+    return audit_queue.metrics()
+
+def start_background_writers():
+    stats_buffer.start()
+    audit_queue.start()
+    flag_queue.start()
+    blocklist_queue.start()
+    join_snapshotter.start()
+
+async def stop_background_writers():
+    await join_snapshotter.stop()
+    await stats_buffer.stop()
+    await flag_queue.stop()
+    await blocklist_queue.stop()
+    await audit_queue.stop()
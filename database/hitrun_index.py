@@ -0,0 +1,89 @@
+# database/hitrun_index.py
+import logging
+from helpers.intset import IntSet
+
+logger = logging.getLogger(__name__)
+
+
+class HitrunIndex:
+    """In-memory copy of hitrun_leavers: chat_id -> IntSet of flagged user ids.
+
+    Memory: each flag costs 8 bytes inside its chat's sorted array plus
+    roughly 150 bytes of fixed overhead per chat, so 5M flags across 2k
+    chats fit in about 40 MB. Loading stops at `max_entries`; chats that did
+    not fit are reported as not covered and callers fall back to Mongo.
+    """
+
+    def __init__(self, max_entries: int = 10_000_000):
+        self.max_entries = max_entries
+        self._chats = {}
+        self._entries = 0
+        self.loaded = False
+        self.partial = False
+        self._loading = False
+        self._backlog = []
+
+    def covers(self, chat_id: int) -> bool:
+        if not self.loaded:
+            return False
+        return not self.partial or chat_id in self._chats
+
+    def contains(self, chat_id: int, user_id: int) -> bool:
+        users = self._chats.get(chat_id)
+        return users is not None and user_id in users
+
+    def add(self, chat_id: int, user_id: int):
+        if self._loading:
+            # Flags written while the snapshot streams in are replayed after it
+            self._backlog.append((chat_id, user_id))
+            return
+        if not self.covers(chat_id):
+            return
+        users = self._chats.get(chat_id)
+        if users is None:
+            users = self._chats[chat_id] = IntSet()
+        if users.add(user_id):
+            self._entries += 1
+
+    async def load(self, cursor):
+        """Fill from a cursor sorted by (chat_id, user_id)"""
+        self._loading = True
+        try:
+            await self._load(cursor)
+        finally:
+            self._loading = False
+        backlog, self._backlog = self._backlog, []
+        for chat_id, user_id in backlog:
+            self.add(chat_id, user_id)
+
+    async def _load(self, cursor):
+        chats = {}
+        entries = 0
+        partial = False
+        current_chat, current = None, None
+        async for doc in cursor:
+            if entries >= self.max_entries:
+                partial = True
+                # The last chat may be incomplete; leave it to Mongo
+                chats.pop(current_chat, None)
+                break
+            if doc["chat_id"] != current_chat:
+                current_chat = doc["chat_id"]
+                current = chats[current_chat] = IntSet()
+            current.append_sorted(doc["user_id"])
+            entries += 1
+
+        self._chats = chats
+        self._entries = sum(len(users) for users in chats.values())
+        self.partial = partial
+        self.loaded = True
+        if partial:
+            logger.warning(f"⚠️ Hit-and-run index capped at {self.max_entries} flags; remaining chats use Mongo")
+
+    def stats(self) -> dict:
+        return {
+            "chats": len(self._chats),
+            "entries": self._entries,
+            "bytes": sum(users.nbytes for users in self._chats.values()),
+            "partial": self.partial,
+        }
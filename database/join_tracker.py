@@ -0,0 +1,101 @@
+# database/join_tracker.py
+import asyncio
+import heapq
+import logging
+import time
+from datetime import datetime, timezone
+
+logger = logging.getLogger(__name__)
+
+
+class JoinTracker:
+    """Join times for the anti hit-and-run window, held in memory.
+
+    A dict maps (chat_id, user_id) to the join timestamp and a min-heap
+    orders the same entries by expiry, so anything older than `window`
+    seconds is dropped lazily on each write. Size is bounded by
+    join rate x window rather than by total membership.
+    """
+
+    def __init__(self, window: float = 300.0):
+        self.window = window
+        self._joins = {}
+        self._heap = []
+
+    def __len__(self):
+        return len(self._joins)
+
+    def __contains__(self, key: tuple) -> bool:
+        self._expire(time.time())
+        return key in self._joins
+
+    def _expire(self, now: float):
+        heap = self._heap
+        cutoff = now - self.window
+        while heap and heap[0][0] <= cutoff:
+            joined_at, key = heapq.heappop(heap)
+            # Skip heap entries superseded by a later rejoin
+            if self._joins.get(key) == joined_at:
+                del self._joins[key]
+
+    def record(self, chat_id: int, user_id: int, joined_at: float | None = None) -> bool:
+        """False if joined_at is already outside the window"""
+        now = time.time()
+        joined_at = now if joined_at is None else joined_at
+        self._expire(now)
+        if joined_at <= now - self.window:
+            return False
+        key = (chat_id, user_id)
+        self._joins[key] = joined_at
+        heapq.heappush(self._heap, (joined_at, key))
+        return True
+
+    def pop(self, chat_id: int, user_id: int) -> datetime | None:
+        now = time.time()
+        self._expire(now)
+        joined_at = self._joins.pop((chat_id, user_id), None)
+        if joined_at is None:
+            return None
+        return datetime.fromtimestamp(joined_at, timezone.utc)
+
+    def live_entries(self) -> list[tuple[int, int, datetime]]:
+        self._expire(time.time())
+        return [
+            (chat_id, user_id, datetime.fromtimestamp(joined_at, timezone.utc))
+            for (chat_id, user_id), joined_at in self._joins.items()
+        ]
+
+
+class JoinSnapshotter:
+    """Optionally persists a JoinTracker on an interval so restarts keep the window"""
+
+    def __init__(self, tracker: JoinTracker, save_fn, interval: float):
+        self.tracker = tracker
+        self.save_fn = save_fn
+        self.interval = interval
+        self._task = None
+
+    async def save(self):
+        try:
+            await self.save_fn(self.tracker.live_entries())
+        except Exception as e:
+            logger.error(f"❌ Join snapshot failed: {e}")
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.save()
+
+    def start(self):
+        if self.interval > 0 and self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            await self.save()
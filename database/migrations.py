@@ -0,0 +1,99 @@
+# database/migrations.py
+import logging
+from datetime import datetime, timezone
+from . import db_handler
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_ID = "schema"
+
+
+async def _rename_rejoin_ban():
+    """Legacy channel documents stored the toggle as rejoin_ban"""
+    renamed = await db_handler.channels_col.update_many(
+        {"rejoin_ban": {"$exists": True}, "anti_hitrun": {"$exists": False}},
+        {"$rename": {"rejoin_ban": "anti_hitrun"}}
+    )
+    # Documents that already have anti_hitrun keep it; the stale key goes
+    await db_handler.channels_col.update_many(
+        {"rejoin_ban": {"$exists": True}},
+        {"$unset": {"rejoin_ban": ""}}
+    )
+    logger.info(f"🔧 Renamed rejoin_ban on {renamed.modified_count} channels")
+
+
+async def _duplicate_groups(collection, key: dict) -> list:
+    """_id lists (oldest first) of documents sharing `key`, only where shared"""
+    pipeline = [
+        {"$sort": {"_id": 1}},
+        {"$group": {"_id": key, "ids": {"$push": "$_id"}, "count": {"$sum": 1}}},
+        {"$match": {"count": {"$gt": 1}}},
+    ]
+    return [group["ids"] for group in await collection.aggregate(pipeline, allowDiskUse=True).to_list(None)]
+
+
+async def _remove_duplicates():
+    """Nothing enforced uniqueness before init_db_indexes first ran, so
+    clear collisions the unique indexes would refuse to build over"""
+    # Channels: keep the oldest document (the one find_one has been
+    # returning) and fold the others' counters into it
+    channel_groups = await _duplicate_groups(db_handler.channels_col, "$chat_id")
+    for ids in channel_groups:
+        keep, extra = ids[0], ids[1:]
+        inc = {}
+        async for doc in db_handler.channels_col.find({"_id": {"$in": extra}}, {"stats": 1}):
+            for field in db_handler.STAT_FIELDS:
+                amount = doc.get("stats", {}).get(field, 0)
+                if amount:
+                    inc[f"stats.{field}"] = inc.get(f"stats.{field}", 0) + amount
+        if inc:
+            await db_handler.channels_col.update_one({"_id": keep}, {"$inc": inc})
+        await db_handler.channels_col.delete_many({"_id": {"$in": extra}})
+    # Member rows carry nothing worth merging: one per (chat, user) is enough
+    member_key = {"chat_id": "$chat_id", "user_id": "$user_id"}
+    removed = 0
+    for collection in (db_handler.hitrun_leavers_col, db_handler.active_members_col):
+        for ids in await _duplicate_groups(collection, member_key):
+            result = await collection.delete_many({"_id": {"$in": ids[1:]}})
+            removed += result.deleted_count
+    logger.info(f"🔧 Merged {len(channel_groups)} duplicated channels, removed {removed} duplicate member rows")
+
+
+# (version, description, coroutine); append only, never renumber
+MIGRATIONS = [
+    (1, "rename rejoin_ban to anti_hitrun", _rename_rejoin_ban),
+    (2, "remove duplicates under unique indexes", _remove_duplicates),
+]
+
+
+async def get_schema_version() -> int:
+    doc = await db_handler.meta_col.find_one({"_id": SCHEMA_ID})
+    return doc.get("version", 0) if doc else 0
+
+
+async def run_migrations():
+    """Ensure indexes and bring the database up to the latest schema version.
+
+    Runs once at startup, before any handler reads settings. A failed step
+    or index build raises, so the bot never serves traffic on a
+    half-migrated schema. Indexes come last: a unique index can't be built
+    over the duplicates a migration removes.
+    """
+    current = await get_schema_version()
+    for version, description, migrate in MIGRATIONS:
+        if version <= current:
+            continue
+        try:
+            await migrate()
+        except Exception as e:
+            logger.error(f"❌ Migration {version} ({description}) failed: {e}")
+            raise
+        await db_handler.meta_col.update_one(
+            {"_id": SCHEMA_ID},
+            {"$set": {"version": version, "migrated_on": datetime.now(timezone.utc)}},
+            upsert=True
+        )
+        current = version
+        logger.info(f"✅ Schema migrated to v{version}: {description}")
+    logger.info(f"✅ Schema at v{current}")
+    await db_handler.init_db_indexes()
@@ -0,0 +1,73 @@
+# database/state_store.py
+import logging
+from datetime import datetime, timezone, timedelta
+from helpers.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+class MemoryStateStore:
+    """Conversation state for one process: LRU-capped, entries expire after `ttl`"""
+
+    def __init__(self, maxsize: int = 10000, ttl: float = 600.0):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    async def get(self, flow: str, key, default=None):
+        return self._cache.get((flow, key), default, count=False)
+
+    async def set(self, flow: str, key, value, ttl: float | None = None):
+        self._cache.set((flow, key), value, ttl)
+
+    async def pop(self, flow: str, key, default=None):
+        value = self._cache.get((flow, key), _MISSING, count=False)
+        if value is _MISSING:
+            return default
+        self._cache.pop((flow, key))
+        return value
+
+    def __len__(self):
+        return len(self._cache)
+
+
+class MongoStateStore:
+    """Conversation state shared by every process, one document per (flow, key).
+
+    A TTL index on expire_at removes abandoned entries; since the TTL
+    monitor only runs about once a minute, reads also filter on expire_at.
+    """
+
+    def __init__(self, collection, ttl: float = 600.0):
+        self.collection = collection
+        self.ttl = ttl
+
+    @staticmethod
+    def _id(flow: str, key) -> str:
+        return f"{flow}:{key}"
+
+    async def ensure_indexes(self):
+        await self.collection.create_index("expire_at", expireAfterSeconds=0)
+
+    async def get(self, flow: str, key, default=None):
+        doc = await self.collection.find_one({
+            "_id": self._id(flow, key),
+            "expire_at": {"$gt": datetime.now(timezone.utc)}
+        })
+        return doc["value"] if doc else default
+
+    async def set(self, flow: str, key, value, ttl: float | None = None):
+        expire_at = datetime.now(timezone.utc) + timedelta(seconds=self.ttl if ttl is None else ttl)
+        await self.collection.update_one(
+            {"_id": self._id(flow, key)},
+            {"$set": {"value": value, "expire_at": expire_at}},
+            upsert=True
+        )
+
+    async def pop(self, flow: str, key, default=None):
+        # Atomic take: with several workers only one of them gets the state
+        doc = await self.collection.find_one_and_delete({
+            "_id": self._id(flow, key),
+            "expire_at": {"$gt": datetime.now(timezone.utc)}
+        })
+        return doc["value"] if doc else default
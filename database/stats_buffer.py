@@ -0,0 +1,85 @@
+# database/stats_buffer.py
+import asyncio
+import logging
+from collections import defaultdict
+
+logger = logging.getLogger(__name__)
+
+
+class StatsBuffer:
+    """Write-behind counter buffer keyed by (chat_id, field).
+
+    Increments are summed in memory and handed to `flush_fn` as one batch
+    every `interval` seconds, or sooner once `max_keys` distinct counters
+    are pending. A failed flush is merged back so no counts are lost.
+    """
+
+    def __init__(self, flush_fn, interval: float = 2.0, max_keys: int = 500):
+        self.flush_fn = flush_fn
+        self.interval = interval
+        self.max_keys = max_keys
+        self._pending = defaultdict(int)
+        self._inflight = {}
+        self._wake = asyncio.Event()
+        self._lock = asyncio.Lock()
+        self._task = None
+        self._stopping = False
+
+    def add(self, chat_id: int, field: str, amount: int = 1):
+        self._pending[(chat_id, field)] += amount
+        if len(self._pending) >= self.max_keys:
+            self._wake.set()
+
+    def pending_for(self, chat_id: int) -> dict:
+        """Unflushed deltas for one chat (including a flush in progress)"""
+        deltas = defaultdict(int)
+        for source in (self._inflight, self._pending):
+            for (cid, field), amount in source.items():
+                if cid == chat_id:
+                    deltas[field] += amount
+        return dict(deltas)
+
+    def pending_totals(self) -> dict:
+        """Unflushed deltas summed over all chats"""
+        deltas = defaultdict(int)
+        for source in (self._inflight, self._pending):
+            for (_, field), amount in source.items():
+                deltas[field] += amount
+        return dict(deltas)
+
+    async def flush(self):
+        async with self._lock:
+            if not self._pending:
+                return
+            self._inflight, self._pending = self._pending, defaultdict(int)
+            try:
+                await self.flush_fn(dict(self._inflight))
+            except Exception as e:
+                logger.error(f"❌ Stats flush failed ({len(self._inflight)} counters): {e}")
+                for key, amount in self._inflight.items():
+                    self._pending[key] += amount
+            finally:
+                self._inflight = {}
+
+    async def _run(self):
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            await self.flush()
+
+    def start(self):
+        if self._task is None:
+            self._stopping = False
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        # Let an in-progress flush finish instead of cancelling it mid-write
+        if self._task is not None:
+            self._stopping = True
+            self._wake.set()
+            await self._task
+            self._task = None
+        await self.flush()
@@ -0,0 +1,100 @@
+# helpers/admins.py
+import asyncio
+import logging
+from pyrogram import enums
+from helpers.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+ADMIN_STATUSES = ("owner", "creator", "administrator")
+
+# Cached in place of an admin list the bot is not allowed to fetch
+_UNAVAILABLE = object()
+
+
+def _status(value) -> str:
+    return getattr(value, "value", value)
+
+
+class AdminCache:
+    """chat_id -> frozenset of administrator user ids.
+
+    Each chat is filled with one get_chat_members(ADMINISTRATORS) call and
+    kept for `ttl` seconds; admin promotions and demotions seen in member
+    updates are applied in place, so permission checks rarely hit the API.
+    Where the list can't be fetched, that failure and each per-user answer
+    are remembered for `failure_ttl` seconds instead.
+    """
+
+    def __init__(self, client, maxsize: int = 5000, ttl: float = 300.0, failure_ttl: float = 60.0):
+        self.client = client
+        self.failure_ttl = failure_ttl
+        self._admins = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._members = TTLCache(maxsize=maxsize, ttl=failure_ttl)  # (chat_id, user_id) -> bool
+        self._loading = {}  # chat_id -> Task, so concurrent misses share one call
+
+    async def _fetch(self, chat_id: int) -> frozenset:
+        admins = set()
+        async for member in self.client.get_chat_members(chat_id, filter=enums.ChatMembersFilter.ADMINISTRATORS):
+            admins.add(member.user.id)
+        return frozenset(admins)
+
+    async def get(self, chat_id: int) -> frozenset | None:
+        """Admin ids of a chat, or None if the list cannot be fetched"""
+        admins = self._admins.get(chat_id)
+        if admins is _UNAVAILABLE:
+            return None
+        if admins is not None:
+            return admins
+        task = self._loading.get(chat_id)
+        if task is None:
+            task = self._loading[chat_id] = asyncio.ensure_future(self._fetch(chat_id))
+            task.add_done_callback(lambda _: self._loading.pop(chat_id, None))
+        try:
+            admins = await asyncio.shield(task)
+        except Exception as e:
+            logger.debug(f"Admin list unavailable for {chat_id}: {e}")
+            self._admins.set(chat_id, _UNAVAILABLE, ttl=self.failure_ttl)
+            return None
+        self._admins.set(chat_id, admins)
+        return admins
+
+    async def is_admin(self, chat_id: int, user_id: int) -> bool:
+        admins = await self.get(chat_id)
+        if admins is not None:
+            return user_id in admins
+        # No admin list (e.g. missing rights): ask about this one user
+        answer = self._members.get((chat_id, user_id))
+        if answer is not None:
+            return answer
+        try:
+            member = await self.client.get_chat_member(chat_id, user_id)
+        except Exception:
+            return False
+        answer = _status(member.status) in ADMIN_STATUSES
+        self._members.set((chat_id, user_id), answer)
+        return answer
+
+    def observe(self, chat_id: int, user_id: int | None, old_status: str | None, new_status: str | None):
+        """Apply an admin status change from a member update"""
+        was_admin = _status(old_status) in ADMIN_STATUSES
+        now_admin = _status(new_status) in ADMIN_STATUSES
+        if was_admin == now_admin or user_id is None:
+            return
+        if (chat_id, user_id) in self._members:
+            self._members.set((chat_id, user_id), now_admin)
+        admins = self._admins.get(chat_id, count=False)
+        if admins is _UNAVAILABLE:
+            # Rights changed, maybe the bot's own: try the list again next time
+            self._admins.pop(chat_id)
+            return
+        if admins is None:
+            return
+        updated = admins | {user_id} if now_admin else admins - {user_id}
+        self._admins.set(chat_id, updated)
+
+    def invalidate(self, chat_id: int):
+        self._admins.pop(chat_id)
+
+    def stats(self) -> dict:
+        return self._admins.stats()
@@ -0,0 +1,79 @@
+# helpers/dispatcher.py
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class ChatShardDispatcher:
+    """Runs update handlers on N worker queues sharded by chat_id.
+
+    Every update for one chat lands on the same queue, so it is handled in
+    arrival order, while different chats proceed concurrently. Queues are
+    bounded: `submit` waits for room, which pushes back on Pyrogram's own
+    update workers instead of buffering without limit.
+    """
+
+    def __init__(self, workers: int = 8, queue_size: int = 1000):
+        self.workers = max(1, workers)
+        self.queue_size = queue_size
+        self._queues = []
+        self._tasks = []
+        self.processed = 0
+        self.errors = 0
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    def shard_for(self, chat_id: int) -> int:
+        return chat_id % self.workers
+
+    async def submit(self, chat_id: int, func, *args):
+        if not self.running:
+            await func(*args)
+            return
+        await self._queues[self.shard_for(chat_id)].put((func, args))
+
+    async def _worker(self, queue: asyncio.Queue):
+        while True:
+            item = await queue.get()
+            try:
+                if item is None:
+                    return
+                func, args = item
+                try:
+                    await func(*args)
+                    self.processed += 1
+                except Exception as e:
+                    self.errors += 1
+                    logger.exception(f"❌ Update handler failed: {e}")
+            finally:
+                queue.task_done()
+
+    def start(self):
+        if self.running:
+            return
+        loop = asyncio.get_running_loop()
+        self._queues = [asyncio.Queue(maxsize=self.queue_size) for _ in range(self.workers)]
+        self._tasks = [loop.create_task(self._worker(q)) for q in self._queues]
+
+    async def stop(self):
+        """Finish everything already queued, then stop the workers"""
+        if not self.running:
+            return
+        for queue in self._queues:
+            await queue.put(None)
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queues = []
+
+    def metrics(self) -> dict:
+        depths = [q.qsize() for q in self._queues]
+        return {
+            "workers": self.workers,
+            "max_depth": max(depths, default=0),
+            "total_depth": sum(depths),
+            "processed": self.processed,
+            "errors": self.errors,
+        }
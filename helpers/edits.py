@@ -0,0 +1,81 @@
+# helpers/edits.py
+import asyncio
+import hashlib
+import logging
+from pyrogram.errors import MessageNotModified
+from helpers.cache import TTLCache
+from helpers.outbound import PRIORITY_UI
+
+logger = logging.getLogger(__name__)
+
+
+def render_digest(text: str, reply_markup=None) -> bytes:
+    return hashlib.blake2b(f"{text}\x00{reply_markup}".encode(), digest_size=16).digest()
+
+
+class EditCoalescer:
+    """Debounces edits per (chat_id, message_id).
+
+    Within `delay` seconds only the latest render of a message is sent, and
+    a render identical to the one already on screen is not sent at all.
+    """
+
+    def __init__(self, outbound, delay: float = 0.3, maxsize: int = 10000, ttl: float = 3600.0):
+        self.outbound = outbound
+        self.delay = delay
+        self._shown = TTLCache(maxsize=maxsize, ttl=ttl)  # key -> digest of the last sent render
+        self._pending = {}   # key -> (message, text, reply_markup, digest)
+        self._timers = {}    # key -> flush task
+        self.requested = 0
+        self.sent = 0
+        self.skipped = 0
+
+    async def edit(self, message, text: str, reply_markup=None):
+        """Queue an edit_text of `message`; returns without waiting for it"""
+        self.requested += 1
+        key = (message.chat.id, message.id)
+        digest = render_digest(text, reply_markup)
+        if key not in self._pending and self._shown.get(key, count=False) == digest:
+            self.skipped += 1
+            return
+        if key in self._pending:
+            self.skipped += 1  # superseded render
+        self._pending[key] = (message, text, reply_markup, digest)
+        if key not in self._timers:
+            self._timers[key] = asyncio.create_task(self._flush_later(key))
+
+    async def _flush_later(self, key: tuple):
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self._timers.pop(key, None)
+        await self._send(key)
+
+    async def _send(self, key: tuple):
+        entry = self._pending.pop(key, None)
+        if entry is None:
+            return
+        message, text, reply_markup, digest = entry
+        if self._shown.get(key, count=False) == digest:
+            self.skipped += 1
+            return
+        try:
+            await self.outbound.call(key[0], message.edit_text, text, reply_markup=reply_markup, priority=PRIORITY_UI)
+            self.sent += 1
+        except MessageNotModified:
+            pass
+        except Exception as e:
+            logger.error(f"❌ Edit failed {key}: {e}")
+            return
+        self._shown.set(key, digest)
+
+    async def drain(self):
+        """Send everything still waiting out its delay (used at shutdown)"""
+        for task in list(self._timers.values()):
+            task.cancel()
+        self._timers.clear()
+        for key in list(self._pending):
+            await self._send(key)
+
+    def metrics(self) -> dict:
+        return {"requested": self.requested, "sent": self.sent, "skipped": self.skipped, "pending": len(self._pending)}
@@ -0,0 +1,43 @@
+# helpers/events.py
+from dataclasses import dataclass, asdict
+
+
+def _value(enum_or_str):
+    """Pyrogram enums -> their plain string value ("member", "supergroup", ...)"""
+    return getattr(enum_or_str, "value", enum_or_str)
+
+
+@dataclass(slots=True)
+class MemberEvent:
+    """The parts of a ChatMemberUpdated the protection logic needs, in a
+    form that can be sent to another process as JSON"""
+
+    chat_id: int
+    chat_type: str
+    user_id: int | None
+    first_name: str | None
+    is_bot: bool
+    old_status: str | None
+    new_status: str | None
+
+    @classmethod
+    def from_update(cls, update) -> "MemberEvent":
+        old = update.old_chat_member
+        new = update.new_chat_member
+        user = (new and new.user) or (old and old.user)
+        return cls(
+            chat_id=update.chat.id,
+            chat_type=_value(update.chat.type),
+            user_id=user.id if user else None,
+            first_name=user.first_name if user else None,
+            is_bot=bool(user and user.is_bot),
+            old_status=_value(old.status) if old else None,
+            new_status=_value(new.status) if new else None,
+        )
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "MemberEvent":
+        return cls(**data)
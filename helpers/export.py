@@ -0,0 +1,45 @@
+# helpers/export.py
+import asyncio
+import csv
+import json
+import os
+import tempfile
+from datetime import datetime
+
+FORMATS = ("jsonl", "csv")
+
+
+def _plain(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+async def export_rows(rows, fields: list[str], fmt: str, yield_every: int = 500) -> tuple[str, int]:
+    """Write the async iterator `rows` to a temp file as JSONL or CSV.
+
+    Rows are written as they arrive from the cursor, so memory stays flat
+    however long the history is; the loop is yielded to every `yield_every`
+    rows. Returns (path, row_count); the caller removes the file.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+    fd, path = tempfile.mkstemp(suffix=f".{fmt}")
+    count = 0
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8", newline="") as fh:
+            writer = None
+            if fmt == "csv":
+                writer = csv.DictWriter(fh, fieldnames=fields, extrasaction="ignore")
+                writer.writeheader()
+            async for row in rows:
+                row = {field: _plain(row.get(field)) for field in fields}
+                if writer:
+                    writer.writerow(row)
+                else:
+                    fh.write(json.dumps(row, ensure_ascii=False) + "\n")
+                count += 1
+                if count % yield_every == 0:
+                    await asyncio.sleep(0)
+    except BaseException:
+        os.remove(path)
+        raise
+    return path, count
@@ -7,4 +7,13 @@ def is_owner():
         return update.from_user and update.from_user.id == Config.BOT_OWNER_ID
     return filters.create(func)
 
-owner_filter = is_owner()
\ No newline at end of file
+owner_filter = is_owner()
+
+def is_self_member():
+    """Chat member updates about the bot itself (pyrogram 2.0 has no on_my_chat_member)"""
+    async def func(flt, client, update):
+        member = update.new_chat_member or update.old_chat_member
+        return bool(member and member.user and client.me and member.user.id == client.me.id)
+    return filters.create(func)
+
+self_member_filter = is_self_member()
\ No newline at end of file
@@ -0,0 +1,97 @@
+# helpers/intset.py
+from array import array
+from bisect import bisect_left
+from heapq import merge
+
+
+class IntSet:
+    """Set of 64-bit integers stored as one sorted array (8 bytes per member).
+
+    Membership is a binary search; single inserts shift the tail of the
+    array, which is a memmove and stays cheap well into millions of ids.
+    """
+
+    __slots__ = ("_items",)
+
+    def __init__(self, values=(), presorted: bool = False):
+        if presorted:
+            self._items = array("q", values)
+        else:
+            self._items = array("q", sorted(set(values)))
+
+    @classmethod
+    def from_sorted_runs(cls, runs) -> "IntSet":
+        """Build from several individually sorted sequences with one k-way merge"""
+        merged = array("q")
+        last = None
+        for value in merge(*runs):
+            if value != last:
+                merged.append(value)
+                last = value
+        result = cls.__new__(cls)
+        result._items = merged
+        return result
+
+    def copy(self) -> "IntSet":
+        result = IntSet.__new__(IntSet)
+        result._items = array("q", self._items)
+        return result
+
+    def __len__(self):
+        return len(self._items)
+
+    def __iter__(self):
+        return iter(self._items)
+
+    def __contains__(self, value: int) -> bool:
+        items = self._items
+        i = bisect_left(items, value)
+        return i < len(items) and items[i] == value
+
+    def add(self, value: int) -> bool:
+        items = self._items
+        i = bisect_left(items, value)
+        if i < len(items) and items[i] == value:
+            return False
+        items.insert(i, value)
+        return True
+
+    def append_sorted(self, value: int):
+        """Append a value known to be >= every member (used while bulk loading)"""
+        items = self._items
+        if not items or items[-1] < value:
+            items.append(value)
+
+    def update(self, values) -> int:
+        """Merge many values in one pass; returns how many were new"""
+        incoming = sorted(set(values))
+        if len(incoming) < 32:
+            return sum(self.add(v) for v in incoming)
+        before = len(self._items)
+        merged = array("q")
+        last = None
+        for value in merge(self._items, incoming):
+            if value != last:
+                merged.append(value)
+                last = value
+        self._items = merged
+        return len(merged) - before
+
+    def missing(self, values) -> array:
+        """Sorted, de-duplicated values that are not members"""
+        return array("q", (v for v in sorted(set(values)) if v not in self))
+
+    def difference(self, other: "IntSet") -> array:
+        """Members not in `other`, in order; each lookup resumes where the last one stopped"""
+        theirs = other._items
+        out = array("q")
+        j = 0
+        for value in self._items:
+            j = bisect_left(theirs, value, j)
+            if j == len(theirs) or theirs[j] != value:
+                out.append(value)
+        return out
+
+    @property
+    def nbytes(self) -> int:
+        return self._items.itemsize * len(self._items)
@@ -0,0 +1,303 @@
+# helpers/ipc.py
+import asyncio
+import itertools
+import json
+import logging
+import os
+import struct
+import sys
+from types import SimpleNamespace
+from helpers.events import MemberEvent
+from helpers.outbound import PRIORITY_UI
+
+logger = logging.getLogger(__name__)
+
+_HEADER = struct.Struct(">I")
+
+# Client methods a worker may ask the ingestion process to run for it
+REMOTE_METHODS = {"ban_chat_member", "unban_chat_member", "send_message"}
+
+
+class RemoteCallError(Exception):
+    pass
+
+
+class FrameConnection:
+    """Length-prefixed JSON frames over an asyncio stream pair"""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+        self._write_lock = asyncio.Lock()
+
+    async def send(self, message: dict):
+        payload = json.dumps(message, separators=(",", ":")).encode()
+        async with self._write_lock:
+            self.writer.write(_HEADER.pack(len(payload)) + payload)
+            await self.writer.drain()
+
+    async def recv(self) -> dict | None:
+        try:
+            header = await self.reader.readexactly(_HEADER.size)
+            payload = await self.reader.readexactly(_HEADER.unpack(header)[0])
+        except (asyncio.IncompleteReadError, ConnectionError):
+            return None
+        return json.loads(payload)
+
+    async def close(self):
+        self.writer.close()
+        try:
+            await self.writer.wait_closed()
+        except Exception:
+            pass
+
+
+class IngestServer:
+    """Ingestion side of split mode.
+
+    Spawns `shards` worker processes, hands each member event to the worker
+    owning `chat_id % shards`, and runs the Telegram calls workers send back
+    through the local client's outbound scheduler. At most `max_inflight`
+    unacknowledged events are outstanding per worker, which bounds memory on
+    both sides and makes a slow worker push back on the update stream.
+    """
+
+    def __init__(self, client, shards: int, socket_path: str, max_inflight: int = 500,
+                 worker_cmd: list[str] | None = None):
+        self.client = client
+        self.shards = shards
+        self.socket_path = socket_path
+        self.max_inflight = max_inflight
+        self.worker_cmd = worker_cmd or [sys.executable, "worker.py"]
+        self._conns = {}
+        self._credits = {}
+        self._ready = {}
+        self._procs = []
+        self._server = None
+        self._tasks = set()
+        self._stopping = False
+        self.sent = 0
+        self.acked = 0
+
+    async def start(self, timeout: float = 30.0):
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        loop = asyncio.get_running_loop()
+        self._ready = {shard: loop.create_future() for shard in range(self.shards)}
+        self._server = await asyncio.start_unix_server(self._on_connect, path=self.socket_path)
+        for shard in range(self.shards):
+            self._procs.append(await asyncio.create_subprocess_exec(
+                *self.worker_cmd,
+                "--shard", str(shard), "--shards", str(self.shards), "--socket", self.socket_path
+            ))
+        await asyncio.wait_for(asyncio.gather(*self._ready.values()), timeout)
+        logger.info(f"✅ Split mode: {self.shards} worker processes connected")
+
+    async def _on_connect(self, reader, writer):
+        conn = FrameConnection(reader, writer)
+        hello = await conn.recv()
+        if not hello or hello.get("op") != "hello":
+            await conn.close()
+            return
+        shard = hello["shard"]
+        me = await self.client.peers.get_me()
+        await conn.send({"op": "welcome", "me": {"id": me.id, "username": me.username}})
+        self._conns[shard] = conn
+        self._credits[shard] = asyncio.Semaphore(self.max_inflight)
+        if not self._ready[shard].done():
+            self._ready[shard].set_result(True)
+
+        while True:
+            message = await conn.recv()
+            if message is None:
+                break
+            op = message.get("op")
+            if op == "ack":
+                for _ in range(message.get("n", 1)):
+                    self._credits[shard].release()
+                self.acked += message.get("n", 1)
+            elif op == "call":
+                self._spawn(self._run_call(conn, message))
+            elif op == "blocklist":
+                self._spawn(self._relay_blocklist(message, shard))
+        if self._conns.get(shard) is conn:
+            del self._conns[shard]
+            # Wake any sender waiting for credit so it can fall back
+            for _ in range(self.max_inflight):
+                self._credits[shard].release()
+            if not self._stopping:
+                logger.error(f"❌ Worker {shard} disconnected; its chats are handled in-process")
+
+    def _spawn(self, coro):
+        task = asyncio.get_running_loop().create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _relay_blocklist(self, message: dict, origin: int):
+        """A worker's blocklist change: apply it here and pass it to the other workers"""
+        from database import apply_blocklist_change
+        await apply_blocklist_change(message["name"], message.get("ids"))
+        await self.notify(message, exclude=origin)
+
+    async def _run_call(self, conn: FrameConnection, message: dict):
+        reply = {"op": "result", "id": message["id"]}
+        method = message["method"]
+        try:
+            if method not in REMOTE_METHODS:
+                raise RemoteCallError(f"Method not allowed: {method}")
+            await self.client.outbound.call(
+                message["chat_id"],
+                getattr(self.client, method),
+                *message["args"],
+                priority=message["priority"],
+                **message["kwargs"]
+            )
+            reply["ok"] = True
+        except Exception as e:
+            reply["ok"] = False
+            reply["error"] = f"{type(e).__name__}: {e}"
+        try:
+            await conn.send(reply)
+        except Exception as e:
+            logger.error(f"❌ Could not return call result to worker: {e}")
+
+    def shard_for(self, chat_id: int) -> int:
+        return chat_id % self.shards
+
+    async def send(self, event: MemberEvent):
+        shard = self.shard_for(event.chat_id)
+        if shard in self._conns:
+            await self._credits[shard].acquire()
+        conn = self._conns.get(shard)
+        if conn is None:
+            # Worker gone: fall back to local processing
+            from plugins.admin_logic import process_member_event
+            await self.client.shards.submit(event.chat_id, process_member_event, self.client, event)
+            return
+        await conn.send({"op": "event", "event": event.to_dict()})
+        self.sent += 1
+
+    async def notify(self, message: dict, chat_id: int | None = None, exclude: int | None = None):
+        """Send a control message to the worker owning chat_id (or to all but `exclude`)"""
+        shards = [self.shard_for(chat_id)] if chat_id is not None else list(self._conns)
+        for shard in shards:
+            if shard == exclude:
+                continue
+            conn = self._conns.get(shard)
+            if conn is not None:
+                try:
+                    await conn.send(message)
+                except Exception as e:
+                    logger.error(f"❌ Notify worker {shard} failed: {e}")
+
+    def invalidate_settings(self, chat_id: int):
+        self._spawn(self.notify({"op": "invalidate", "chat_id": chat_id}, chat_id))
+
+    def blocklist_changed(self, name: str, user_ids: list | None = None):
+        self._spawn(self.notify({"op": "blocklist", "name": name, "ids": user_ids}))
+
+    async def stop(self, timeout: float = 30.0):
+        self._stopping = True
+        await self.notify({"op": "stop"})
+        # Keep serving worker calls until every worker has drained and exited
+        try:
+            await asyncio.wait_for(asyncio.gather(*(p.wait() for p in self._procs)), timeout)
+        except asyncio.TimeoutError:
+            for proc in self._procs:
+                if proc.returncode is None:
+                    proc.kill()
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+    def metrics(self) -> dict:
+        return {
+            "shards": self.shards,
+            "connected": len(self._conns),
+            "sent": self.sent,
+            "acked": self.acked,
+        }
+
+
+class _RemoteOutbound:
+    def __init__(self, remote: "RemoteClient"):
+        self.remote = remote
+
+    async def call(self, chat_id: int, func, *args, priority: int = PRIORITY_UI, **kwargs):
+        return await self.remote.request(chat_id, func.__name__, args, kwargs, priority)
+
+
+class _RemotePeers:
+    def __init__(self, me: dict):
+        self.me = SimpleNamespace(**me)
+
+    async def get_me(self):
+        return self.me
+
+
+class RemoteClient:
+    """Stand-in for the Pyrogram client inside a worker process.
+
+    Exposes the subset of GuardianBot used by the member-update path;
+    outbound calls are forwarded to the ingestion process.
+    """
+
+    def __init__(self, conn: FrameConnection, me: dict):
+        self.conn = conn
+        self.peers = _RemotePeers(me)
+        self.outbound = _RemoteOutbound(self)
+        self.event_sink = None
+        self.shards = None
+        self._ids = itertools.count(1)
+        self._waiters = {}
+        self._tasks = set()
+        self._closed_reason = None
+
+    async def request(self, chat_id: int, method: str, args, kwargs, priority: int):
+        if self._closed_reason:
+            raise RemoteCallError(self._closed_reason)
+        call_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._waiters[call_id] = future
+        try:
+            await self.conn.send({
+                "op": "call", "id": call_id, "chat_id": chat_id, "method": method,
+                "args": list(args), "kwargs": kwargs, "priority": priority
+            })
+            return await future
+        finally:
+            self._waiters.pop(call_id, None)
+
+    def resolve(self, message: dict):
+        future = self._waiters.get(message["id"])
+        if future is None or future.done():
+            return
+        if message.get("ok"):
+            future.set_result(True)
+        else:
+            future.set_exception(RemoteCallError(message.get("error", "unknown error")))
+
+    def blocklist_changed(self, name: str, user_ids: list | None = None):
+        """Report a local blocklist change; the ingestion process relays it"""
+        task = asyncio.get_running_loop().create_task(
+            self.conn.send({"op": "blocklist", "name": name, "ids": user_ids})
+        )
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def fail_pending(self, reason: str):
+        self._closed_reason = reason
+        for future in self._waiters.values():
+            if not future.done():
+                future.set_exception(RemoteCallError(reason))
+
+    async def ban_chat_member(self, chat_id: int, user_id: int):
+        return await self.outbound.call(chat_id, self.ban_chat_member, chat_id, user_id)
+
+    async def unban_chat_member(self, chat_id: int, user_id: int):
+        return await self.outbound.call(chat_id, self.unban_chat_member, chat_id, user_id)
+
+    async def send_message(self, chat_id: int, text: str, **kwargs):
+        return await self.outbound.call(chat_id, self.send_message, chat_id, text, **kwargs)
@@ -0,0 +1,197 @@
+# helpers/metrics.py
+import asyncio
+import functools
+import inspect
+import logging
+import time
+from bisect import bisect_left
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# Decided once at import: with metrics off every decorator below returns the
+# function untouched, so disabled instrumentation costs nothing per call.
+ENABLED = Config.METRICS_PORT > 0
+
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_histograms = {}  # name -> {label tuple: [bucket counts..., sum, count]}
+_counters = {}    # name -> {label tuple: value}
+_help = {}
+
+
+def _labels(labels: dict) -> tuple:
+    return tuple(sorted(labels.items()))
+
+
+def observe(name: str, seconds: float, **labels):
+    _observe(_histograms.setdefault(name, {}), _labels(labels), seconds)
+
+
+def _observe(series: dict, key: tuple, seconds: float):
+    row = series.get(key)
+    if row is None:
+        row = series[key] = [0] * (len(BUCKETS) + 2)
+    slot = bisect_left(BUCKETS, seconds)
+    if slot < len(BUCKETS):
+        row[slot] += 1
+    row[-2] += seconds
+    row[-1] += 1
+
+
+def inc(name: str, amount: float = 1, **labels):
+    if not ENABLED:
+        return
+    series = _counters.setdefault(name, {})
+    key = _labels(labels)
+    series[key] = series.get(key, 0) + amount
+
+
+def timed(name: str, description: str = "", **labels):
+    """Record the wall time of an async function in histogram `name`"""
+    _help.setdefault(name, description)
+
+    def decorator(func):
+        if not ENABLED:
+            return func
+        series = _histograms.setdefault(name, {})
+        ok_key = _labels({**labels, "outcome": "ok"})
+        error_key = _labels({**labels, "outcome": "error"})
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            key = error_key
+            try:
+                result = await func(*args, **kwargs)
+                key = ok_key
+                return result
+            finally:
+                _observe(series, key, time.perf_counter() - started)
+        return wrapper
+    return decorator
+
+
+def timed_handler(handler: str):
+    return timed("guardian_handler_seconds", "Latency of update handlers", handler=handler)
+
+
+def counted(name: str, label: str, description: str = "", amount: str | None = None):
+    """Count calls of an async function in counter `name`, labelled by one of its arguments"""
+    _help.setdefault(name, description)
+
+    def decorator(func):
+        if not ENABLED:
+            return func
+        params = inspect.signature(func).parameters
+        names = list(params)
+        label_pos = names.index(label)
+        amount_pos = names.index(amount) if amount else None
+        amount_default = params[amount].default if amount else 1
+        series = _counters.setdefault(name, {})
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            value = args[label_pos] if len(args) > label_pos else kwargs[label]
+            if amount_pos is None:
+                step = 1
+            else:
+                step = args[amount_pos] if len(args) > amount_pos else kwargs.get(amount, amount_default)
+            key = ((label, value),)
+            series[key] = series.get(key, 0) + step
+            return await func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def timed_api(func):
+    """For Client.invoke: one histogram series per raw Telegram method"""
+    if not ENABLED:
+        return func
+
+    series = _histograms.setdefault("guardian_telegram_api_seconds", {})
+
+    @functools.wraps(func)
+    async def wrapper(self, query, *args, **kwargs):
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            result = await func(self, query, *args, **kwargs)
+            outcome = "ok"
+            return result
+        finally:
+            _observe(series, (("method", type(query).__name__), ("outcome", outcome)), time.perf_counter() - started)
+    return wrapper
+
+
+_help["guardian_telegram_api_seconds"] = "Latency of raw Telegram API calls"
+
+
+def _format_labels(key: tuple, extra: tuple = ()) -> str:
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"') for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+def render() -> str:
+    """Prometheus text exposition format"""
+    lines = []
+    for name, series in sorted(_histograms.items()):
+        if _help.get(name):
+            lines.append(f"# HELP {name} {_help[name]}")
+        lines.append(f"# TYPE {name} histogram")
+        for key, row in series.items():
+            cumulative = 0
+            for bound, hits in zip(BUCKETS, row):
+                cumulative += hits
+                lines.append(f"{name}_bucket{_format_labels(key, (('le', bound),))} {cumulative}")
+            lines.append(f"{name}_bucket{_format_labels(key, (('le', '+Inf'),))} {row[-1]}")
+            lines.append(f"{name}_sum{_format_labels(key)} {row[-2]:.6f}")
+            lines.append(f"{name}_count{_format_labels(key)} {row[-1]}")
+    for name, series in sorted(_counters.items()):
+        if _help.get(name):
+            lines.append(f"# HELP {name} {_help[name]}")
+        lines.append(f"# TYPE {name} counter")
+        for key, value in series.items():
+            lines.append(f"{name}{_format_labels(key)} {value}")
+    return "\n".join(lines) + "\n"
+
+
+async def _serve(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    try:
+        request = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), timeout=5)
+        path = request.split(b" ", 2)[1] if request.count(b" ") >= 2 else b"/"
+        if path.split(b"?")[0] in (b"/metrics", b"/"):
+            status, body = "200 OK", render().encode()
+        else:
+            status, body = "404 Not Found", b"not found\n"
+        writer.write(
+            f"HTTP/1.1 {status}\r\nContent-Type: text/plain; version=0.0.4\r\n"
+            f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body
+        )
+        await writer.drain()
+    except Exception:
+        pass
+    finally:
+        writer.close()
+
+
+_server = None
+
+
+async def start_server(host: str = Config.METRICS_HOST, port: int = Config.METRICS_PORT):
+    global _server
+    if not ENABLED or _server is not None:
+        return
+    _server = await asyncio.start_server(_serve, host, port)
+    logger.info(f"📈 Metrics on http://{host}:{port}/metrics")
+
+
+async def stop_server():
+    global _server
+    if _server is not None:
+        _server.close()
+        await _server.wait_closed()
+        _server = None
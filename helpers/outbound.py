@@ -0,0 +1,258 @@
+# helpers/outbound.py
+import asyncio
+import logging
+import time
+from collections import OrderedDict, deque
+from pyrogram.errors import FloodWait, InternalServerError
+
+logger = logging.getLogger(__name__)
+
+# Lower value = sent first
+PRIORITY_BAN = 0
+PRIORITY_MESSAGE = 1
+PRIORITY_UI = 2
+
+TRANSIENT_ERRORS = (InternalServerError, asyncio.TimeoutError, ConnectionError, OSError)
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+
+    def _refill(self, now: float):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, now: float) -> float:
+        """Seconds until one token is available (0 if available now)"""
+        if now < self.paused_until:
+            return self.paused_until - now
+        self._refill(now)
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def consume(self, now: float):
+        self._refill(now)
+        self.tokens -= 1
+
+    def pause(self, seconds: float):
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+
+class _Job:
+    __slots__ = ("chat_id", "func", "args", "kwargs", "priority", "future", "enqueued", "attempts", "flood_waits")
+
+    def __init__(self, chat_id, func, args, kwargs, priority, future):
+        self.chat_id = chat_id
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.priority = priority
+        self.future = future
+        self.enqueued = time.monotonic()
+        self.attempts = 0
+        self.flood_waits = 0
+
+
+class OutboundScheduler:
+    """Central rate limiter for outbound Telegram API calls.
+
+    Calls are queued by priority (bans before messages before UI edits) and
+    round-robin across chats within a priority. Each call needs a token from
+    the global bucket and from its chat's bucket. FloodWait pauses the global
+    bucket for the requested time and re-queues the call (up to
+    `max_flood_waits` times); transient errors are retried with exponential
+    backoff. Once stopped, nothing is re-queued: the caller gets the error.
+    """
+
+    def __init__(self, global_rate: float = 25, global_burst: float = 25,
+                 chat_rate: float = 5, chat_burst: float = 20,
+                 concurrency: int = 16, max_retries: int = 3, backoff: float = 0.5,
+                 max_flood_waits: int = 5):
+        self.global_bucket = TokenBucket(global_rate, global_burst)
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self._chat_buckets = OrderedDict()
+        self.max_retries = max_retries
+        self.max_flood_waits = max_flood_waits
+        self.backoff = backoff
+        self._queues = {p: OrderedDict() for p in (PRIORITY_BAN, PRIORITY_MESSAGE, PRIORITY_UI)}
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._wake = asyncio.Event()
+        self._task = None
+        self._inflight = set()
+        self._delayed = 0
+        self._latency = {p: deque(maxlen=1000) for p in self._queues}
+        self.completed = 0
+        self.failed = 0
+        self.retries = 0
+        self.flood_waits = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def _chat_bucket(self, chat_id: int) -> TokenBucket:
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is None:
+            bucket = self._chat_buckets[chat_id] = TokenBucket(self.chat_rate, self.chat_burst)
+            if len(self._chat_buckets) > 10000:
+                self._chat_buckets.popitem(last=False)
+        else:
+            self._chat_buckets.move_to_end(chat_id)
+        return bucket
+
+    async def call(self, chat_id: int, func, *args, priority: int = PRIORITY_UI, **kwargs):
+        """Queue `func(*args, **kwargs)` and return its result once sent"""
+        if not self.running:
+            return await func(*args, **kwargs)
+        future = asyncio.get_running_loop().create_future()
+        self._enqueue(_Job(chat_id, func, args, kwargs, priority, future))
+        return await future
+
+    def _enqueue(self, job: _Job, front: bool = False):
+        chats = self._queues[job.priority]
+        jobs = chats.get(job.chat_id)
+        if jobs is None:
+            jobs = chats[job.chat_id] = deque()
+        if front:
+            jobs.appendleft(job)
+        else:
+            jobs.append(job)
+        self._wake.set()
+
+    def _requeue(self, job: _Job):
+        self._delayed -= 1
+        if self.running:
+            self._enqueue(job, front=True)
+        elif not job.future.done():
+            job.future.cancel()
+
+    def _next_job(self, now: float) -> tuple[_Job | None, float]:
+        """Pick the next sendable job, or report how long until one could be"""
+        wait = self.global_bucket.wait_time(now)
+        if wait > 0:
+            return None, wait
+        wait = None
+        for chats in self._queues.values():
+            for chat_id in list(chats):
+                chat_wait = self._chat_bucket(chat_id).wait_time(now)
+                if chat_wait > 0:
+                    wait = chat_wait if wait is None else min(wait, chat_wait)
+                    continue
+                jobs = chats.pop(chat_id)
+                job = jobs.popleft()
+                if jobs:
+                    chats[chat_id] = jobs  # re-insert at the end for round-robin
+                return job, 0.0
+        return None, wait
+
+    async def _run(self):
+        while True:
+            self._wake.clear()
+            now = time.monotonic()
+            job, wait = self._next_job(now)
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=wait)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            if job.future.cancelled():
+                continue
+            self.global_bucket.consume(now)
+            self._chat_bucket(job.chat_id).consume(now)
+            await self._semaphore.acquire()
+            task = asyncio.create_task(self._execute(job))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+
+    async def _execute(self, job: _Job):
+        try:
+            if job.attempts == 0:
+                self._latency[job.priority].append(time.monotonic() - job.enqueued)
+            job.attempts += 1
+            result = await job.func(*job.args, **job.kwargs)
+        except FloodWait as e:
+            self.flood_waits += 1
+            logger.warning(f"⏳ FloodWait {e.value}s on chat {job.chat_id}, pausing outbound queue")
+            self.global_bucket.pause(e.value)
+            job.flood_waits += 1
+            if self.running and job.flood_waits <= self.max_flood_waits:
+                self._enqueue(job, front=True)
+            else:
+                self.failed += 1
+                if not job.future.done():
+                    job.future.set_exception(e)
+        except TRANSIENT_ERRORS as e:
+            if job.attempts > self.max_retries:
+                self.failed += 1
+                if not job.future.done():
+                    job.future.set_exception(e)
+            else:
+                self.retries += 1
+                self._delayed += 1
+                delay = self.backoff * 2 ** (job.attempts - 1)
+                asyncio.get_running_loop().call_later(delay, self._requeue, job)
+        except Exception as e:
+            self.failed += 1
+            if not job.future.done():
+                job.future.set_exception(e)
+        else:
+            self.completed += 1
+            if not job.future.done():
+                job.future.set_result(result)
+        finally:
+            self._semaphore.release()
+
+    def start(self):
+        if not self.running:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self, timeout: float = 10.0):
+        """Give queued calls up to `timeout` seconds to go out, then cancel the rest"""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while self.pending() and loop.time() < deadline:
+            await asyncio.sleep(0.1)
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for chats in self._queues.values():
+            for jobs in chats.values():
+                for job in jobs:
+                    if not job.future.done():
+                        job.future.cancel()
+            chats.clear()
+        if self._inflight:
+            await asyncio.gather(*self._inflight, return_exceptions=True)
+
+    def pending(self) -> int:
+        queued = sum(len(jobs) for chats in self._queues.values() for jobs in chats.values())
+        return queued + len(self._inflight) + self._delayed
+
+    def metrics(self) -> dict:
+        names = {PRIORITY_BAN: "ban", PRIORITY_MESSAGE: "message", PRIORITY_UI: "ui"}
+        latency = {}
+        for priority, samples in self._latency.items():
+            ordered = sorted(samples)
+            if ordered:
+                latency[names[priority]] = {
+                    "p50": round(ordered[len(ordered) // 2], 4),
+                    "p99": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))], 4),
+                }
+        return {
+            "pending": self.pending(),
+            "completed": self.completed,
+            "failed": self.failed,
+            "retries": self.retries,
+            "flood_waits": self.flood_waits,
+            "queue_latency": latency,
+        }
@@ -0,0 +1,87 @@
+# helpers/peers.py
+import asyncio
+import logging
+from helpers.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+
+class PeerCache:
+    """Caches the bot's own identity plus recently seen chats and users"""
+
+    def __init__(self, client, maxsize: int = 5000, ttl: float = 600.0, concurrency: int = 8):
+        self.client = client
+        self.me = None
+        self.chats = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.users = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._semaphore = asyncio.Semaphore(concurrency)
+
+    async def load_me(self):
+        self.me = await self.client.get_me()
+        return self.me
+
+    async def get_me(self):
+        return self.me or await self.load_me()
+
+    async def get_chat(self, chat_id: int):
+        chat = self.chats.get(chat_id)
+        if chat is None:
+            async with self._semaphore:
+                chat = await self.client.get_chat(chat_id)
+            self.chats.set(chat_id, chat)
+        return chat
+
+    async def get_chats(self, chat_ids: list[int]) -> dict:
+        """Resolve many chats concurrently; inaccessible ones are left out"""
+        async def fetch(chat_id):
+            try:
+                return chat_id, await self.get_chat(chat_id)
+            except Exception as e:
+                logger.debug(f"Chat lookup failed {chat_id}: {e}")
+                return chat_id, None
+
+        results = await asyncio.gather(*(fetch(c) for c in chat_ids))
+        return {chat_id: chat for chat_id, chat in results if chat is not None}
+
+    async def prewarm(self, pages) -> tuple[int, int]:
+        """Resolve every chat id yielded (in lists) by the async iterator `pages`.
+
+        Lookups share get_chat's semaphore, so warming stays within the same
+        concurrency limit as live traffic. Returns (resolved, failed).
+        """
+        resolved = failed = 0
+        async for chat_ids in pages:
+            chats = await self.get_chats(chat_ids)
+            resolved += len(chats)
+            failed += len(chat_ids) - len(chats)
+        return resolved, failed
+
+    async def get_users(self, user_ids: list[int]) -> dict:
+        """Resolve many users with a single get_users call for the cache misses"""
+        found = {}
+        missing = []
+        for user_id in user_ids:
+            user = self.users.get(user_id)
+            if user is None:
+                missing.append(user_id)
+            else:
+                found[user_id] = user
+
+        if missing:
+            try:
+                fetched = await self.client.get_users(missing)
+            except Exception as e:
+                # One unresolvable peer fails the whole batch; retry individually
+                logger.debug(f"Batched get_users failed ({len(missing)} ids): {e}")
+                fetched = []
+                for user_id in missing:
+                    try:
+                        fetched.append(await self.client.get_users(user_id))
+                    except Exception:
+                        pass
+            if not isinstance(fetched, list):
+                fetched = [fetched]
+            for user in fetched:
+                self.users.set(user.id, user)
+                found[user.id] = user
+        return found
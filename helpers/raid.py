@@ -0,0 +1,50 @@
+# helpers/raid.py
+import time
+from collections import defaultdict, deque
+
+
+class RaidDetector:
+    """Per-chat sliding-window join counter with a sticky raid mode.
+
+    Once `threshold` joins land inside `window` seconds the chat enters raid
+    mode: the burst and every following join are collected for a bulk ban
+    until no join has been seen for `cooldown` seconds.
+    """
+
+    def __init__(self):
+        self._recent = defaultdict(deque)  # chat_id -> deque[(ts, user_id)]
+        self._raid_until = {}
+        self._pending = defaultdict(list)
+
+    def in_raid(self, chat_id: int) -> bool:
+        until = self._raid_until.get(chat_id)
+        if until is None:
+            return False
+        if until <= time.monotonic():
+            del self._raid_until[chat_id]
+            return False
+        return True
+
+    def observe(self, chat_id: int, user_id: int, threshold: int, window: float, cooldown: float) -> str | None:
+        """Returns "tripped" when this join starts a raid, "raid" while one is
+        active (the join is queued for banning), or None for a normal join"""
+        now = time.monotonic()
+        if self.in_raid(chat_id):
+            self._raid_until[chat_id] = now + cooldown
+            self._pending[chat_id].append(user_id)
+            return "raid"
+
+        recent = self._recent[chat_id]
+        recent.append((now, user_id))
+        while recent and recent[0][0] <= now - window:
+            recent.popleft()
+        if len(recent) < threshold:
+            return None
+
+        self._raid_until[chat_id] = now + cooldown
+        self._pending[chat_id].extend(uid for _, uid in recent)
+        del self._recent[chat_id]
+        return "tripped"
+
+    def take_pending(self, chat_id: int) -> list[int]:
+        return list(dict.fromkeys(self._pending.pop(chat_id, [])))
@@ -0,0 +1,105 @@
+# helpers/reconcile.py
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+from pyrogram import enums
+from pyrogram.errors import FloodWait
+from config import Config
+from database import (
+    iter_channel_ids, record_reconciled_joins,
+    get_reconcile_checkpoint, save_reconcile_checkpoint
+)
+from helpers.outbound import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+# Pyrogram fetches member lists in requests of this many members
+MEMBERS_PER_REQUEST = 200
+
+
+class MembershipReconciler:
+    """Recovers join times missed while the bot was down.
+
+    Walks the recent-members list of every anti_hitrun chat, newest first,
+    stopping at the first member who joined before the hit-and-run window,
+    and hands what it found to record_reconciled_joins(). Chats are visited
+    in chat_id order; after each batch the last chat_id is checkpointed in
+    meta so an interrupted run resumes where it stopped.
+    """
+
+    def __init__(self, client, concurrency: int = 4, rate: float = 2.0,
+                 batch_size: int = 50, window: float = Config.HITRUN_WINDOW_SECONDS):
+        self.client = client
+        self.batch_size = batch_size
+        self.window = window
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._bucket = TokenBucket(rate, burst=max(1.0, rate))
+        self.scanned = 0
+        self.recovered = 0
+        self.failed = 0
+
+    async def _throttle(self):
+        while True:
+            delay = self._bucket.wait_time(time.monotonic())
+            if delay <= 0:
+                break
+            await asyncio.sleep(delay)
+        self._bucket.consume(time.monotonic())
+
+    async def _recent_joins(self, chat_id: int, cutoff: float) -> list:
+        joins = []
+        seen = 0
+        await self._throttle()
+        async for member in self.client.get_chat_members(chat_id, filter=enums.ChatMembersFilter.RECENT):
+            seen += 1
+            if seen % MEMBERS_PER_REQUEST == 0:
+                await self._throttle()
+            if getattr(member.status, "value", member.status) != "member" or not member.joined_date:
+                continue
+            joined_at = member.joined_date
+            if joined_at.tzinfo is None:
+                joined_at = joined_at.astimezone(timezone.utc)
+            if joined_at.timestamp() <= cutoff:
+                # The list is newest first; everyone after this is outside the window
+                break
+            if not member.user.is_bot:
+                joins.append((member.user.id, joined_at))
+        return joins
+
+    async def _scan_chat(self, chat_id: int, cutoff: float):
+        async with self._semaphore:
+            for attempt in range(2):
+                try:
+                    joins = await self._recent_joins(chat_id, cutoff)
+                    self.recovered += await record_reconciled_joins(chat_id, joins)
+                    self.scanned += 1
+                    return
+                except FloodWait as e:
+                    logger.warning(f"⏳ FloodWait {e.value}s while reconciling {chat_id}")
+                    self._bucket.pause(e.value)
+                except Exception as e:
+                    logger.debug(f"Reconcile skipped {chat_id}: {e}")
+                    break
+            self.failed += 1
+
+    async def run(self):
+        started = time.perf_counter()
+        checkpoint = await get_reconcile_checkpoint()
+        after = None
+        if checkpoint and not checkpoint.get("finished", True):
+            after = checkpoint.get("after")
+            logger.info(f"🔁 Resuming membership reconciliation after chat {after}")
+        else:
+            await save_reconcile_checkpoint(started_on=datetime.now(timezone.utc), after=None, finished=False)
+
+        async for chat_ids in iter_channel_ids(self.batch_size, after=after, where={"anti_hitrun": True}):
+            cutoff = time.time() - self.window
+            await asyncio.gather(*(self._scan_chat(chat_id, cutoff) for chat_id in chat_ids))
+            await save_reconcile_checkpoint(after=chat_ids[-1])
+
+        await save_reconcile_checkpoint(finished=True, finished_on=datetime.now(timezone.utc))
+        logger.info(
+            f"✅ Membership reconciled: {self.scanned} chats scanned, {self.recovered} joins recovered, "
+            f"{self.failed} failed in {time.perf_counter() - started:.1f}s"
+        )
@@ -1,88 +1,207 @@
 # plugins/admin_logic.py (FULL UPDATED VERSION)
 import asyncio
+from datetime import datetime, timezone, timedelta
 from pyrogram import Client, filters, types
+from config import Config
 from database import (
     get_channel_settings, increment_stat,
     record_join, get_and_clear_join_time,
-    is_hitrun_leaver, flag_as_hitrun, log_action
+    get_join_context, flag_as_hitrun, log_action,
+    is_blocklisted, publish_to_blocklists
 )
+from helpers.raid import RaidDetector
+from helpers.outbound import PRIORITY_BAN, PRIORITY_MESSAGE
+from helpers.events import MemberEvent
+from helpers.filters import self_member_filter
+from helpers.metrics import timed_handler
+
+raid_detector = RaidDetector()
+
+# chat_id -> running ban pass; at most one per chat, and holding the task
+# keeps it from being garbage collected mid-raid
+raid_ban_tasks = {}
+
+def schedule_raid_bans(client: Client, chat_id: int):
+    if chat_id not in raid_ban_tasks:
+        raid_ban_tasks[chat_id] = asyncio.create_task(ban_raid_burst(client, chat_id))
+
+async def ban_raid_burst(client: Client, chat_id: int):
+    """Collect joins for a moment, then ban everything queued during the raid.
+
+    Loops until a pass finds nothing queued; the chat's entry is dropped in
+    the same step, so any later raid join schedules a fresh pass.
+    """
+    try:
+        while True:
+            await asyncio.sleep(Config.RAID_BAN_BATCH_DELAY)
+            user_ids = raid_detector.take_pending(chat_id)
+            if not user_ids:
+                return
+            await _ban_batch(client, chat_id, user_ids)
+    finally:
+        raid_ban_tasks.pop(chat_id, None)
+
+async def _ban_batch(client: Client, chat_id: int, user_ids: list[int]):
+    semaphore = asyncio.Semaphore(Config.RAID_BAN_CONCURRENCY)
+
+    async def ban(user_id: int) -> bool:
+        async with semaphore:
+            try:
+                await client.outbound.call(chat_id, client.ban_chat_member, chat_id, user_id, priority=PRIORITY_BAN)
+                await log_action(chat_id, "raid_ban", f"Banned {user_id} during join raid")
+                return True
+            except Exception as e:
+                await log_action(chat_id, "error", f"Failed raid ban {user_id}: {e}")
+                return False
+
+    results = await asyncio.gather(*(ban(user_id) for user_id in user_ids))
+    banned = sum(results)
+    if banned:
+        await increment_stat(chat_id, "bans", banned)
+    await log_action(chat_id, "raid_bulk_ban", f"Bulk banned {banned}/{len(user_ids)} raid accounts")
+
+async def check_raid(client: Client, chat_id: int, user_id: int, settings: dict) -> bool:
+    """Feed a join into the raid detector; True if it was queued for a bulk ban"""
+    if not settings.get("anti_raid", False):
+        return False
+    threshold = settings.get("raid_threshold", Config.RAID_THRESHOLD)
+    window = settings.get("raid_window", Config.RAID_WINDOW_SECONDS)
+    cooldown = settings.get("raid_cooldown", Config.RAID_COOLDOWN_SECONDS)
+
+    state = raid_detector.observe(chat_id, user_id, threshold, window, cooldown)
+    if state == "tripped":
+        await log_action(
+            chat_id,
+            "raid_detected",
+            f"{threshold}+ joins within {window}s, raid mode on until {cooldown}s of quiet"
+        )
+    if state is not None:
+        schedule_raid_bans(client, chat_id)
+    return state is not None
 
 @Client.on_chat_member_updated()
+@timed_handler("handle_member_updates")
 async def handle_member_updates(client: Client, update: types.ChatMemberUpdated):
-    if update.chat.type not in ("supergroup", "channel"):
+    event = MemberEvent.from_update(update)
+    # Promotions/demotions keep the permission cache current
+    client.admin_cache.observe(event.chat_id, event.user_id, event.old_status, event.new_status)
+    if client.event_sink is not None:
+        # Split mode: a worker process owning this chat's shard does the rest
+        await client.event_sink.send(event)
+        return
+    # Hand off to the chat's shard so joins/leaves of one chat stay ordered
+    await client.shards.submit(event.chat_id, process_member_event, client, event)
+
+@timed_handler("process_member_event")
+async def process_member_event(client: Client, event: MemberEvent):
+    if event.chat_type not in ("supergroup", "channel"):
         return
 
-    chat_id = update.chat.id
-    settings = await get_channel_settings(chat_id)
+    chat_id = event.chat_id
+    old_status = event.old_status
+    new_status = event.new_status
+
+    was_not_member = old_status not in ("member", "administrator", "creator")
+    now_member = new_status in ("member", "administrator")
+    is_join = now_member and was_not_member
+
+    if is_join and event.user_id:
+        # Settings and the user's hit-and-run flag come back together
+        settings, flagged = await get_join_context(chat_id, event.user_id)
+    else:
+        settings, flagged = await get_channel_settings(chat_id), False
 
     # Skip all protection if maintenance mode
     if settings.get("maintenance", False):
         return
 
-    old = update.old_chat_member
-    new = update.new_chat_member
-
-    if not old or not new:
+    if not old_status or not new_status:
         return
 
-    user = new.user or old.user
-    if user.is_bot or user.id == (await client.get_me()).id:
+    user_id = event.user_id
+    user_name = event.first_name or "Unknown"
+    if event.is_bot or user_id == (await client.peers.get_me()).id:
         return
 
     anti_hitrun = settings.get("anti_hitrun", False)
 
     # === JOIN DETECTION ===
-    was_not_member = old.status not in ("member", "administrator", "creator")
-    now_member = new.status in ("member", "administrator")
-
-    if now_member and was_not_member:
+    if is_join:
         await increment_stat(chat_id, "joins")
 
+        if await check_raid(client, chat_id, user_id, settings):
+            return
+
+        # Federation: the user is on a shared blocklist this chat subscribes to
+        if is_blocklisted(settings, user_id):
+            try:
+                await client.outbound.call(chat_id, client.ban_chat_member, chat_id, user_id, priority=PRIORITY_BAN)
+                await increment_stat(chat_id, "bans")
+                await log_action(
+                    chat_id,
+                    "blocklist_ban",
+                    f"Banned blocklisted user {user_id} ({user_name}) on join"
+                )
+            except Exception as e:
+                await log_action(chat_id, "error", f"Failed blocklist ban on join {user_id}: {e}")
+            return
+
         if anti_hitrun:
             # If already flagged → ban immediately
-            if await is_hitrun_leaver(chat_id, user.id):
+            if flagged:
                 try:
-                    await client.ban_chat_member(chat_id, user.id)
+                    await client.outbound.call(chat_id, client.ban_chat_member, chat_id, user_id, priority=PRIORITY_BAN)
                     await increment_stat(chat_id, "bans")
                     await log_action(
                         chat_id,
                         "anti_hitrun_ban",
-                        f"Banned flagged hit-and-run user {user.id} ({user.first_name or 'Unknown'}) on join"
+                        f"Banned flagged hit-and-run user {user_id} ({user_name}) on join"
                     )
                 except Exception as e:
-                    await log_action(chat_id, "error", f"Failed ban on join {user.id}: {e}")
+                    await log_action(chat_id, "error", f"Failed ban on join {user_id}: {e}")
             else:
                 # Record fresh join time
-                await record_join(chat_id, user.id)
+                await record_join(chat_id, user_id)
 
     # === VOLUNTARY LEAVE DETECTION ===
-    was_member = old.status in ("member", "administrator")
-    now_left_voluntarily = new.status == "left"  # Only voluntary leaves trigger flag
+    was_member = old_status in ("member", "administrator")
+    now_left_voluntarily = new_status == "left"  # Only voluntary leaves trigger flag
 
     if was_member and now_left_voluntarily and anti_hitrun:
-        join_time = await get_and_clear_join_time(chat_id, user.id)
+        join_time = await get_and_clear_join_time(chat_id, user_id)
         if join_time:
             time_spent = datetime.now(timezone.utc) - join_time
-            if time_spent < timedelta(minutes=5):  # "few minutes" = 5 minutes
-                await flag_as_hitrun(chat_id, user.id)
+            if time_spent < timedelta(seconds=Config.HITRUN_WINDOW_SECONDS):
+                await flag_as_hitrun(chat_id, user_id)
+                await publish_to_blocklists(settings, user_id)
                 await log_action(
                     chat_id,
                     "anti_hitrun_flag",
-                    f"Flagged {user.id} ({user.first_name or 'Unknown'}) for hit-and-run (stayed {time_spent})"
+                    f"Flagged {user_id} ({user_name}) for hit-and-run (stayed {time_spent})"
                 )
 
-@Client.on_my_chat_member()
+# Own group: handle_member_updates also matches these updates and only the
+# first matching handler of a group runs
+@Client.on_chat_member_updated(self_member_filter, group=1)
+@timed_handler("welcome_on_add")
 async def welcome_on_add(client: Client, update: types.ChatMemberUpdated):
-    if update.new_chat_member.status in ("administrator", "member"):
+    event = MemberEvent.from_update(update)
+    # Only announce when the bot is newly added, not on promotions/edits
+    was_in_chat = event.old_status in ("administrator", "member")
+    if not was_in_chat and event.new_status in ("administrator", "member"):
         try:
-            await client.send_message(
+            await client.outbound.call(
+                update.chat.id,
+                client.send_message,
                 update.chat.id,
                 "🛡️ <b>Guardian Bot added!</b>\n\n"
                 "• Anti Hit-and-Run protection\n"
+                "• Join-raid detection\n"
                 "• Maintenance mode\n"
                 "• Supervisor system\n\n"
                 "Use /panel in this group to open settings (admins only).",
-                disable_web_page_preview=True
+                disable_web_page_preview=True,
+                priority=PRIORITY_MESSAGE
             )
         except:
             pass
\ No newline at end of file
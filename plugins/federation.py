@@ -0,0 +1,135 @@
+# plugins/federation.py
+import asyncio
+import os
+import re
+import shutil
+import tempfile
+from pyrogram import Client, filters, types
+from database import (
+    get_blocklist_names, get_blocklist_sizes, create_blocklist,
+    import_blocklist_ids, merge_blocklists,
+    subscribe_blocklist, unsubscribe_blocklist, log_action
+)
+from helpers.filters import owner_filter
+from helpers.metrics import timed_handler
+
+LIST_NAME = re.compile(r"^[a-z0-9_-]{1,32}$")
+# Ids parsed from an uploaded file are imported in slices of this size
+IMPORT_SLICE = 100_000
+
+
+async def _reply(client: Client, message: types.Message, text: str):
+    await client.outbound.call(message.chat.id, message.reply, text)
+
+async def _id_slices(path: str, counts: dict):
+    """Read an id file a line at a time, yielding IMPORT_SLICE ids at a time"""
+    pending = []
+    with open(path, "rb") as fh:
+        for line in fh:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                pending.append(int(line))
+            except ValueError:
+                counts["skipped"] += 1
+                continue
+            if len(pending) >= IMPORT_SLICE:
+                counts["parsed"] += len(pending)
+                yield pending
+                pending = []
+                await asyncio.sleep(0)
+    if pending:
+        counts["parsed"] += len(pending)
+        yield pending
+
+# === Owner: manage shared blocklists ===
+
+@Client.on_message(filters.command("blocklists") & filters.private & owner_filter)
+@timed_handler("blocklists_cmd")
+async def blocklists_cmd(client: Client, message: types.Message):
+    sizes = get_blocklist_sizes()
+    if not sizes:
+        await _reply(client, message, "No shared blocklists yet. Create one with /blocklist_new <name>.")
+        return
+    text = "🌐 <b>Shared Blocklists</b>\n\n" + "\n".join(f"• {name}: {size} users" for name, size in sizes.items())
+    await _reply(client, message, text)
+
+@Client.on_message(filters.command("blocklist_new") & filters.private & owner_filter)
+@timed_handler("blocklist_new_cmd")
+async def blocklist_new_cmd(client: Client, message: types.Message):
+    if len(message.command) != 2 or not LIST_NAME.match(message.command[1]):
+        await _reply(client, message, "Usage: /blocklist_new <name> (a-z, 0-9, _ and -)")
+        return
+    name = message.command[1]
+    created = await create_blocklist(name, message.from_user.id)
+    await _reply(client, message, f"✅ Blocklist {name} created." if created else f"Blocklist {name} already exists.")
+
+@Client.on_message(filters.command("blocklist_import") & filters.private & owner_filter)
+@timed_handler("blocklist_import_cmd")
+async def blocklist_import_cmd(client: Client, message: types.Message):
+    """Reply to a text file with one user id per line"""
+    source = message.reply_to_message
+    if len(message.command) != 2 or not source or not source.document:
+        await _reply(client, message, "Reply to a file of user ids (one per line) with /blocklist_import <name>")
+        return
+    name = message.command[1]
+    if name not in get_blocklist_names():
+        await _reply(client, message, f"Unknown blocklist {name}.")
+        return
+
+    # The file goes to disk and is read a line at a time, so memory holds
+    # one slice of ids however large the upload is
+    workdir = tempfile.mkdtemp(prefix="blocklist_")
+    counts = {"parsed": 0, "skipped": 0}
+    try:
+        path = await client.download_media(source, file_name=os.path.join(workdir, "ids.txt"))
+        added = await import_blocklist_ids(name, _id_slices(path, counts))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    await _reply(
+        client, message,
+        f"✅ Imported {counts['parsed']} ids into {name} ({added} new, {counts['skipped']} lines skipped)."
+    )
+
+@Client.on_message(filters.command("blocklist_merge") & filters.private & owner_filter)
+@timed_handler("blocklist_merge_cmd")
+async def blocklist_merge_cmd(client: Client, message: types.Message):
+    names = get_blocklist_names()
+    if len(message.command) != 3 or not all(n in names for n in message.command[1:]):
+        await _reply(client, message, "Usage: /blocklist_merge <source> <target> (both must exist)")
+        return
+    source, target = message.command[1:]
+    if source == target:
+        await _reply(client, message, "Source and target must be different lists.")
+        return
+    added = await merge_blocklists(source, target)
+    await _reply(client, message, f"✅ Merged {source} into {target} ({added} new ids).")
+
+# === Chat admins: opt in to a shared blocklist ===
+
+@Client.on_message(filters.command(["subscribe", "unsubscribe"]) & (filters.group | filters.channel))
+@timed_handler("blocklist_subscription_cmd")
+async def blocklist_subscription_cmd(client: Client, message: types.Message):
+    chat_id = message.chat.id
+    user_id = message.from_user.id if message.from_user else None
+    if user_id is None or not await client.admin_cache.is_admin(chat_id, user_id):
+        return
+    if len(message.command) != 2:
+        names = ", ".join(get_blocklist_names()) or "none"
+        await _reply(client, message, f"Usage: /{message.command[0]} <list>\nAvailable: {names}")
+        return
+
+    name = message.command[1]
+    if message.command[0] == "subscribe":
+        done = await subscribe_blocklist(chat_id, name)
+        text = (
+            f"🌐 Subscribed to {name}: listed users are banned on join, and this chat's "
+            f"hit-and-run flags are shared with the list."
+        ) if done else f"Unknown blocklist {name}."
+    else:
+        done = await unsubscribe_blocklist(chat_id, name)
+        text = f"Unsubscribed from {name}." if done else f"Not subscribed to {name}."
+    if done:
+        await log_action(chat_id, f"blocklist_{message.command[0]}", f"{name} by {user_id}")
+    await _reply(client, message, text)
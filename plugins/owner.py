@@ -1,36 +1,130 @@
 # plugins/owner.py
+import asyncio
+import os
 from pyrogram import Client, filters, types
 from pyrogram.types import InlineKeyboardMarkup, InlineKeyboardButton
-from database import get_all_channels, get_global_stats, log_action
+from database import (
+    get_channels_page, get_global_stats, rebuild_global_stats, log_action,
+    get_settings_cache_stats, get_audit_metrics, get_pool_stats, iter_logs, iter_stats_history
+)
 from config import Config
+from helpers.export import FORMATS, export_rows
 from helpers.filters import owner_filter
+from helpers.metrics import timed_handler
+
+CHANNELS_PER_PAGE = 20
+
+# /export sources: (row iterator, columns)
+EXPORTS = {
+    "logs": (iter_logs, ["timestamp", "action", "details"]),
+    "stats": (iter_stats_history, ["hour", "joins", "bans", "maintenance_hits"]),
+}
 
 @Client.on_message(filters.command("dhanpal") & filters.private & owner_filter)
+@timed_handler("owner_menu")
 async def owner_menu(client: Client, message: types.Message):
     stats = await get_global_stats()
+    cache = get_settings_cache_stats()
+    audit = get_audit_metrics()
+    outbound = client.outbound.metrics()
+    ban_latency = outbound["queue_latency"].get("ban", {}).get("p99", 0)
+    shards = client.shards.metrics()
+    pool = get_pool_stats()
     text = (
         "👑 <b>Owner Panel</b>\n"
         f"Total channels: {stats['total_channels']}\n"
         f"Total joins: {stats['total_joins']}\n"
-        f"Total bans: {stats['total_bans']}"
+        f"Total bans: {stats['total_bans']}\n"
+        f"Settings cache: {cache['hits']} hits / {cache['misses']} misses ({cache['size']} cached)\n"
+        f"Audit queue: {audit['depth']}/{audit['maxsize']} queued, "
+        f"avg batch {audit['avg_batch']}, {audit['dropped']} dropped\n"
+        f"Outbound: {outbound['pending']} pending, ban p99 wait {ban_latency}s, "
+        f"{outbound['flood_waits']} FloodWaits\n"
+        f"Update shards: {shards['workers']} workers, {shards['total_depth']} queued "
+        f"(max {shards['max_depth']}), {shards['errors']} errors\n"
+        f"Mongo pool: {pool['in_use']}/{pool['open']} in use (max {pool['max_pool_size']}), "
+        f"{pool['waiting']} waiting, {pool['checkout_failures']} checkout failures, {pool['clears']} clears"
     )
     markup = InlineKeyboardMarkup([[
         InlineKeyboardButton("📋 List Channels", callback_data="owner_channels")
     ]])
-    await message.reply(text, reply_markup=markup)
+    await client.outbound.call(message.chat.id, message.reply, text, reply_markup=markup)
+
+async def _rebuild_and_report(client: Client, chat_id: int):
+    try:
+        totals = await rebuild_global_stats()
+        text = (
+            f"✅ Global stats rebuilt: {totals['channels']} channels, "
+            f"{totals['joins']} joins, {totals['bans']} bans"
+        )
+    except Exception as e:
+        text = f"❌ Global stats rebuild failed: {e}"
+    await client.outbound.call(chat_id, client.send_message, chat_id, text)
+
+@Client.on_message(filters.command("rebuildstats") & filters.private & owner_filter)
+@timed_handler("rebuild_stats_cmd")
+async def rebuild_stats_cmd(client: Client, message: types.Message):
+    await client.outbound.call(message.chat.id, message.reply, "♻️ Rebuilding global stats in the background...")
+    asyncio.create_task(_rebuild_and_report(client, message.chat.id))
+
+async def _export_and_send(client: Client, chat_id: int, target: int, kind: str, fmt: str):
+    source, fields = EXPORTS[kind]
+    path = None
+    try:
+        path, count = await export_rows(source(target), fields, fmt)
+        await client.outbound.call(
+            chat_id, client.send_document, chat_id, path,
+            file_name=f"{kind}_{target}.{fmt}", caption=f"📦 {kind} for {target}: {count} rows"
+        )
+    except Exception as e:
+        await client.outbound.call(chat_id, client.send_message, chat_id, f"❌ Export failed: {e}")
+    finally:
+        if path:
+            os.remove(path)
+
+@Client.on_message(filters.command("export") & filters.private & owner_filter)
+@timed_handler("export_cmd")
+async def export_cmd(client: Client, message: types.Message):
+    args = message.command[1:]
+    try:
+        target = int(args[0])
+        kind = args[1] if len(args) > 1 else "logs"
+        fmt = args[2] if len(args) > 2 else "jsonl"
+        if kind not in EXPORTS or fmt not in FORMATS:
+            raise ValueError
+    except (IndexError, ValueError):
+        await client.outbound.call(message.chat.id, message.reply, "Usage: /export <chat_id> [logs|stats] [jsonl|csv]")
+        return
+    await client.outbound.call(message.chat.id, message.reply, f"📦 Exporting {kind} for {target}...")
+    asyncio.create_task(_export_and_send(client, message.chat.id, target, kind, fmt))
 
 @Client.on_callback_query(filters.regex("^owner_") & owner_filter)
+@timed_handler("owner_callbacks")
 async def owner_callbacks(client: Client, query: types.CallbackQuery):
-    if query.data == "owner_channels":
-        channels = await get_all_channels()
+    if query.data.startswith("owner_channels"):
+        # owner_channels | owner_channels_next_<last chat_id> | owner_channels_prev_<first chat_id>
+        parts = query.data.split("_")
+        after = int(parts[3]) if len(parts) == 4 and parts[2] == "next" else None
+        before = int(parts[3]) if len(parts) == 4 and parts[2] == "prev" else None
+        page = await get_channels_page(after=after, before=before, limit=CHANNELS_PER_PAGE)
+        channels = page["channels"]
         text = "📋 <b>Connected Channels</b>\n\n"
-        for ch in channels[:20]:
-            try:
-                chat = await client.get_chat(ch["chat_id"])
+        chats = await client.peers.get_chats([ch["chat_id"] for ch in channels])
+        for ch in channels:
+            chat = chats.get(ch["chat_id"])
+            if chat:
                 title = chat.title or "No title"
                 username = f"@{chat.username}" if chat.username else ""
                 text += f"• {title} {username} (ID: {ch['chat_id']})\n"
-            except:
+            else:
                 text += f"• ID: {ch['chat_id']} (inaccessible)\n"
-        buttons = [[InlineKeyboardButton("⬅ Back", callback_data="owner_back")]]
-        await query.message.edit_text(text, reply_markup=InlineKeyboardMarkup(buttons))
\ No newline at end of file
+        if not channels:
+            text += "No channels on this page."
+        nav = []
+        if page["has_prev"] and channels:
+            nav.append(InlineKeyboardButton("◀ Prev", callback_data=f"owner_channels_prev_{channels[0]['chat_id']}"))
+        if page["has_next"] and channels:
+            nav.append(InlineKeyboardButton("Next ▶", callback_data=f"owner_channels_next_{channels[-1]['chat_id']}"))
+        buttons = [nav] if nav else []
+        buttons.append([InlineKeyboardButton("⬅ Back", callback_data="owner_back")])
+        await client.edits.edit(query.message, text, reply_markup=InlineKeyboardMarkup(buttons))
\ No newline at end of file
@@ -1,16 +1,22 @@
 # plugins/settings.py
 import asyncio
+import html
+from datetime import timezone
 from pyrogram import Client, filters, types
 from pyrogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 from database import (
     get_channel_settings, update_setting, add_supervisor,
-    remove_supervisor, is_supervisor, log_action
+    remove_supervisor, is_supervisor, log_action, get_channel_stats,
+    get_stats_history, set_pending_state, pop_pending_state, get_logs_page
 )
 from config import Config
 from plugins.maintenance import check_maintenance
+from helpers.metrics import timed_handler
 
-# Global pending for supervisor add (user_id -> chat_id)
-pending_supervisor_add = {}
+# Pending "Add Supervisor" flows live in the state store (user_id -> chat_id)
+SUPERVISOR_ADD_FLOW = "sup_add"
+
+LOGS_PER_PAGE = 10
 
 MAIN_MENU_TEXT = (
     "🛡️ <b>Guardian Bot</b>\n\n"
@@ -32,10 +38,10 @@ async def has_access(client: Client, chat_id: int, user_id: int) -> tuple[bool,
     if user_id == Config.BOT_OWNER_ID:
         return True, True
     try:
-        member = await client.get_chat_member(chat_id, user_id)
-        is_admin = member.status in ("creator", "administrator")
-        is_sup = await is_supervisor(chat_id, user_id)
-        return (is_admin or is_sup), is_admin
+        # Both answered from memory: admin cache and cached settings
+        if await client.admin_cache.is_admin(chat_id, user_id):
+            return True, True
+        return await is_supervisor(chat_id, user_id), False
     except:
         return False, False
 
@@ -45,9 +51,9 @@ async def show_settings_menu(client: Client, message_or_query, chat_id: int):
     if not has_acc:
         text = "❌ You don't have access to manage this channel."
         if isinstance(message_or_query, types.Message):
-            await message_or_query.reply(text)
+            await client.outbound.call(message_or_query.chat.id, message_or_query.reply, text)
         else:
-            await message_or_query.message.edit_text(text)
+            await client.edits.edit(message_or_query.message, text)
         return
 
     if await check_maintenance(chat_id, user_id):
@@ -56,23 +62,30 @@ async def show_settings_menu(client: Client, message_or_query, chat_id: int):
         return
 
     settings = await get_channel_settings(chat_id)
-    chat = await client.get_chat(chat_id)
+    chat = await client.peers.get_chat(chat_id)
 
     title = chat.title or "Unknown"
     status_hitrun = "ON" if settings.get("anti_hitrun", False) else "OFF"
     status_maint = "ON" if settings["maintenance"] else "OFF"
+    status_raid = "ON" if settings.get("anti_raid", False) else "OFF"
+    raid_rule = (
+        f"{settings.get('raid_threshold', Config.RAID_THRESHOLD)} joins / "
+        f"{settings.get('raid_window', Config.RAID_WINDOW_SECONDS):g}s"
+    )
     sup_count = len(settings["supervisors"])
 
     buttons = [
         [InlineKeyboardButton(f"🔒 Anti Hit-and-Run: {status_hitrun}", callback_data=f"toggle_hitrun_{chat_id}")],
         [InlineKeyboardButton(f"🛠 Maintenance: {status_maint}", callback_data=f"toggle_maint_{chat_id}")],
+        [InlineKeyboardButton(f"🚨 Anti-Raid: {status_raid}", callback_data=f"toggle_raid_{chat_id}")],
         [InlineKeyboardButton(f"👮 Supervisors: {sup_count}", callback_data=f"sup_list_{chat_id}")],
         [InlineKeyboardButton("📊 Stats", callback_data=f"stats_{chat_id}")],
+        [InlineKeyboardButton("📜 Logs", callback_data=f"logs_{chat_id}")],
         [InlineKeyboardButton("⬅ Back", callback_data="back_main")]
     ]
     if not is_admin:
         # Supervisors can't toggle features
-        buttons = buttons[2:]
+        buttons = buttons[3:]
 
     markup = InlineKeyboardMarkup(buttons)
 
@@ -81,15 +94,17 @@ async def show_settings_menu(client: Client, message_or_query, chat_id: int):
         f"━━━━━━━━━━━━━━\n"
         f"🔒 Anti Hit-and-Run: {status_hitrun}\n"
         f"🛠 Maintenance: {status_maint}\n"
+        f"🚨 Anti-Raid: {status_raid} ({raid_rule})\n"
         f"👮 Supervisors: {sup_count}\n"
     )
 
     if isinstance(message_or_query, types.Message):
-        await message_or_query.reply(text, reply_markup=markup)
+        await client.outbound.call(message_or_query.chat.id, message_or_query.reply, text, reply_markup=markup)
     else:
-        await message_or_query.message.edit_text(text, reply_markup=markup)
+        await client.edits.edit(message_or_query.message, text, reply_markup=markup)
 
-@Client.on_callback_query(filters.regex(r"^(back_main|settings_noaccess|toggle_hitrun_|toggle_maint_|sup_|stats_|settings_menu_)"))
+@Client.on_callback_query(filters.regex(r"^(back_main|settings_noaccess|toggle_hitrun_|toggle_maint_|toggle_raid_|sup_|stats_|logs_|settings_menu_)"))
+@timed_handler("settings_callbacks")
 async def settings_callbacks(client: Client, query: types.CallbackQuery):
     data = query.data
 
@@ -99,7 +114,7 @@ async def settings_callbacks(client: Client, query: types.CallbackQuery):
         return
 
     if data == "back_main":
-        await query.message.edit_text(MAIN_MENU_TEXT, reply_markup=MAIN_MENU_MARKUP)
+        await client.edits.edit(query.message, MAIN_MENU_TEXT, reply_markup=MAIN_MENU_MARKUP)
         return
 
     # Extract chat_id (and target_id for remove)
@@ -152,12 +167,23 @@ async def settings_callbacks(client: Client, query: types.CallbackQuery):
         await show_settings_menu(client, query, chat_id)
         return
 
+    # Toggle Anti-Raid
+    if data.startswith("toggle_raid_"):
+        if not is_admin:
+            await query.answer("Admins only", show_alert=True)
+            return
+        new_val = not settings.get("anti_raid", False)
+        await update_setting(chat_id, "anti_raid", new_val)
+        await log_action(chat_id, "toggle_anti_raid", f"Toggled to {new_val} by {user_id}")
+        await show_settings_menu(client, query, chat_id)
+        return
+
     # Add Supervisor (just alert + pending)
     if data.startswith("sup_add_"):
         if not (is_admin or user_id == Config.BOT_OWNER_ID):
             await query.answer("Admins only", show_alert=True)
             return
-        pending_supervisor_add[user_id] = chat_id
+        await set_pending_state(SUPERVISOR_ADD_FLOW, user_id, chat_id)
         await query.answer("Forward any message from the user you want to add as supervisor.", show_alert=True)
         return
 
@@ -182,6 +208,12 @@ async def settings_callbacks(client: Client, query: types.CallbackQuery):
         await show_stats(client, query, chat_id)
         return
 
+    # Show Logs: logs_<chat_id> | logs_<before_ms>_<skip>_<chat_id>
+    if data.startswith("logs_"):
+        before_ms, skip = (int(parts[1]), int(parts[2])) if len(parts) == 4 else (None, 0)
+        await show_logs(client, query, chat_id, before_ms, skip)
+        return
+
     # Back to main settings menu (from sub-menus)
     if data.startswith("settings_menu_"):
         await show_settings_menu(client, query, chat_id)
@@ -201,49 +233,76 @@ async def show_supervisors(client: Client, query: types.CallbackQuery, chat_id:
     if is_admin or user_id == Config.BOT_OWNER_ID:
         buttons.append([InlineKeyboardButton("➕ Add Supervisor", callback_data=f"sup_add_{chat_id}")])
 
+    users = await client.peers.get_users(supervisors[:20])
     for sup_id in supervisors[:20]:
-        try:
-            user = await client.get_users(sup_id)
-            name = user.first_name or "Unknown"
-        except:
-            name = str(sup_id)
+        user = users.get(sup_id)
+        name = (user.first_name or "Unknown") if user else str(sup_id)
         buttons.append([InlineKeyboardButton(f"❌ Remove {name}", callback_data=f"sup_rem_{chat_id}_{sup_id}")])
 
     buttons.append([InlineKeyboardButton("⬅ Back", callback_data=f"settings_menu_{chat_id}")])
     markup = InlineKeyboardMarkup(buttons)
 
     text = f"👮 <b>Supervisors ({len(supervisors)})</b>\n\nSupervisors can view stats only."
-    await query.message.edit_text(text, reply_markup=markup)
+    await client.edits.edit(query.message, text, reply_markup=markup)
 
 async def show_stats(client: Client, query: types.CallbackQuery, chat_id: int):
-    settings = await get_channel_settings(chat_id)
-    stats = settings["stats"]
+    stats, history = await asyncio.gather(get_channel_stats(chat_id), get_stats_history(chat_id))
+    day, week = history["24h"], history["7d"]
     text = (
         f"📊 <b>Channel Stats</b>\n"
         f"━━━━━━━━━━━━━━\n"
+        f"<b>Last 24h</b>\n"
+        f"Joins: {day['joins']} | Bans: {day['bans']} | Maintenance hits: {day['maintenance_hits']}\n"
+        f"<b>Last 7 days</b>\n"
+        f"Joins: {week['joins']} | Bans: {week['bans']} | Maintenance hits: {week['maintenance_hits']}\n"
+        f"<b>All time</b>\n"
         f"Joins: {stats['joins']}\n"
         f"Bans: {stats['bans']}\n"
         f"Maintenance hits: {stats['maintenance_hits']}"
     )
     buttons = [[InlineKeyboardButton("⬅ Back", callback_data=f"settings_menu_{chat_id}")]]
-    await query.message.edit_text(text, reply_markup=InlineKeyboardMarkup(buttons))
+    await client.edits.edit(query.message, text, reply_markup=InlineKeyboardMarkup(buttons))
+
+async def show_logs(client: Client, query: types.CallbackQuery, chat_id: int, before_ms: int | None, skip: int):
+    page = await get_logs_page(chat_id, before_ms=before_ms, skip=skip, limit=LOGS_PER_PAGE)
+    lines = []
+    for entry in page["entries"]:
+        ts = entry["timestamp"]
+        if ts.tzinfo is None:
+            ts = ts.replace(tzinfo=timezone.utc)
+        details = entry.get("details", "")
+        if len(details) > 80:
+            details = details[:77] + "..."
+        lines.append(f"<code>{ts:%d/%m %H:%M}</code> {entry['action']}: {html.escape(details)}")
+    text = "📜 <b>Recent Activity</b> (UTC)\n━━━━━━━━━━━━━━\n" + ("\n".join(lines) or "No activity logged.")
+
+    nav = []
+    if before_ms is not None:
+        nav.append(InlineKeyboardButton("⏮ Latest", callback_data=f"logs_{chat_id}"))
+    if page["next"]:
+        next_ms, next_skip = page["next"]
+        nav.append(InlineKeyboardButton("Older ▶", callback_data=f"logs_{next_ms}_{next_skip}_{chat_id}"))
+    buttons = [nav] if nav else []
+    buttons.append([InlineKeyboardButton("⬅ Back", callback_data=f"settings_menu_{chat_id}")])
+    await client.edits.edit(query.message, text, reply_markup=InlineKeyboardMarkup(buttons))
 
 # Forwarded message handler for adding supervisor
 @Client.on_message(filters.private & filters.forwarded)
+@timed_handler("handle_forwarded_for_sup")
 async def handle_forwarded_for_sup(client: Client, message: types.Message):
     user_id = message.from_user.id
-    if user_id not in pending_supervisor_add:
+    chat_id = await pop_pending_state(SUPERVISOR_ADD_FLOW, user_id)
+    if chat_id is None:
         return
 
-    chat_id = pending_supervisor_add.pop(user_id)
     target = message.forward_from
     if not target or target.is_bot:
-        await message.reply("Invalid forwarded user.")
+        await client.outbound.call(message.chat.id, message.reply, "Invalid forwarded user.")
         return
 
     added = await add_supervisor(chat_id, target.id)
     if added:
-        await message.reply(f"✅ {target.first_name} added as supervisor!")
+        await client.outbound.call(message.chat.id, message.reply, f"✅ {target.first_name} added as supervisor!")
         await log_action(chat_id, "add_supervisor", f"Added {target.id} by {user_id}")
     else:
-        await message.reply("Already a supervisor or error.")
\ No newline at end of file
+        await client.outbound.call(message.chat.id, message.reply, "Already a supervisor or error.")
\ No newline at end of file
@@ -3,6 +3,7 @@ import asyncio
 from pyrogram import Client, filters, types
 from pyrogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 from config import Config
+from helpers.metrics import timed_handler
 
 INTRO_CAPTION = (
     "🛡️ <b>Guardian Bot</b>\n\n"
@@ -20,6 +21,7 @@ INTRO_MARKUP = InlineKeyboardMarkup([
 ])
 
 @Client.on_message(filters.command("start") & filters.private)
+@timed_handler("start_cmd")
 async def start_cmd(client: Client, message: types.Message):
     if message.command and len(message.command) > 1:
         payload = message.command[1]
@@ -27,14 +29,24 @@ async def start_cmd(client: Client, message: types.Message):
             try:
                 chat_id = int(payload[6:])
             except:
-                await message.reply("Invalid link.")
+                await client.outbound.call(message.chat.id, message.reply, "Invalid link.")
                 return
             from plugins.settings import show_settings_menu
             await show_settings_menu(client, message, chat_id)
             return
-        
-        # plugins/start.py (add these callbacks for About/Help)
+
+    # Normal /start
+    sticker = await message.reply_sticker(Config.WELCOME_STICKER)
+    await asyncio.sleep(3)
+    await sticker.delete()
+    await message.reply_photo(
+        Config.INTRO_PHOTO,
+        caption=INTRO_CAPTION,
+        reply_markup=INTRO_MARKUP
+    )
+
 @Client.on_callback_query(filters.regex(r"^(about|help)$"))
+@timed_handler("info_callbacks")
 async def info_callbacks(client: Client, query: types.CallbackQuery):
     if query.data == "about":
         text = (
@@ -51,32 +63,19 @@ async def info_callbacks(client: Client, query: types.CallbackQuery):
             "3. Toggle features as needed"
         )
     buttons = [[InlineKeyboardButton("⬅ Back", callback_data="back_main")]]
-    await query.message.edit_text(text, reply_markup=InlineKeyboardMarkup(buttons))
-
-    # Normal /start
-    sticker = await message.reply_sticker(Config.WELCOME_STICKER)
-    await asyncio.sleep(3)
-    await sticker.delete()
-    await message.reply_photo(
-        Config.INTRO_PHOTO,
-        caption=INTRO_CAPTION,
-        reply_markup=INTRO_MARKUP
-    )
+    await client.edits.edit(query.message, text, reply_markup=InlineKeyboardMarkup(buttons))
 
 @Client.on_message(filters.command("panel") & (filters.group | filters.channel))
+@timed_handler("panel_cmd")
 async def panel_cmd(client: Client, message: types.Message):
     chat_id = message.chat.id
     user_id = message.from_user.id
-    try:
-        member = await client.get_chat_member(chat_id, user_id)
-        if member.status not in ("administrator", "creator"):
-            return
-    except:
+    if not await client.admin_cache.is_admin(chat_id, user_id):
         return
 
-    me = await client.get_me()
+    me = await client.peers.get_me()
     url = f"https://t.me/{me.username}?start=panel_{chat_id}"
     markup = InlineKeyboardMarkup([[
         InlineKeyboardButton("⚙ Open Settings Panel", url=url)
     ]])
-    await message.reply("Click to manage this channel/group settings:", reply_markup=markup)
\ No newline at end of file
+    await client.outbound.call(message.chat.id, message.reply, "Click to manage this channel/group settings:", reply_markup=markup)
\ No newline at end of file
@@ -0,0 +1,40 @@
+# tests/conftest.py
+import asyncio
+import os
+import sys
+import pytest
+
+# Config reads these at import time; the tests never talk to Telegram
+os.environ.setdefault("API_ID", "1")
+os.environ.setdefault("API_HASH", "local")
+os.environ.setdefault("BOT_TOKEN", "local")
+os.environ.setdefault("BOT_OWNER_ID", "1")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(scope="session")
+def run():
+    """Run a coroutine to completion on one loop shared by the whole session.
+
+    The database module keeps its queues and locks at module level, as in
+    production, so every test has to drive them from the same loop.
+    """
+    loop = asyncio.new_event_loop()
+    yield loop.run_until_complete
+    loop.close()
+
+
+@pytest.fixture
+def use_database():
+    """Point every db_handler collection at the given (fake) database"""
+    from database import db_handler
+    return db_handler.bind_database
+
+
+@pytest.fixture(autouse=True)
+def fresh_settings_cache():
+    """Tests bind their own fake database; cached documents must not leak across"""
+    from database import db_handler
+    yield
+    db_handler.settings_cache.clear()
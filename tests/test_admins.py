@@ -0,0 +1,48 @@
+# tests/test_admins.py
+from collections import Counter
+from types import SimpleNamespace
+from helpers.admins import AdminCache
+
+CHAT = -1001
+
+
+class NoAdminListClient:
+    """A chat where the bot may look up single members but not list admins"""
+
+    def __init__(self, admins):
+        self.admins = admins
+        self.calls = Counter()
+
+    def get_chat_members(self, chat_id, filter=None):
+        self.calls["get_chat_members"] += 1
+
+        async def denied():
+            raise PermissionError("CHAT_ADMIN_REQUIRED")
+            yield
+        return denied()
+
+    async def get_chat_member(self, chat_id, user_id):
+        self.calls["get_chat_member"] += 1
+        return SimpleNamespace(status="administrator" if user_id in self.admins else "member")
+
+
+def test_unfetchable_admin_lists_cost_one_call_per_user(run):
+    client = NoAdminListClient(admins={1})
+    cache = AdminCache(client)
+
+    async def checks():
+        return [await cache.is_admin(CHAT, user_id) for user_id in (1, 2, 1, 2, 1)]
+
+    assert run(checks()) == [True, False, True, False, True]
+    assert client.calls == {"get_chat_members": 1, "get_chat_member": 2}
+
+
+def test_admin_changes_update_cached_answers(run):
+    client = NoAdminListClient(admins={1})
+    cache = AdminCache(client)
+    assert run(cache.is_admin(CHAT, 2)) is False
+    cache.observe(CHAT, 2, "member", "administrator")
+    assert run(cache.is_admin(CHAT, 2)) is True
+    # The list is retried once rights may have changed
+    assert client.calls["get_chat_members"] == 2
+    assert client.calls["get_chat_member"] == 1
@@ -0,0 +1,21 @@
+# tests/test_bench.py
+import importlib
+import pkgutil
+from argparse import Namespace
+import plugins
+from tools import bench
+
+
+def test_plugins_import_with_pinned_pyrogram():
+    for module in pkgutil.iter_modules(plugins.__path__):
+        importlib.import_module(f"plugins.{module.name}")
+
+
+def test_bench_runs_every_scenario(run):
+    args = Namespace(events=20, callbacks=5, chats=3, mongo_uri=None, mongo_latency=0.0, telegram_latency=0.0)
+    report = run(bench.main(args))
+    assert [r["scenario"] for r in report["results"]] == [
+        "join", "leave_within_window", "rejoin_flagged",
+        "callback_stats", "callback_toggle", "callback_toggle_burst",
+    ]
+    assert all(r["events"] > 0 for r in report["results"])
@@ -0,0 +1,142 @@
+# tests/test_blocklists.py
+import pytest
+from config import Config
+from database import db_handler
+from database.blocklists import BlocklistIndex, pack_ids, unpack_ids
+from helpers.intset import IntSet
+from tools.fake_mongo import FakeMotorClient
+from tools.fake_telegram import FakeTelegram, fake_message
+
+
+def test_intset_membership_and_bulk_update():
+    users = IntSet([5, 1, 3, 3])
+    assert list(users) == [1, 3, 5]
+    assert users.add(4) and not users.add(4)
+    assert users.update(range(0, 100, 2)) == 49
+    assert 98 in users and 97 not in users
+    assert list(IntSet.from_sorted_runs([[1, 4, 9], [2, 4], []])) == [1, 2, 4, 9]
+    assert list(users.missing([7, 4, 3, 7, 101])) == [7, 101]
+    assert list(IntSet([1, 2, 3, 8, 9]).difference(IntSet([2, 8, 10]))) == [1, 3, 9]
+
+
+def test_flags_added_during_a_background_merge_are_kept():
+    index = BlocklistIndex()
+    index.add("spam", [1, 2])
+    current = index.begin_merge("spam")
+    index.add("spam", [99])  # a flag arriving while the merge runs elsewhere
+    index.finish_merge("spam", IntSet.from_sorted_runs([current, [3, 4]]))
+    assert index.contains_any(["spam"], 99) and index.size("spam") == 5
+
+
+def test_packed_ids_round_trip():
+    ids = [-(2 ** 63), -1, 0, 7, 2 ** 63 - 1]
+    assert list(unpack_ids(pack_ids(reversed(ids)))) == ids
+
+
+@pytest.fixture
+def blocklist_db(monkeypatch, run, use_database):
+    monkeypatch.setattr(Config, "BLOCKLIST_CHUNK_SIZE", 20)
+    monkeypatch.setattr(db_handler, "blocklist_index", BlocklistIndex())
+    use_database(FakeMotorClient()["test_blocklists"])
+    run(db_handler.create_blocklist("spam", 1))
+    run(db_handler.create_blocklist("other", 1))
+
+
+def test_shared_flags_fill_chunks_instead_of_adding_one_each(blocklist_db, run):
+    for user_id in range(50):
+        run(db_handler._write_blocklist_ids([{"list": "spam", "user_id": user_id}]))
+    chunks = run(db_handler.blocklist_chunks_col.find({"list": "spam"}).to_list(None))
+    assert sorted(chunk["count"] for chunk in chunks) == [10, 20, 20]
+
+    run(db_handler.load_blocklists())
+    assert db_handler.get_blocklist_sizes()["spam"] == 50
+
+
+def test_merge_into_itself_is_refused(blocklist_db, run):
+    with pytest.raises(ValueError):
+        run(db_handler.merge_blocklists("spam", "spam"))
+
+
+def _stored_ids(run, name):
+    chunks = run(db_handler.blocklist_chunks_col.find({"list": name}).to_list(None))
+    return sorted(user_id for chunk in chunks for user_id in unpack_ids(chunk["ids"]))
+
+
+def test_merges_and_imports_store_only_new_ids(blocklist_db, run):
+    async def slices(*parts):
+        for part in parts:
+            yield part
+
+    assert run(db_handler.import_blocklist_ids("spam", slices(range(0, 30), range(20, 50)))) == 50
+    assert run(db_handler.import_blocklist_ids("other", slices(range(40, 60)))) == 20
+    assert run(db_handler.merge_blocklists("spam", "other")) == 40
+    # Repeating either adds nothing, in memory or in storage
+    assert run(db_handler.merge_blocklists("spam", "other")) == 0
+    assert run(db_handler.import_blocklist_ids("spam", slices(range(50)))) == 0
+    assert _stored_ids(run, "spam") == list(range(50))
+    assert _stored_ids(run, "other") == list(range(60))
+    assert db_handler.get_blocklist_sizes() == {"other": 60, "spam": 50}
+
+
+def test_import_streams_the_uploaded_file(blocklist_db, run, tmp_path):
+    from plugins.federation import blocklist_import_cmd
+
+    class Uploads(FakeTelegram):
+        async def download_media(self, message, file_name=None, **kwargs):
+            with open(file_name, "w") as fh:
+                fh.write("\n".join(str(i) for i in range(45)) + "\nnot-an-id\n\n")
+            return file_name
+
+    async def scenario():
+        client = Uploads()
+        await client.start()
+        message = fake_message(client, Config.BOT_OWNER_ID)
+        message.command = ["blocklist_import", "other"]
+        message.reply_to_message = fake_message(client, Config.BOT_OWNER_ID)
+        message.reply_to_message.document = object()
+        await blocklist_import_cmd(client, message)
+        await client.stop()
+        return client
+
+    client = run(scenario())
+    assert "Imported 45 ids into other (45 new, 1 lines skipped)" in client.sent[-1][1]
+    assert db_handler.get_blocklist_sizes()["other"] == 45
+
+
+def test_changes_reach_other_processes(blocklist_db, monkeypatch, run):
+    changes = []
+    monkeypatch.setattr(db_handler, "blocklist_listeners", [lambda name, ids: changes.append((name, ids))])
+
+    async def one_slice():
+        yield list(range(10))
+
+    run(db_handler.create_blocklist("fresh", 1))
+    run(db_handler.import_blocklist_ids("fresh", one_slice()))
+    run(db_handler.merge_blocklists("fresh", "spam"))
+    run(db_handler.publish_to_blocklists({"blocklists": ["spam"]}, 77))
+    assert changes == [("fresh", []), ("fresh", None), ("spam", None), ("spam", [77])]
+
+    # A worker started before all of that catches up from the same messages
+    monkeypatch.setattr(db_handler, "blocklist_index", BlocklistIndex())
+    for name, ids in changes:
+        run(db_handler.apply_blocklist_change(name, ids))
+    assert db_handler.get_blocklist_sizes() == {"fresh": 10, "spam": 11}
+    assert db_handler.is_blocklisted({"blocklists": ["spam"]}, 77)
+
+
+def test_ingest_relays_a_worker_flag_to_the_other_workers(blocklist_db, run):
+    from helpers.ipc import IngestServer
+
+    class Conn:
+        def __init__(self):
+            self.sent = []
+
+        async def send(self, message):
+            self.sent.append(message)
+
+    sink = IngestServer(client=None, shards=3, socket_path="unused")
+    sink._conns = {shard: Conn() for shard in range(3)}
+    message = {"op": "blocklist", "name": "spam", "ids": [5]}
+    run(sink._relay_blocklist(message, origin=1))
+    assert [len(sink._conns[shard].sent) for shard in range(3)] == [1, 0, 1]
+    assert db_handler.is_blocklisted({"blocklists": ["spam"]}, 5)
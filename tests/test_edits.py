@@ -0,0 +1,64 @@
+# tests/test_edits.py
+import asyncio
+from tools.bench import fake_query
+from tools.fake_telegram import FakeTelegram, fake_message
+from helpers.edits import EditCoalescer
+
+USER = 7
+
+
+async def _started(delay: float = 0.01) -> FakeTelegram:
+    client = FakeTelegram()
+    client.edits = EditCoalescer(client.outbound, delay=delay)
+    await client.start()
+    return client
+
+
+def test_burst_of_edits_sends_only_the_latest(run):
+    async def scenario():
+        client = await _started()
+        message = fake_message(client, USER)
+        for i in range(5):
+            await client.edits.edit(message, f"render {i}")
+        await asyncio.sleep(0.05)
+        await client.stop()
+        return client, message
+
+    client, message = run(scenario())
+    assert client.calls["edit_message_text"] == 1
+    assert message.text == "render 4"
+
+
+def test_render_already_on_screen_is_skipped(run):
+    async def scenario():
+        client = await _started()
+        message = fake_message(client, USER)
+        await client.edits.edit(message, "same")
+        await asyncio.sleep(0.05)
+        await client.edits.edit(message, "same")
+        await asyncio.sleep(0.05)
+        await client.stop()
+        return client
+
+    client = run(scenario())
+    assert client.calls["edit_message_text"] == 1
+    assert client.edits.metrics()["skipped"] == 1
+
+
+def test_back_from_about_returns_to_the_main_menu(run):
+    from plugins.settings import settings_callbacks, MAIN_MENU_TEXT
+    from plugins.start import info_callbacks
+
+    async def scenario():
+        client = await _started()
+        message = fake_message(client, USER)
+        for data, handler in (("back_main", settings_callbacks), ("about", info_callbacks),
+                              ("back_main", settings_callbacks)):
+            await handler(client, fake_query(client, data, USER, message))
+            await asyncio.sleep(0.05)
+        await client.stop()
+        return client, message
+
+    client, message = run(scenario())
+    assert client.calls["edit_message_text"] == 3
+    assert message.text == MAIN_MENU_TEXT
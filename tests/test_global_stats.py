@@ -0,0 +1,100 @@
+# tests/test_global_stats.py
+import asyncio
+import time
+from database import db_handler
+from tools.fake_mongo import FakeMotorClient
+
+
+def test_rebuild_scan_blocks_neither_registration_nor_loses_counts(monkeypatch, run, use_database):
+    use_database(FakeMotorClient()["test_global_stats"])
+    release = asyncio.Event()
+    aggregate = db_handler.channels_col.aggregate
+
+    class SlowScan:
+        def __init__(self, pipeline):
+            self.inner = aggregate(pipeline)
+
+        async def to_list(self, length=None):
+            result = await self.inner.to_list(length)
+            await release.wait()
+            return result
+
+    async def scenario():
+        for chat_id in (-1, -2):
+            await db_handler.get_channel_settings(chat_id)
+            await db_handler.increment_stat(chat_id, "joins", 5)
+        await db_handler.stats_buffer.flush()
+
+        monkeypatch.setattr(db_handler.channels_col, "aggregate", SlowScan)
+        rebuild = asyncio.create_task(db_handler.rebuild_global_stats())
+        await asyncio.sleep(0.01)
+        assert not db_handler._rollup_lock.locked()
+
+        # A new chat registers while the scan runs
+        await asyncio.wait_for(db_handler.get_channel_settings(-3), timeout=1)
+        # A stats flush waits for the scan instead of racing it
+        await db_handler.increment_stat(-3, "joins", 2)
+        flush = asyncio.create_task(db_handler.stats_buffer.flush())
+        await asyncio.sleep(0.01)
+        assert not flush.done()
+
+        release.set()
+        totals = await rebuild
+        await flush
+        doc = await db_handler.meta_col.find_one({"_id": db_handler.GLOBAL_STATS_ID})
+        return totals, doc
+
+    totals, doc = run(scenario())
+    assert totals["channels"] == 3 and totals["joins"] == 10
+    assert doc["channels"] == 3 and doc["joins"] == 12
+
+
+def test_split_mode_flushes_wait_out_another_process_rebuild(monkeypatch, run, use_database):
+    use_database(FakeMotorClient()["test_global_stats_shared"])
+    monkeypatch.setattr(db_handler, "_rollup_shared", True)
+    lease = {"_id": db_handler.ROLLUP_LEASE_ID}
+
+    async def scenario():
+        await db_handler.get_channel_settings(-1)
+        # The ingestion process is rebuilding: only its lease is visible here
+        await db_handler.meta_col.insert_one({**lease, "until": time.time() + 60})
+        await db_handler.get_channel_settings(-2)
+        await db_handler.increment_stat(-1, "joins", 4)
+        flush = asyncio.create_task(db_handler.stats_buffer.flush())
+        await asyncio.sleep(0.05)
+        assert not flush.done()
+        held = await db_handler.channels_col.find_one({"chat_id": -1})
+
+        await db_handler.meta_col.delete_one(lease)
+        await asyncio.wait_for(flush, timeout=2)
+        doc = await db_handler.meta_col.find_one({"_id": db_handler.GLOBAL_STATS_ID})
+        return held, doc
+
+    held, doc = run(scenario())
+    assert held["stats"]["joins"] == 0
+    # -2 registered under the lease: the rebuild's final count includes it
+    assert doc["channels"] == 1 and doc["joins"] == 4
+
+
+def test_split_mode_rebuild_holds_the_lease_only_while_it_runs(monkeypatch, run, use_database):
+    use_database(FakeMotorClient()["test_global_stats_lease"])
+    monkeypatch.setattr(db_handler, "_rollup_shared", True)
+    monkeypatch.setattr(db_handler, "ROLLUP_LEASE_GRACE", 0)
+    aggregate = db_handler.channels_col.aggregate
+    seen = {}
+
+    class LeaseCheckingScan:
+        def __init__(self, pipeline):
+            self.inner = aggregate(pipeline)
+
+        async def to_list(self, length=None):
+            seen["during"] = await db_handler._rollup_lease_remaining()
+            return await self.inner.to_list(length)
+
+    async def scenario():
+        monkeypatch.setattr(db_handler.channels_col, "aggregate", LeaseCheckingScan)
+        await db_handler.rebuild_global_stats()
+        seen["after"] = await db_handler._rollup_lease_remaining()
+
+    run(scenario())
+    assert seen["during"] > 0 and seen["after"] == 0
@@ -0,0 +1,49 @@
+# tests/test_join_tracker.py
+import time
+from datetime import datetime, timezone, timedelta
+from config import Config
+from database import db_handler
+from database.join_tracker import JoinTracker
+from tools.fake_mongo import FakeMotorClient
+
+CHAT = -1001
+
+
+def test_record_and_pop_within_window():
+    tracker = JoinTracker(window=60)
+    assert tracker.record(CHAT, 1)
+    assert (CHAT, 1) in tracker
+    assert tracker.pop(CHAT, 1) is not None
+    assert tracker.pop(CHAT, 1) is None
+
+
+def test_entries_outside_window_are_refused_and_expired():
+    tracker = JoinTracker(window=60)
+    assert not tracker.record(CHAT, 1, time.time() - 61)
+    assert tracker.record(CHAT, 2, time.time() - 59.9)
+    tracker.window = 1
+    assert (CHAT, 2) not in tracker
+    assert len(tracker) == 0
+
+
+def test_rejoin_supersedes_the_older_heap_entry():
+    tracker = JoinTracker(window=60)
+    tracker.record(CHAT, 1, time.time() - 50)
+    tracker.record(CHAT, 1)
+    tracker.window = 10
+    assert (CHAT, 1) in tracker
+
+
+def test_reconciled_joins_survive_a_restart_without_snapshots(monkeypatch, run, use_database):
+    monkeypatch.setattr(Config, "JOIN_SNAPSHOT_INTERVAL", 0)
+    use_database(FakeMotorClient()["test_join_tracker"])
+    monkeypatch.setattr(db_handler, "join_tracker", JoinTracker(window=Config.HITRUN_WINDOW_SECONDS))
+    joined = datetime.now(timezone.utc) - timedelta(seconds=30)
+
+    assert run(db_handler.record_reconciled_joins(CHAT, [(1, joined), (2, joined)])) == 2
+
+    # Restart: memory is gone, the reconcile checkpoint would skip this chat
+    monkeypatch.setattr(db_handler, "join_tracker", JoinTracker(window=Config.HITRUN_WINDOW_SECONDS))
+    run(db_handler.restore_join_snapshot())
+    assert (CHAT, 1) in db_handler.join_tracker
+    assert (CHAT, 2) in db_handler.join_tracker
@@ -0,0 +1,29 @@
+# tests/test_logs.py
+from datetime import datetime, timezone, timedelta
+from database import db_handler
+from tools.fake_mongo import FakeMotorClient
+
+CHAT = -1001
+
+
+def test_log_pages_neither_skip_nor_repeat_tied_timestamps(run, use_database):
+    use_database(FakeMotorClient()["test_logs"])
+    base = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    # Three entries per millisecond, so page boundaries land inside ties
+    run(db_handler.logs_col.insert_many([
+        {"chat_id": CHAT, "action": f"a{i}", "details": "", "timestamp": base + timedelta(milliseconds=i // 3)}
+        for i in range(37)
+    ]))
+
+    async def walk():
+        seen, before, skip = [], None, 0
+        while True:
+            page = await db_handler.get_logs_page(CHAT, before_ms=before, skip=skip, limit=10)
+            seen += [entry["action"] for entry in page["entries"]]
+            if not page["next"]:
+                return seen
+            before, skip = page["next"]
+
+    seen = run(walk())
+    assert len(seen) == 37
+    assert set(seen) == {f"a{i}" for i in range(37)}
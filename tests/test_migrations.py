@@ -0,0 +1,46 @@
+# tests/test_migrations.py
+import pytest
+from database import db_handler, migrations
+from tools.fake_mongo import FakeMotorClient
+
+
+def test_duplicates_are_merged_before_unique_indexes_build(run, use_database):
+    mongo = FakeMotorClient()
+    use_database(mongo["test_migrations"])
+    run(db_handler.channels_col.insert_many([
+        {"chat_id": -1, "anti_hitrun": True, "stats": {"joins": 3, "bans": 1, "maintenance_hits": 0}},
+        {"chat_id": -1, "anti_hitrun": False, "stats": {"joins": 2, "bans": 0, "maintenance_hits": 4}},
+        {"chat_id": -2, "stats": {"joins": 1, "bans": 0, "maintenance_hits": 0}},
+    ]))
+    run(db_handler.hitrun_leavers_col.insert_many([
+        {"chat_id": -1, "user_id": 7}, {"chat_id": -1, "user_id": 7}, {"chat_id": -1, "user_id": 8},
+    ]))
+
+    run(migrations.run_migrations())
+
+    channels = run(db_handler.channels_col.find({"chat_id": -1}).to_list(None))
+    assert len(channels) == 1
+    assert channels[0]["anti_hitrun"] is True
+    assert channels[0]["stats"] == {"joins": 5, "bans": 1, "maintenance_hits": 4}
+    assert run(db_handler.hitrun_leavers_col.count_documents({})) == 2
+    # The unique index is in force now
+    with pytest.raises(Exception):
+        run(db_handler.hitrun_leavers_col.insert_one({"chat_id": -1, "user_id": 8}))
+
+
+def test_a_failed_index_neither_skips_the_rest_nor_passes_silently(monkeypatch, run, use_database):
+    mongo = FakeMotorClient()
+    use_database(mongo["test_migrations_indexes"])
+    create_index = db_handler.channels_col.create_index
+
+    async def broken(keys, **options):
+        if options.get("unique"):
+            raise RuntimeError("E11000 duplicate key error")
+        return await create_index(keys, **options)
+
+    monkeypatch.setattr(db_handler.channels_col, "create_index", broken)
+    with pytest.raises(RuntimeError, match="1 index"):
+        run(migrations.run_migrations())
+    # The TTL indexes after the failing one were still built
+    assert mongo.ops["stats_history.create_index"] == 2
+    assert mongo.ops["active_members.create_index"] == 2
@@ -0,0 +1,71 @@
+# tests/test_outbound.py
+import asyncio
+import pytest
+from pyrogram.errors import FloodWait
+from helpers.outbound import OutboundScheduler, TokenBucket
+
+
+def test_token_bucket_refills_at_rate():
+    bucket = TokenBucket(rate=2, burst=2)
+    bucket.consume(bucket.updated)
+    bucket.consume(bucket.updated)
+    assert bucket.wait_time(bucket.updated) == pytest.approx(0.5)
+    assert bucket.wait_time(bucket.updated + 0.5) == 0.0
+
+
+def _flaky(floods: int):
+    state = {"calls": 0}
+
+    async def send():
+        state["calls"] += 1
+        if state["calls"] <= floods:
+            raise FloodWait(value=0)
+        return "sent"
+    return send, state
+
+
+def test_flood_wait_is_retried(run):
+    async def scenario():
+        outbound = OutboundScheduler(max_flood_waits=3)
+        outbound.start()
+        send, state = _flaky(2)
+        result = await asyncio.wait_for(outbound.call(1, send), timeout=2)
+        await outbound.stop()
+        return result, state["calls"], outbound.flood_waits
+
+    assert run(scenario()) == ("sent", 3, 2)
+
+
+def test_flood_waits_beyond_the_cap_reach_the_caller(run):
+    async def scenario():
+        outbound = OutboundScheduler(max_flood_waits=2)
+        outbound.start()
+        send, state = _flaky(10)
+        with pytest.raises(FloodWait):
+            await asyncio.wait_for(outbound.call(1, send), timeout=2)
+        await outbound.stop()
+        return state["calls"]
+
+    assert run(scenario()) == 3
+
+
+def test_flood_wait_after_stop_fails_instead_of_hanging(run):
+    async def scenario():
+        outbound = OutboundScheduler()
+        outbound.start()
+        release = asyncio.Event()
+
+        async def send():
+            await release.wait()
+            raise FloodWait(value=0)
+
+        caller = asyncio.create_task(outbound.call(1, send))
+        await asyncio.sleep(0.01)
+        stopping = asyncio.create_task(outbound.stop(timeout=0))
+        await asyncio.sleep(0.01)
+        release.set()
+        await stopping
+        with pytest.raises(FloodWait):
+            await asyncio.wait_for(caller, timeout=1)
+
+    run(scenario())
@@ -0,0 +1,52 @@
+# tests/test_raid.py
+import asyncio
+from config import Config
+from helpers.raid import RaidDetector
+from tools.fake_mongo import FakeMotorClient
+from tools.fake_telegram import FakeTelegram
+
+CHAT = -1001
+
+
+def test_detector_trips_at_threshold_and_queues_the_burst():
+    detector = RaidDetector()
+    states = [detector.observe(CHAT, user_id, 3, 10, 60) for user_id in (1, 2, 3)]
+    assert states == [None, None, "tripped"]
+    assert detector.observe(CHAT, 4, 3, 10, 60) == "raid"
+    assert detector.observe(CHAT, 4, 3, 10, 60) == "raid"
+    assert detector.take_pending(CHAT) == [1, 2, 3, 4]
+    assert detector.take_pending(CHAT) == []
+
+
+def test_detector_ignores_joins_outside_the_window():
+    detector = RaidDetector()
+    assert detector.observe(CHAT, 1, 2, 0.0, 60) is None
+    assert detector.observe(CHAT, 2, 2, 0.0, 60) is None
+    assert not detector.in_raid(CHAT)
+
+
+def test_joins_after_a_lull_in_the_same_raid_are_banned(monkeypatch, run, use_database):
+    from plugins import admin_logic
+
+    monkeypatch.setattr(Config, "RAID_BAN_BATCH_DELAY", 0.01)
+    monkeypatch.setattr(admin_logic, "raid_detector", RaidDetector())
+    use_database(FakeMotorClient()["test_raid"])
+    settings = {"anti_raid": True, "raid_threshold": 5, "raid_window": 10, "raid_cooldown": 60}
+
+    async def scenario():
+        client = FakeTelegram()
+        await client.start()
+        for user_id in range(1, 6):
+            await admin_logic.check_raid(client, CHAT, user_id, settings)
+        await asyncio.sleep(0.1)
+        assert len(client.bans) == 5
+        assert CHAT not in admin_logic.raid_ban_tasks
+
+        # Still in raid mode: stragglers must get a pass of their own
+        for user_id in range(6, 16):
+            assert await admin_logic.check_raid(client, CHAT, user_id, settings)
+        await asyncio.sleep(0.1)
+        await client.stop()
+        return sorted(user_id for _, user_id in client.bans)
+
+    assert run(scenario()) == list(range(1, 16))
@@ -0,0 +1,33 @@
+# tests/test_settings_cache.py
+from database import db_handler
+from tools.fake_mongo import FakeMotorClient
+
+
+def test_new_channels_do_not_share_default_lists(run, use_database):
+    use_database(FakeMotorClient()["test_settings_cache"])
+
+    async def scenario():
+        first = await db_handler.get_channel_settings(-1)
+        assert await db_handler.add_supervisor(-1, 42)
+        second = await db_handler.get_channel_settings(-2)
+        return first, second
+
+    first, second = run(scenario())
+    assert first["supervisors"] == [42]
+    assert second["supervisors"] == []
+    assert db_handler.DEFAULT_SETTINGS["supervisors"] == []
+    assert first["stats"] is not second["stats"]
+
+
+def test_cached_settings_follow_writes(run, use_database):
+    use_database(FakeMotorClient()["test_settings_cache_writes"])
+
+    async def scenario():
+        await db_handler.get_channel_settings(-5)
+        await db_handler.update_setting(-5, "maintenance", True)
+        cached = await db_handler.get_channel_settings(-5)
+        stored = await db_handler.channels_col.find_one({"chat_id": -5})
+        return cached, stored
+
+    cached, stored = run(scenario())
+    assert cached["maintenance"] is True and stored["maintenance"] is True
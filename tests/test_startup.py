@@ -0,0 +1,82 @@
+# tests/test_startup.py
+from types import SimpleNamespace
+import pyrogram
+import pytest
+import bot
+from config import Config
+from database import db_handler, migrations
+from tools.fake_mongo import FakeMotorClient
+
+
+@pytest.fixture
+def telegram(monkeypatch, tmp_path, use_database):
+    """Stand-ins for pyrogram's network side; hooks run where Telegram would"""
+    monkeypatch.setattr(Config, "SESSION_DIR", str(tmp_path))
+    monkeypatch.setattr(Config, "PEER_PREWARM_BATCH", 0)
+    monkeypatch.setattr(Config, "RECONCILE_CONCURRENCY", 0)
+    hooks = SimpleNamespace(on_start=None, events=[])
+
+    async def init_db():
+        use_database(FakeMotorClient()["test_startup"])
+        await db_handler.channels_col.insert_one({"chat_id": -1, "rejoin_ban": True})
+
+    async def telegram_start(client):
+        if hooks.on_start:
+            await hooks.on_start()
+
+    async def telegram_stop(client, *args):
+        # Client.stop -> terminate stops the update dispatcher too
+        await client.dispatcher.stop()
+        hooks.events.append("telegram stopped")
+
+    async def get_me(client):
+        return SimpleNamespace(id=1, username="guardian_test_bot")
+
+    monkeypatch.setattr(bot, "init_db", init_db)
+    monkeypatch.setattr(bot, "close_db", lambda: hooks.events.append("db closed"))
+    monkeypatch.setattr(pyrogram.Client, "start", telegram_start)
+    monkeypatch.setattr(pyrogram.Client, "stop", telegram_stop)
+    monkeypatch.setattr(pyrogram.Client, "get_me", get_me)
+    return hooks
+
+
+def test_migrations_finish_before_updates_are_delivered(telegram, run):
+    seen = {}
+
+    async def first_update_window():
+        seen["schema"] = await migrations.get_schema_version()
+        seen["settings"] = await db_handler.channels_col.find_one({"chat_id": -1})
+
+    telegram.on_start = first_update_window
+
+    async def scenario():
+        guardian = bot.GuardianBot()
+        await guardian.start()
+        await guardian.stop()
+
+    run(scenario())
+    assert seen["schema"] == migrations.MIGRATIONS[-1][0]
+    assert seen["settings"]["anti_hitrun"] is True
+    assert "rejoin_ban" not in seen["settings"]
+
+
+def test_stop_flushes_counts_from_handlers_still_running(telegram, run):
+    async def scenario():
+        guardian = bot.GuardianBot()
+        await guardian.start()
+        stop_updates = guardian.dispatcher.stop
+
+        async def finish_inflight_handler():
+            # A handler that was mid-update when shutdown began
+            if "updates stopped" not in telegram.events:
+                await db_handler.increment_stat(-1, "joins")
+                telegram.events.append("updates stopped")
+            await stop_updates()
+
+        guardian.dispatcher.stop = finish_inflight_handler
+        await guardian.stop()
+        doc = await db_handler.channels_col.find_one({"chat_id": -1})
+        return doc.get("stats", {}).get("joins")
+
+    assert run(scenario()) == 1
+    assert telegram.events.index("updates stopped") < telegram.events.index("db closed")
@@ -0,0 +1,196 @@
+# tools/bench.py - synthetic load benchmark for the member-update and settings handlers
+#
+#   python -m tools.bench                          # in-memory Mongo stand-in
+#   python -m tools.bench --mongo-latency 0.0005   # ...with a simulated 0.5 ms RTT
+#   python -m tools.bench --mongo-uri mongodb://localhost:27017 --output bench.json
+#   python -m tools.bench --compare bench.json     # diff against an earlier run
+#
+# Prints one JSON document: events/sec, p50/p99 latency, Mongo ops and
+# Telegram calls per event for each scenario, tagged with the git commit.
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+from types import SimpleNamespace
+from pymongo import monitoring
+
+os.environ.setdefault("API_ID", "1")
+os.environ.setdefault("API_HASH", "local")
+os.environ.setdefault("BOT_TOKEN", "local")
+os.environ.setdefault("BOT_OWNER_ID", "1")
+
+from database import db_handler
+from tools.fake_mongo import FakeMotorClient
+from tools.fake_telegram import FakeTelegram, fake_message, fake_user, member_update
+
+BENCH_DB = "guardian_bot_bench"
+ADMIN_ID = 424242
+
+
+class OpCounter(monitoring.CommandListener):
+    """Counts Mongo operations, either from the fake client or via pymongo command monitoring"""
+
+    def __init__(self, fake: FakeMotorClient | None):
+        self.fake = fake
+        self.count = 0
+
+    def started(self, event):
+        self.count += 1
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+    @property
+    def total(self) -> int:
+        return self.fake.total_ops if self.fake else self.count
+
+
+def fake_query(client: FakeTelegram, data: str, user_id: int, message=None):
+    message = message or fake_message(client, user_id)
+
+    async def answer(*args, **kwargs):
+        client.calls["answer_callback_query"] += 1
+
+    return SimpleNamespace(data=data, from_user=fake_user(user_id), message=message, answer=answer)
+
+
+def percentile(samples: list, pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))] if ordered else 0.0
+
+
+async def run_scenario(name: str, client: FakeTelegram, ops: OpCounter, items, handler) -> dict:
+    """Feed items through handler one at a time and measure each call"""
+    from database import start_background_writers, stop_background_writers
+
+    start_background_writers()
+    ops_before = ops.total
+    calls_before = sum(client.calls.values())
+    latencies = []
+    started = time.perf_counter()
+    for item in items:
+        t0 = time.perf_counter()
+        await handler(client, item)
+        latencies.append(time.perf_counter() - t0)
+    elapsed = time.perf_counter() - started
+    # Write-behind buffers and debounced edits belong to the events that filled them
+    await client.edits.drain()
+    await stop_background_writers()
+
+    n = len(latencies)
+    return {
+        "scenario": name,
+        "events": n,
+        "events_per_sec": round(n / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 4),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 4),
+        "mongo_ops_per_event": round((ops.total - ops_before) / n, 3) if n else 0.0,
+        "telegram_calls_per_event": round((sum(client.calls.values()) - calls_before) / n, 3) if n else 0.0,
+    }
+
+
+async def main(args) -> dict:
+    from plugins.admin_logic import handle_member_updates
+    from plugins.settings import settings_callbacks
+
+    if args.mongo_uri:
+        from motor.motor_asyncio import AsyncIOMotorClient
+        ops = OpCounter(None)
+        mongo = AsyncIOMotorClient(args.mongo_uri, event_listeners=[ops])
+        await mongo.drop_database(BENCH_DB)
+    else:
+        fake = FakeMotorClient(latency=args.mongo_latency)
+        ops = OpCounter(fake)
+        mongo = fake
+    db_handler.bind_database(mongo[BENCH_DB])
+    await db_handler.ping_db()
+    await db_handler.init_db_indexes()
+
+    chat_ids = [-1000000000000 - i for i in range(args.chats)]
+    client = FakeTelegram(latency=args.telegram_latency, admins={c: {ADMIN_ID} for c in chat_ids})
+    await client.peers.load_me()
+    for chat_id in chat_ids:
+        await db_handler.get_channel_settings(chat_id)
+        await db_handler.update_setting(chat_id, "anti_hitrun", True)
+    await db_handler.load_hitrun_index()
+
+    def chat_for(user_id: int) -> int:
+        return chat_ids[user_id % len(chat_ids)]
+
+    users = range(1, args.events + 1)
+    panel = fake_message(client, ADMIN_ID)
+    results = [
+        await run_scenario("join", client, ops,
+                           [member_update(chat_for(u), u, "left", "member") for u in users],
+                           handle_member_updates),
+        await run_scenario("leave_within_window", client, ops,
+                           [member_update(chat_for(u), u, "member", "left") for u in users],
+                           handle_member_updates),
+        await run_scenario("rejoin_flagged", client, ops,
+                           [member_update(chat_for(u), u, "left", "member") for u in users],
+                           handle_member_updates),
+        await run_scenario("callback_stats", client, ops,
+                           [fake_query(client, f"stats_{chat_for(i)}", ADMIN_ID) for i in range(args.callbacks)],
+                           settings_callbacks),
+        await run_scenario("callback_toggle", client, ops,
+                           [fake_query(client, f"toggle_hitrun_{chat_for(i)}", ADMIN_ID) for i in range(args.callbacks)],
+                           settings_callbacks),
+        # One admin hammering the toggle on a single panel message
+        await run_scenario("callback_toggle_burst", client, ops,
+                           [fake_query(client, f"toggle_hitrun_{chat_ids[0]}", ADMIN_ID, panel) for _ in range(args.callbacks)],
+                           settings_callbacks),
+    ]
+
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = ""
+    return {
+        "commit": commit,
+        "backend": "mongod" if args.mongo_uri else "memory",
+        "mongo_latency_ms": args.mongo_latency * 1000,
+        "chats": args.chats,
+        "results": results,
+    }
+
+
+def compare(current: dict, baseline: dict):
+    old = {r["scenario"]: r for r in baseline["results"]}
+    print(f"{'scenario':<22}{'metric':<26}{'baseline':>12}{'current':>12}{'change':>10}", file=sys.stderr)
+    for result in current["results"]:
+        before = old.get(result["scenario"])
+        if not before:
+            continue
+        for metric in ("events_per_sec", "p50_ms", "p99_ms", "mongo_ops_per_event", "telegram_calls_per_event"):
+            a, b = before[metric], result[metric]
+            change = f"{(b - a) / a * 100:+.1f}%" if a else "n/a"
+            print(f"{result['scenario']:<22}{metric:<26}{a:>12}{b:>12}{change:>10}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Guardian Bot handler benchmark")
+    parser.add_argument("--events", type=int, default=5000, help="member updates per scenario")
+    parser.add_argument("--callbacks", type=int, default=500, help="button presses per callback scenario")
+    parser.add_argument("--chats", type=int, default=50)
+    parser.add_argument("--mongo-uri", help="benchmark against a real mongod (uses a scratch database)")
+    parser.add_argument("--mongo-latency", type=float, default=0.0, help="simulated RTT per op for the in-memory backend")
+    parser.add_argument("--telegram-latency", type=float, default=0.0, help="simulated RTT per Telegram call")
+    parser.add_argument("--output", help="write the JSON result here as well as to stdout")
+    parser.add_argument("--compare", help="earlier JSON result to diff against")
+    args = parser.parse_args()
+
+    report = asyncio.run(main(args))
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    if args.compare:
+        with open(args.compare) as f:
+            compare(report, json.load(f))
@@ -0,0 +1,470 @@
+# tools/fake_mongo.py - in-memory stand-in for the Motor API used by database/
+import asyncio
+import copy
+import itertools
+from collections import Counter
+from types import SimpleNamespace
+
+_ids = itertools.count(1)
+
+
+def _get(doc, path: str):
+    value = doc
+    for part in path.split("."):
+        if isinstance(value, dict):
+            value = value.get(part)
+        elif isinstance(value, list) and part.isdigit() and int(part) < len(value):
+            value = value[int(part)]
+        else:
+            return None
+    return value
+
+
+def _set(doc, path: str, value):
+    parts = path.split(".")
+    target = doc
+    for part in parts[:-1]:
+        if isinstance(target, list):
+            target = target[int(part)]
+        else:
+            target = target.setdefault(part, {})
+    if isinstance(target, list):
+        target[int(parts[-1])] = value
+    else:
+        target[parts[-1]] = value
+
+
+def _unset(doc, path: str):
+    parts = path.split(".")
+    target = _get(doc, ".".join(parts[:-1])) if len(parts) > 1 else doc
+    if isinstance(target, dict):
+        target.pop(parts[-1], None)
+
+
+def _compare(value, cond) -> bool:
+    if isinstance(cond, dict) and cond and all(k.startswith("$") for k in cond):
+        for op, arg in cond.items():
+            if op == "$in":
+                if not any(_compare(value, a) for a in arg):
+                    return False
+            elif op == "$nin":
+                if any(_compare(value, a) for a in arg):
+                    return False
+            elif op == "$ne":
+                if _compare(value, arg):
+                    return False
+            elif op == "$exists":
+                if (value is not None) != bool(arg):
+                    return False
+            elif op in ("$gt", "$gte", "$lt", "$lte"):
+                if value is None:
+                    return False
+                if op == "$gt" and not value > arg:
+                    return False
+                if op == "$gte" and not value >= arg:
+                    return False
+                if op == "$lt" and not value < arg:
+                    return False
+                if op == "$lte" and not value <= arg:
+                    return False
+            else:
+                raise NotImplementedError(f"FakeMongo: query operator {op}")
+        return True
+    if isinstance(value, list) and not isinstance(cond, list):
+        return cond in value
+    return value == cond
+
+
+def matches(doc: dict, query: dict) -> bool:
+    for key, cond in query.items():
+        if key == "$or":
+            if not any(matches(doc, q) for q in cond):
+                return False
+        elif key == "$and":
+            if not all(matches(doc, q) for q in cond):
+                return False
+        elif not _compare(_get(doc, key), cond):
+            return False
+    return True
+
+
+def _project(doc: dict, projection) -> dict:
+    if not projection:
+        return copy.deepcopy(doc)
+    include = {k for k, v in projection.items() if v and k != "_id"}
+    if not include:
+        out = copy.deepcopy(doc)
+        for key, v in projection.items():
+            if not v:
+                _unset(out, key)
+        return out
+    out = {}
+    if projection.get("_id", 1) and "_id" in doc:
+        out["_id"] = doc["_id"]
+    for key in include:
+        value = _get(doc, key)
+        if value is not None:
+            _set(out, key, copy.deepcopy(value))
+    return out
+
+
+def apply_update(doc: dict, update: dict, inserting: bool = False):
+    if not any(k.startswith("$") for k in update):
+        keep_id = doc.get("_id")
+        doc.clear()
+        doc.update(copy.deepcopy(update))
+        if keep_id is not None:
+            doc["_id"] = keep_id
+        return
+    for op, fields in update.items():
+        for path, value in fields.items():
+            if op == "$set":
+                _set(doc, path, copy.deepcopy(value))
+            elif op == "$setOnInsert":
+                if inserting:
+                    _set(doc, path, copy.deepcopy(value))
+            elif op == "$unset":
+                _unset(doc, path)
+            elif op == "$rename":
+                current = _get(doc, path)
+                if current is not None:
+                    _unset(doc, path)
+                    _set(doc, value, current)
+            elif op == "$inc":
+                _set(doc, path, (_get(doc, path) or 0) + value)
+            elif op == "$max":
+                current = _get(doc, path)
+                if current is None or value > current:
+                    _set(doc, path, value)
+            elif op == "$addToSet":
+                items = _get(doc, path)
+                if items is None:
+                    items = []
+                    _set(doc, path, items)
+                values = value["$each"] if isinstance(value, dict) and "$each" in value else [value]
+                for v in values:
+                    if v not in items:
+                        items.append(v)
+            elif op == "$push":
+                items = _get(doc, path)
+                if items is None:
+                    items = []
+                    _set(doc, path, items)
+                items.append(copy.deepcopy(value))
+            elif op == "$pull":
+                items = _get(doc, path) or []
+                _set(doc, path, [v for v in items if not _compare(v, value)])
+            else:
+                raise NotImplementedError(f"FakeMongo: update operator {op}")
+
+
+class DuplicateKeyError(Exception):
+    pass
+
+
+class FakeCursor:
+    def __init__(self, collection, docs):
+        self._collection = collection
+        self._docs = docs
+        self._sort = None
+        self._skip = 0
+        self._limit = 0
+
+    def sort(self, key, direction=None):
+        self._sort = [(key, direction or 1)] if isinstance(key, str) else list(key)
+        return self
+
+    def skip(self, n: int):
+        self._skip = n
+        return self
+
+    def limit(self, n: int):
+        self._limit = n
+        return self
+
+    def batch_size(self, n: int):
+        return self
+
+    def _results(self):
+        docs = self._docs
+        if self._sort:
+            for key, direction in reversed(self._sort):
+                docs = sorted(docs, key=lambda d: (_get(d, key) is None, _get(d, key)), reverse=direction < 0)
+        docs = docs[self._skip:]
+        if self._limit:
+            docs = docs[:self._limit]
+        return docs
+
+    async def to_list(self, length=None):
+        await self._collection._op("cursor")
+        docs = self._results()
+        return docs if length is None else docs[:length]
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        await self._collection._op("cursor")
+        for doc in self._results():
+            yield doc
+
+
+class FakeCollection:
+    def __init__(self, database, name: str):
+        self.database = database
+        self.name = name
+        self.docs = []
+        self.unique_keys = []
+
+    async def _op(self, kind: str):
+        self.database.client.ops[f"{self.name}.{kind}"] += 1
+        if self.database.client.latency:
+            await asyncio.sleep(self.database.client.latency)
+
+    def _find(self, query) -> list:
+        return [d for d in self.docs if matches(d, query or {})]
+
+    def _check_unique(self, doc, ignore=None):
+        for keys in self.unique_keys:
+            ident = tuple(_get(doc, k) for k in keys)
+            for other in self.docs:
+                if other is not ignore and other is not doc and tuple(_get(other, k) for k in keys) == ident:
+                    raise DuplicateKeyError(f"E11000 duplicate key error collection: {self.name}")
+
+    def _insert(self, doc: dict):
+        doc.setdefault("_id", next(_ids))
+        self._check_unique(doc)
+        self.docs.append(copy.deepcopy(doc))
+        return doc["_id"]
+
+    def _update(self, query, update, upsert=False, many=False):
+        targets = self._find(query)
+        if not many:
+            targets = targets[:1]
+        for doc in targets:
+            apply_update(doc, update)
+        if targets or not upsert:
+            return SimpleNamespace(matched_count=len(targets), modified_count=len(targets), upserted_id=None)
+        doc = {k: v for k, v in query.items() if not k.startswith("$") and not isinstance(v, dict)}
+        apply_update(doc, update, inserting=True)
+        return SimpleNamespace(matched_count=0, modified_count=0, upserted_id=self._insert(doc))
+
+    async def create_index(self, keys, unique=False, **kwargs):
+        await self._op("create_index")
+        if unique:
+            fields = [keys] if isinstance(keys, str) else [k for k, _ in keys]
+            # Like mongod, refuse to build over documents that already collide
+            seen = set()
+            for doc in self.docs:
+                ident = tuple(_get(doc, k) for k in fields)
+                if ident in seen:
+                    raise DuplicateKeyError(f"E11000 duplicate key error collection: {self.name}")
+                seen.add(ident)
+            if fields not in self.unique_keys:
+                self.unique_keys.append(fields)
+        return "_".join([keys] if isinstance(keys, str) else [k for k, _ in keys])
+
+    async def find_one(self, query=None, projection=None, **kwargs):
+        await self._op("find_one")
+        found = self._find(query)
+        if kwargs.get("sort"):
+            found = FakeCursor(self, found).sort(kwargs["sort"])._results()
+        return _project(found[0], projection) if found else None
+
+    def find(self, query=None, projection=None, **kwargs):
+        cursor = FakeCursor(self, [_project(d, projection) for d in self._find(query)])
+        if kwargs.get("sort"):
+            cursor.sort(kwargs["sort"])
+        if kwargs.get("limit"):
+            cursor.limit(kwargs["limit"])
+        return cursor
+
+    async def count_documents(self, query, limit=0, **kwargs):
+        await self._op("count_documents")
+        count = len(self._find(query))
+        return min(count, limit) if limit else count
+
+    async def estimated_document_count(self):
+        await self._op("count")
+        return len(self.docs)
+
+    async def insert_one(self, doc):
+        await self._op("insert_one")
+        return SimpleNamespace(inserted_id=self._insert(doc))
+
+    async def insert_many(self, docs, ordered=True):
+        await self._op("insert_many")
+        ids = []
+        for doc in docs:
+            try:
+                ids.append(self._insert(doc))
+            except DuplicateKeyError:
+                if ordered:
+                    raise
+        return SimpleNamespace(inserted_ids=ids)
+
+    async def update_one(self, query, update, upsert=False, **kwargs):
+        await self._op("update_one")
+        return self._update(query, update, upsert)
+
+    async def update_many(self, query, update, upsert=False, **kwargs):
+        await self._op("update_many")
+        return self._update(query, update, upsert, many=True)
+
+    async def replace_one(self, query, doc, upsert=False):
+        await self._op("replace_one")
+        return self._update(query, doc, upsert)
+
+    async def delete_one(self, query):
+        await self._op("delete_one")
+        found = self._find(query)[:1]
+        for doc in found:
+            self.docs.remove(doc)
+        return SimpleNamespace(deleted_count=len(found))
+
+    async def delete_many(self, query):
+        await self._op("delete_many")
+        found = self._find(query)
+        self.docs = [d for d in self.docs if d not in found]
+        return SimpleNamespace(deleted_count=len(found))
+
+    async def find_one_and_delete(self, query, **kwargs):
+        await self._op("find_one_and_delete")
+        found = self._find(query)[:1]
+        for doc in found:
+            self.docs.remove(doc)
+        return found[0] if found else None
+
+    async def find_one_and_update(self, query, update, upsert=False, projection=None, return_document=False, **kwargs):
+        await self._op("find_one_and_update")
+        found = self._find(query)[:1]
+        before = copy.deepcopy(found[0]) if found else None
+        result = self._update(query, update, upsert)
+        after = found[0] if found else (self._find({"_id": result.upserted_id})[0] if result.upserted_id else None)
+        doc = after if return_document else before
+        return _project(doc, projection) if doc is not None else None
+
+    async def bulk_write(self, requests, ordered=True):
+        """Accepts pymongo UpdateOne / ReplaceOne / InsertOne / DeleteOne / DeleteMany"""
+        await self._op("bulk_write")
+        for request in requests:
+            kind = type(request).__name__
+            if kind == "InsertOne":
+                self._insert(request._doc)
+            elif kind in ("UpdateOne", "UpdateMany", "ReplaceOne"):
+                self._update(request._filter, request._doc, request._upsert, many=kind == "UpdateMany")
+            elif kind == "DeleteOne":
+                found = self._find(request._filter)[:1]
+                for doc in found:
+                    self.docs.remove(doc)
+            elif kind == "DeleteMany":
+                self.docs = [d for d in self.docs if not matches(d, request._filter)]
+            else:
+                raise NotImplementedError(f"FakeMongo: bulk op {kind}")
+        return SimpleNamespace(acknowledged=True)
+
+    def aggregate(self, pipeline, **kwargs):
+        return _FakeAggregate(self, pipeline)
+
+
+class _FakeAggregate:
+    """Supports $match, $project (inclusion), $group with $sum or $push, $sort,
+    $limit and uncorrelated $lookup ({from, pipeline, as})"""
+
+    def __init__(self, collection: FakeCollection, pipeline: list):
+        self._collection = collection
+        self._pipeline = pipeline
+
+    def _run(self) -> list:
+        docs = [copy.deepcopy(d) for d in self._collection.docs]
+        for stage in self._pipeline:
+            (op, arg), = stage.items()
+            if op == "$match":
+                docs = [d for d in docs if matches(d, arg)]
+            elif op == "$project":
+                docs = [_project(d, arg) for d in docs]
+            elif op == "$sort":
+                docs = FakeCursor(self._collection, docs).sort(list(arg.items()))._results()
+            elif op == "$limit":
+                docs = docs[:arg]
+            elif op == "$lookup":
+                if "pipeline" not in arg or "localField" in arg or "let" in arg:
+                    raise NotImplementedError("FakeMongo: only uncorrelated $lookup pipelines")
+                foreign = self._collection.database[arg["from"]]
+                joined = _FakeAggregate(foreign, arg["pipeline"])._run()
+                for doc in docs:
+                    doc[arg["as"]] = copy.deepcopy(joined)
+            elif op == "$group":
+                groups = {}
+                for doc in docs:
+                    key_expr = arg["_id"]
+                    if isinstance(key_expr, dict):
+                        key = {k: _get(doc, v[1:]) for k, v in key_expr.items()}
+                    else:
+                        key = _get(doc, key_expr[1:]) if isinstance(key_expr, str) else key_expr
+                    out = groups.setdefault(repr(key), {"_id": key})
+                    for field, acc in arg.items():
+                        if field == "_id":
+                            continue
+                        (acc_op, expr), = acc.items()
+                        value = _get(doc, expr[1:]) if isinstance(expr, str) else expr
+                        if acc_op == "$sum":
+                            out[field] = out.get(field, 0) + (value or 0)
+                        elif acc_op == "$push":
+                            out.setdefault(field, []).append(value)
+                        else:
+                            raise NotImplementedError(f"FakeMongo: accumulator {acc_op}")
+                docs = list(groups.values())
+            else:
+                raise NotImplementedError(f"FakeMongo: pipeline stage {op}")
+        return docs
+
+    async def to_list(self, length=None):
+        await self._collection._op("aggregate")
+        docs = self._run()
+        return docs if length is None else docs[:length]
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        await self._collection._op("aggregate")
+        for doc in self._run():
+            yield doc
+
+
+class FakeDatabase:
+    def __init__(self, client, name: str):
+        self.client = client
+        self.name = name
+        self._collections = {}
+
+    def __getitem__(self, name: str) -> FakeCollection:
+        if name not in self._collections:
+            self._collections[name] = FakeCollection(self, name)
+        return self._collections[name]
+
+    async def command(self, name, *args, **kwargs):
+        return {"ok": 1.0}
+
+
+class FakeMotorClient:
+    """Counts every operation in `ops`; `latency` simulates a Mongo round trip"""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.ops = Counter()
+        self._databases = {}
+        self.admin = FakeDatabase(self, "admin")
+
+    def __getitem__(self, name: str) -> FakeDatabase:
+        if name not in self._databases:
+            self._databases[name] = FakeDatabase(self, name)
+        return self._databases[name]
+
+    def close(self):
+        pass
+
+    @property
+    def total_ops(self) -> int:
+        return sum(self.ops.values())
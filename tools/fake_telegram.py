@@ -0,0 +1,126 @@
+# tools/fake_telegram.py - local stand-in for the Telegram side of GuardianBot
+import asyncio
+import itertools
+from collections import Counter
+from types import SimpleNamespace
+from helpers.dispatcher import ChatShardDispatcher
+from helpers.outbound import OutboundScheduler
+from helpers.peers import PeerCache
+from helpers.admins import AdminCache
+from helpers.edits import EditCoalescer
+
+
+class FakeTelegram:
+    """Implements the client methods the handlers use, without a network.
+
+    Every call is counted in `calls`; bans and sent messages are recorded.
+    `latency` adds a fixed delay to each API call to mimic a round trip.
+    """
+
+    def __init__(self, latency: float = 0.0, admins: dict | None = None):
+        self.latency = latency
+        self.me = SimpleNamespace(id=10**9, username="guardian_test_bot", first_name="Guardian", is_bot=True)
+        self.admins = admins or {}  # chat_id -> set of admin user ids
+        self.calls = Counter()
+        self.bans = []
+        self.sent = []
+        self._message_ids = itertools.count(1)
+        self.peers = PeerCache(self)
+        self.admin_cache = AdminCache(self)
+        self.outbound = OutboundScheduler(global_rate=10**6, global_burst=10**6, chat_rate=10**6, chat_burst=10**6)
+        self.shards = ChatShardDispatcher()
+        self.edits = EditCoalescer(self.outbound)
+        self.event_sink = None
+
+    async def _api(self, method: str):
+        self.calls[method] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+    async def start(self):
+        self.outbound.start()
+        self.shards.start()
+        await self.peers.load_me()
+
+    async def stop(self):
+        if self.event_sink is not None:
+            await self.event_sink.stop()
+        await self.shards.stop()
+        await self.edits.drain()
+        await self.outbound.stop()
+
+    async def get_me(self):
+        await self._api("get_me")
+        return self.me
+
+    async def get_chat(self, chat_id: int):
+        await self._api("get_chat")
+        return SimpleNamespace(id=chat_id, title=f"Chat {chat_id}", username=None, type="supergroup")
+
+    async def get_users(self, user_ids):
+        await self._api("get_users")
+        if isinstance(user_ids, (list, tuple)):
+            return [fake_user(user_id) for user_id in user_ids]
+        return fake_user(user_ids)
+
+    async def get_chat_member(self, chat_id: int, user_id: int):
+        await self._api("get_chat_member")
+        status = "administrator" if user_id in self.admins.get(chat_id, ()) else "member"
+        return SimpleNamespace(user=fake_user(user_id), status=status)
+
+    async def get_chat_members(self, chat_id: int, *args, **kwargs):
+        await self._api("get_chat_members")
+        for user_id in self.admins.get(chat_id, ()):
+            yield SimpleNamespace(user=fake_user(user_id), status="administrator")
+
+    async def ban_chat_member(self, chat_id: int, user_id: int, *args, **kwargs):
+        await self._api("ban_chat_member")
+        self.bans.append((chat_id, user_id))
+        return True
+
+    async def unban_chat_member(self, chat_id: int, user_id: int):
+        await self._api("unban_chat_member")
+        return True
+
+    async def send_message(self, chat_id: int, text: str, **kwargs):
+        await self._api("send_message")
+        self.sent.append((chat_id, text))
+        return fake_message(self, chat_id, text)
+
+
+def fake_user(user_id: int, is_bot: bool = False):
+    return SimpleNamespace(id=user_id, first_name=f"User{user_id}", username=None, is_bot=is_bot)
+
+
+def fake_message(client: FakeTelegram, chat_id: int, text: str = "", from_user_id: int | None = None):
+    """A Message-like object whose reply/edit_text go through the fake client"""
+    message = SimpleNamespace(
+        id=next(client._message_ids),
+        chat=SimpleNamespace(id=chat_id, type="private"),
+        from_user=fake_user(from_user_id or chat_id),
+        text=text,
+        forward_from=None,
+    )
+
+    async def reply(text, **kwargs):
+        return await client.send_message(chat_id, text, **kwargs)
+
+    async def edit_text(text, **kwargs):
+        await client._api("edit_message_text")
+        message.text = text
+        return message
+
+    message.reply = reply
+    message.edit_text = edit_text
+    return message
+
+
+def member_update(chat_id: int, user_id: int, old_status: str | None, new_status: str | None,
+                  chat_type: str = "supergroup"):
+    """A ChatMemberUpdated-shaped object for one status transition"""
+    user = fake_user(user_id)
+    return SimpleNamespace(
+        chat=SimpleNamespace(id=chat_id, type=chat_type, title=f"Chat {chat_id}"),
+        old_chat_member=SimpleNamespace(user=user, status=old_status) if old_status else None,
+        new_chat_member=SimpleNamespace(user=user, status=new_status) if new_status else None,
+    )
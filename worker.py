@@ -0,0 +1,100 @@
+# worker.py - member-update worker process for split mode (started by bot.py --split N)
+import argparse
+import asyncio
+import logging
+from config import Config
+from database import (
+    init_db, close_db, start_background_writers, stop_background_writers,
+    load_hitrun_index, restore_join_snapshot, invalidate_settings, load_blocklists,
+    share_global_stats_rollup, on_blocklist_change, apply_blocklist_change
+)
+from helpers.dispatcher import ChatShardDispatcher
+from helpers.events import MemberEvent
+from helpers.ipc import FrameConnection, RemoteClient
+from plugins.admin_logic import process_member_event
+
+logger = logging.getLogger(__name__)
+
+
+async def run_worker(shard: int, shards: int, socket_path: str):
+    reader, writer = await asyncio.open_unix_connection(socket_path)
+    conn = FrameConnection(reader, writer)
+    await conn.send({"op": "hello", "shard": shard})
+    welcome = await conn.recv()
+    if not welcome or welcome.get("op") != "welcome":
+        raise RuntimeError("Ingestion process did not accept this worker")
+
+    client = RemoteClient(conn, welcome["me"])
+    # Queue room covers every event the ingest side may have in flight, so
+    # submit() never blocks this receive loop (call results share the socket)
+    client.shards = ChatShardDispatcher(workers=Config.UPDATE_WORKERS, queue_size=Config.SPLIT_MAX_INFLIGHT)
+
+    await init_db()
+    # The ingestion process rebuilds the stats rollup; flushes here follow its lease
+    share_global_stats_rollup()
+    start_background_writers()
+    await load_hitrun_index()
+    await load_blocklists()
+    # Flags published here reach the other processes through the ingestion side
+    on_blocklist_change(client.blocklist_changed)
+    await restore_join_snapshot()
+    client.shards.start()
+    background = set()
+
+    async def handle(event: MemberEvent):
+        try:
+            await process_member_event(client, event)
+        finally:
+            await conn.send({"op": "ack", "n": 1})
+
+    logger.info(f"✅ Worker {shard + 1}/{shards} ready")
+    while True:
+        message = await conn.recv()
+        if message is None:
+            client.fail_pending("ingestion process went away")
+            break
+        if message.get("op") == "stop":
+            break
+        op = message.get("op")
+        if op == "event":
+            event = MemberEvent.from_dict(message["event"])
+            await client.shards.submit(event.chat_id, handle, event)
+        elif op == "result":
+            client.resolve(message)
+        elif op == "invalidate":
+            invalidate_settings(message["chat_id"])
+        elif op == "blocklist":
+            # Reloads read Mongo; keep receiving call results meanwhile
+            task = asyncio.create_task(apply_blocklist_change(message["name"], message.get("ids")))
+            background.add(task)
+            task.add_done_callback(background.discard)
+
+    # Drain: queued events still need call results, so keep reading them
+    drain = asyncio.create_task(client.shards.stop())
+    while not drain.done():
+        recv = asyncio.create_task(conn.recv())
+        done, _ = await asyncio.wait({drain, recv}, return_when=asyncio.FIRST_COMPLETED)
+        if recv not in done:
+            recv.cancel()
+            break
+        message = recv.result()
+        if message is None:
+            client.fail_pending("ingestion process went away")
+            break
+        if message.get("op") == "result":
+            client.resolve(message)
+    await drain
+    await stop_background_writers()
+    close_db()
+    await conn.close()
+    logger.info(f"🛑 Worker {shard} stopped")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Guardian Bot member-update worker")
+    parser.add_argument("--shard", type=int, required=True)
+    parser.add_argument("--shards", type=int, required=True)
+    parser.add_argument("--socket", required=True)
+    args = parser.parse_args()
+    logging.basicConfig(level=Config.LOG_LEVEL)
+    asyncio.run(run_worker(args.shard, args.shards, args.socket))